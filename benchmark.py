@@ -0,0 +1,926 @@
+
+#=========== pakages/modules that are used here ==============================
+import io
+import os
+import re
+import time
+import glob
+import tempfile
+from contextlib import redirect_stdout
+from datetime import datetime
+from os import path
+import numpy as np
+import pandas as pd
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+#import from the modules I have created
+import sentiment_analysis as sa
+import sentiment_cache as sc
+import data_cache as dc
+import plot_render as pr
+import sa_model as smod
+import stock_news as sn
+import stock_price as sp
+import stock_twitter as st
+import word_cloud as wc
+
+#================ code =======================================================
+# folder that holds the sample news and tweet files
+example_dir = path.join(path.dirname(path.abspath(__file__)), 'FileExample')
+
+
+def load_example_texts(kind, limit = None):
+    '''
+    Loads the texts from the sample files in the FileExample folder.
+
+    Parameters
+    ----------
+    kind(string): 'Tweets' for tweet texts or 'HisNews' for news headlines
+
+    limit(int): max number of texts to return, None means all of them
+
+    Returns
+    -------
+    Returns a list of text strings.
+    '''
+    column = 'Tweet Text' if kind == 'Tweets' else 'Headline'
+    texts = []
+
+    for f_name in sorted(glob.glob(path.join(example_dir, '*_' + kind + '_*.csv'))):
+        df = pd.read_csv(f_name)
+        texts.extend(df[column].dropna().astype(str).tolist())
+
+    if limit is not None:
+        texts = texts[:limit]
+
+    return texts
+
+
+def report(title, n, seconds):
+    '''
+    Prints one benchmark result line with total and per-text cost.
+
+    Parameters
+    ----------
+    title(string): name of the measured case
+
+    n(int): number of texts (or items) processed
+
+    seconds(float): total elapsed time in seconds
+    '''
+    per_item = seconds / n * 1e6 if n else 0
+    print('    {:<40s} {:>8d} items  {:>9.3f} s  {:>10.1f} us/item'.format(
+          title, n, seconds, per_item))
+
+
+def bench_sia_reuse(n = 1600):
+    '''
+    Compares the per-text cost of VADER scoring when a new analyzer is built
+    for every text against reusing the shared analyzer from
+    sentiment_analysis.get_analyzer.
+
+    Parameters
+    ----------
+    n(int): number of sample tweets to score
+    '''
+    texts = load_example_texts('Tweets', n)
+    print('\nVADER analyzer reuse (' + str(len(texts)) + ' tweets)')
+
+    # a new analyzer per text, as getSIA used to do
+    start = time.perf_counter()
+    for text in texts:
+        SentimentIntensityAnalyzer().polarity_scores(text)
+    report('new analyzer per text', len(texts), time.perf_counter() - start)
+
+    # the shared analyzer, warmed up first like the entry point does
+    sa.warm_up()
+    start = time.perf_counter()
+    for text in texts:
+        sa.getSIA(text)
+    report('shared analyzer', len(texts), time.perf_counter() - start)
+
+
+def bench_score_pool(workers_list = (1, 2, 4), chunk_size = 500, repeat = 4):
+    '''
+    Times sa.score_frame over all the sample tweets and news headlines, in
+    this process and with process pools of different sizes.
+
+    Parameters
+    ----------
+    workers_list(tuple): numbers of worker processes to try, 1 means
+    in-process scoring
+
+    chunk_size(int): number of texts sent to a worker at a time
+
+    repeat(int): how many times the sample texts are repeated, to get a
+    corpus about the size of 100 pages of news for 5 tickers
+    '''
+    texts = (load_example_texts('Tweets') + load_example_texts('HisNews')) * repeat
+    print('\nsentiment scoring pool (' + str(len(texts)) + ' tweets and headlines)')
+
+    # score every text from scratch, not from the sentiment cache
+    use_cache = sa.use_cache
+    sa.use_cache = False
+
+    for workers in workers_list:
+        # run one small batch first so the worker processes are started and
+        # warmed up outside the timing
+        sa.score_frame(texts[:sa.pool_min_texts], workers = workers,
+                       chunk_size = chunk_size)
+
+        start = time.perf_counter()
+        sa.score_frame(texts, workers = workers, chunk_size = chunk_size)
+        report(str(workers) + ' worker(s)', len(texts), time.perf_counter() - start)
+
+    sa.shutdown_pool()
+    sa.use_cache = use_cache
+
+
+def bench_score_cache():
+    '''
+    Times sa.score_frame over all the sample tweets and news headlines with
+    an empty sentiment cache, then again with the cache filled, asking for
+    all 6 scores and for only the VADER scores (like the tweets do).
+    '''
+    texts = load_example_texts('Tweets') + load_example_texts('HisNews')
+    print('\nsentiment score cache (' + str(len(texts)) + ' tweets and headlines)')
+
+    for name, metrics in [('all scores', sa.score_columns),
+                          ('VADER scores', sa.scorer_columns['vader'])]:
+        # a throwaway in-memory cache, so the real cache file is not touched
+        cache = sc.ScoreCache(':memory:', sa.scorer_version, len(sa.score_columns))
+
+        for title in ['empty cache', 'filled cache']:
+            start = time.perf_counter()
+            sa.score_frame(texts, metrics, cache = cache)
+            report(name + ', ' + title, len(texts), time.perf_counter() - start)
+
+        print('    hits: ' + str(cache.hits) + ', misses: ' + str(cache.misses) +
+              ', cached entries: ' + str(len(cache)))
+        cache.close()
+
+
+def legacy_price_move(adj_close):
+    '''
+    The loop that add_price_move used to run, kept here to compare with
+    sp.calc_price_move.
+
+    Parameters
+    ----------
+    adj_close(Series): one stock's Adj Close prices in date order
+
+    Returns
+    -------
+    Returns 2 lists: price movement directions and price changes in %.
+    '''
+    price_dir = []
+    price_chg = []
+
+    for i in range(0, len(adj_close)):
+        if i == 0:
+            price_dir.append(0)
+            price_chg.append(0)
+        else:
+            pre_price = adj_close.iloc[i-1]
+            cur_price = adj_close.iloc[i]
+
+            if cur_price > pre_price:
+                price_dir.append(1)
+            elif cur_price < pre_price:
+                price_dir.append(-1)
+            else:
+                price_dir.append(0)
+
+            price_chg.append((cur_price - pre_price)/ pre_price * 100)
+
+    return price_dir, price_chg
+
+
+def make_price_panel(n_tickers = 500, n_days = 5040, seed = 0):
+    '''
+    Makes random daily prices for many stocks, as a random walk.
+
+    Parameters
+    ----------
+    n_tickers(int): number of stocks
+
+    n_days(int): number of trading days (5040 is about 20 years)
+
+    seed(int): random seed
+
+    Returns
+    -------
+    Returns a DataFrame indexed by date with one column of prices per stock.
+    '''
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.02, size = (n_days, n_tickers))
+    prices = 100 * np.exp(np.cumsum(returns, axis = 0))
+    dates = pd.bdate_range('2000-01-03', periods = n_days)
+    columns = ['T' + str(i) for i in range(n_tickers)]
+
+    return pd.DataFrame(prices, index = dates, columns = columns)
+
+
+def bench_price_move(n_tickers = 500, n_days = 5040, loop_tickers = 5):
+    '''
+    Times the old add_price_move loop against sp.calc_price_move on random
+    20-year price histories, and checks they give the same numbers.
+
+    Parameters
+    ----------
+    n_tickers(int): number of stocks
+
+    n_days(int): number of trading days per stock
+
+    loop_tickers(int): number of stocks timed with the slow loop; the time
+    for all stocks is estimated from it
+    '''
+    panel = make_price_panel(n_tickers, n_days)
+    print('\nprice movement (' + str(n_tickers) + ' tickers x ' +
+          str(n_days) + ' days)')
+
+    start = time.perf_counter()
+    for col in panel.columns[:loop_tickers]:
+        price_dir, price_chg = legacy_price_move(panel[col])
+    seconds = (time.perf_counter() - start) / loop_tickers * n_tickers
+    report('loop (estimated from ' + str(loop_tickers) + ' tickers)',
+           n_tickers, seconds)
+
+    start = time.perf_counter()
+    moves = sp.calc_price_move(panel)
+    report('vectorized, all tickers at once', n_tickers, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    sp.calc_price_move(panel, horizons = [5, 20, 60], log_return = True)
+    report('vectorized, 4 horizons + log returns', n_tickers,
+           time.perf_counter() - start)
+
+    last = panel.columns[loop_tickers - 1]
+    same = (moves['PriceDir'][last].tolist() == price_dir and
+            np.allclose(moves['PriceChg'][last].values, price_chg))
+    print('    same as the loop: ' + str(same))
+
+
+def make_ohlc_panel(n_tickers = 500, n_days = 5000, seed = 0):
+    '''
+    Makes random daily 'Adj Close', 'High', 'Low' and 'Close' prices for many
+    stocks, as arrays with one row per stock and one column per day.
+    '''
+    rng = np.random.default_rng(seed)
+    close = make_price_panel(n_tickers, n_days, seed).values.T
+    spread = close * rng.uniform(0, 0.03, size = close.shape)
+
+    return {'Adj Close': close * 0.98, 'Close': close,
+            'High': close + spread, 'Low': close - spread}
+
+
+def pandas_indicators(prices):
+    '''
+    Calculates the same indicators as sp.calc_indicators with pandas rolling
+    and ewm, one indicator at a time, as a reference.
+    '''
+    adj_close = pd.DataFrame(prices['Adj Close'].T)
+    fast, slow, signal = sp.macd_spans
+
+    ref = {}
+    for n in sp.sma_windows:
+        ref['SMA ' + str(n)] = adj_close.rolling(n).mean()
+    ref['EMA ' + str(sp.ema_span)] = adj_close.ewm(span = sp.ema_span, adjust = False).mean()
+
+    change = adj_close.diff()
+    avg_gain = change.clip(lower = 0).ewm(alpha = 1 / sp.rsi_days, adjust = False,
+                                          min_periods = sp.rsi_days).mean()
+    avg_loss = (-change).clip(lower = 0).ewm(alpha = 1 / sp.rsi_days, adjust = False,
+                                             min_periods = sp.rsi_days).mean()
+    ref['RSI ' + str(sp.rsi_days)] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    macd = (adj_close.ewm(span = fast, adjust = False).mean() -
+            adj_close.ewm(span = slow, adjust = False).mean())
+    ref['MACD'] = macd
+    ref['MACD Signal'] = macd.ewm(span = signal, adjust = False).mean()
+    ref['MACD Hist'] = ref['MACD'] - ref['MACD Signal']
+
+    mid = adj_close.rolling(sp.bollinger_days).mean()
+    width = sp.bollinger_width * adj_close.rolling(sp.bollinger_days).std(ddof = 0)
+    ref['BB Mid'] = mid
+    ref['BB Upper'] = mid + width
+    ref['BB Lower'] = mid - width
+
+    high = pd.DataFrame(prices['High'].T)
+    low = pd.DataFrame(prices['Low'].T)
+    pre_close = pd.DataFrame(prices['Close'].T).shift(1)
+    true_range = pd.concat([high - low, (high - pre_close).abs(),
+                            (low - pre_close).abs()]).groupby(level = 0).max()
+    ref['ATR ' + str(sp.atr_days)] = true_range.ewm(alpha = 1 / sp.atr_days, adjust = False,
+                                                    min_periods = sp.atr_days).mean()
+
+    return {name: df.values.T for name, df in ref.items()}
+
+
+def bench_indicators(n_tickers = 500, n_days = 5000):
+    '''
+    Times sp.calc_indicators on a whole panel of stocks against pandas, and
+    checks every indicator is the same.
+    '''
+    prices = make_ohlc_panel(n_tickers, n_days)
+    print('\ntechnical indicators (' + str(n_tickers) + ' tickers x ' +
+          str(n_days) + ' days)')
+
+    start = time.perf_counter()
+    ref = pandas_indicators(prices)
+    report('pandas rolling / ewm', n_tickers, time.perf_counter() - start)
+
+    loop_tickers = 20
+    start = time.perf_counter()
+    for i in range(loop_tickers):
+        pandas_indicators({col: values[i:i + 1] for col, values in prices.items()})
+    seconds = (time.perf_counter() - start) / loop_tickers * n_tickers
+    report('pandas, one ticker at a time (estimated)', n_tickers, seconds)
+
+    start = time.perf_counter()
+    indicators = sp.calc_indicators(prices)
+    report('calc_indicators, whole panel', n_tickers, time.perf_counter() - start)
+
+    different = [name for name in ref
+                 if not np.allclose(indicators[name], ref[name], rtol = 1e-7,
+                                    atol = 1e-7, equal_nan = True)]
+    print('    same as pandas: ' + str(len(different) == 0) +
+          ('' if len(different) == 0 else ' (different: ' + ', '.join(different) + ')'))
+
+
+def make_price_store(prices, n_days = None):
+    '''
+    Makes a price store (see sp.load_price_store) from the first n_days of
+    1-D price arrays like one stock of make_ohlc_panel.
+    '''
+    if n_days is None:
+        n_days = len(prices['Adj Close'])
+
+    dates = np.datetime64('2000-01-03') + np.arange(n_days)
+    store = {col: prices[col][:n_days].copy() for col in prices}
+    store['Open'] = store['Close'].copy()
+    store['Volume'] = np.ones(n_days)
+    store['Date'] = dates
+    store['Covered'] = np.array([dates[0], dates[-1]])
+
+    return store
+
+
+def bench_indicator_updates(n_days = 5000, new_days = 20):
+    '''
+    Times adding new days to a stock's saved indicators one day at a time
+    (sp.update_indicator_store) against working out every indicator again
+    for each new day, and checks the saved indicators match calc_indicators
+    on the whole price history.
+    '''
+    prices = {col: values[0] for col, values in make_ohlc_panel(1, n_days).items()}
+    # a missing day, like a 'null' row from yahoo finance
+    prices['Adj Close'][n_days // 2] = np.nan
+    print('\nindicator updates (' + str(new_days) + ' new days after ' +
+          str(n_days - new_days) + ')')
+
+    old_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            store = make_price_store(prices, n_days - new_days)
+            start = time.perf_counter()
+            sp.build_indicator_store('TEST', store)
+            report('build the indicator store', n_days - new_days,
+                   time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for n in range(n_days - new_days + 1, n_days + 1):
+                sp.calc_indicators(make_price_store(prices, n))
+            report('calc_indicators again for each day', new_days,
+                   time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for n in range(n_days - new_days + 1, n_days + 1):
+                new_store = make_price_store(prices, n)
+                sp.update_indicator_store('TEST', store, new_store)
+                store = new_store
+            report('update_indicator_store, one day at a time', new_days,
+                   time.perf_counter() - start)
+
+            istore = sp.load_indicator_store('TEST')
+        finally:
+            os.chdir(old_dir)
+
+    full = sp.calc_indicators(prices)
+    different = [name for name in sp.indicator_names()
+                 if not np.allclose(istore[name], full[name], rtol = 1e-7,
+                                    atol = 1e-7, equal_nan = True)]
+    print('    same as a full recompute: ' + str(len(different) == 0) +
+          ('' if len(different) == 0 else ' (different: ' + ', '.join(different) + ')'))
+
+
+def bench_word_cloud_nlp(calls = 3):
+    '''
+    Times the spaCy step of a word cloud over the sample tweets and news
+    headlines: loading the full model for every word cloud as
+    create_wordcloud used to do, against the shared model from wc.get_nlp
+    without the unused pipeline parts, run in batches with nlp.pipe.
+
+    Parameters
+    ----------
+    calls(int): number of word clouds made in a row (each one used to load
+    the model again)
+    '''
+    # only this benchmark needs spaCy's model itself
+    import en_core_web_sm
+
+    corpora = {'tweets': load_example_texts('Tweets'),
+               'news': load_example_texts('HisNews')}
+
+    for kind, texts in corpora.items():
+        print('\nword cloud words, ' + kind + ' (' + str(len(texts)) + ' texts, ' +
+              str(calls) + ' word clouds)')
+
+        # the old way: load the model, then run the whole pipeline on all 
+        # the texts joined into one string
+        start = time.perf_counter()
+        for i in range(calls):
+            nlp = en_core_web_sm.load()
+            nlp.max_length = max(nlp.max_length, sum(len(t) for t in texts) + 1)
+            old_words = [w.text.lower() for w in nlp(' '.join(texts))
+                         if w.pos_ in ['ADJ', 'NOUN']]
+        report('load model per call, full pipeline', len(texts) * calls,
+               time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(calls):
+            new_words = [w for words in wc.pos_words(texts) for w in words]
+        report('shared model, nlp.pipe', len(texts) * calls,
+               time.perf_counter() - start)
+
+        print('    words found: ' + str(len(old_words)) + ' vs ' + str(len(new_words)))
+
+
+def legacy_word_text(words):
+    '''
+    The way create_wordcloud used to build its text, one word at a time,
+    kept here to compare with wc.count_words.
+
+    Parameters
+    ----------
+    words(list): lowercase word strings
+
+    Returns
+    -------
+    Returns all the words in one string, separated by spaces.
+    '''
+    newText = ''
+    for word in words:
+        newText = " ".join((newText, word))
+
+    return newText
+
+
+def bench_word_count(repeat = 10):
+    '''
+    Times building the word cloud input from the sample news headlines,
+    repeated to about 100 pages of news per ticker for 10 tickers: the old
+    text joined word by word, against counting the words with
+    wc.count_words. The spaCy step is the same for both, so it is run
+    once outside the timing.
+
+    Parameters
+    ----------
+    repeat(int): how many times the sample headlines are repeated
+    '''
+    texts = load_example_texts('HisNews') * repeat
+    word_lists = list(wc.pos_words(texts))
+    print('\nword cloud input (' + str(len(texts)) + ' headlines)')
+
+    start = time.perf_counter()
+    legacy_word_text([w for words in word_lists for w in words])
+    report('text joined word by word', len(texts), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    word_count = wc.count_words(word_lists)
+    report('Counter, one text at a time', len(texts), time.perf_counter() - start)
+
+    print('    distinct words: ' + str(len(word_count)))
+
+
+def legacy_clean_tweet_text(tweet):
+    '''
+    The 5 re.sub calls that st.clean_tweet_text used to run, kept here to
+    compare with it.
+
+    Parameters
+    ----------
+    tweet(string): a twitter tweet
+
+    Returns
+    -------
+    Returns a cleaned tweet text.
+    '''
+    tweet = re.sub(r'@[A-Za-z0-9]+','', tweet)  # remove @mentions
+    tweet = re.sub(r'#', '', tweet)  # Remove '#' hash tag
+    tweet = re.sub(r'RT [@:]', '', tweet) # remove RT
+    tweet = re.sub(r'\n', '', tweet) # remove an empty line
+    tweet = re.sub('https?://[A-Za-z0-9./]+','', tweet)  # remove hyperlink
+
+    return tweet
+
+
+def make_raw_tweets(texts, n, seed = 0):
+    '''
+    Makes raw-looking tweets from cleaned sample tweets, by adding retweet
+    marks, @mentions, hashtags, line breaks and hyperlinks, including the
+    tricky cases where one cleaning step makes text for a later step.
+
+    Parameters
+    ----------
+    texts(list): cleaned tweet text strings
+
+    n(int): number of tweets to make
+
+    seed(int): random seed
+
+    Returns
+    -------
+    Returns a list of n tweet text strings.
+    '''
+    rng = np.random.default_rng(seed)
+    extras = ['RT @trader: ', '@bull42 ', '#stocks ', '\n', 'https://t.co/Ab12/x ',
+              'RT #:', 'RT #@bear ', 'htt\nps://t.co/Zz9 ', 'R\nT @x ', '@#tag ']
+    tweets = []
+
+    for i in range(n):
+        words = texts[i % len(texts)].split(' ')
+        for extra in rng.choice(extras, size = 3):
+            words.insert(int(rng.integers(0, len(words) + 1)), extra)
+        tweets.append(' '.join(words))
+
+    return tweets
+
+
+def bench_tweet_clean(n = 100000):
+    '''
+    Times cleaning n raw-looking tweets with the old 5 re.sub calls, with
+    st.clean_tweet_text, and with st.clean_many on a whole column, and checks
+    all 3 give exactly the same texts, for both the sample tweet files and 
+    the raw-looking tweets.
+
+    Parameters
+    ----------
+    n(int): number of tweets
+    '''
+    samples = load_example_texts('Tweets')
+    tweets = make_raw_tweets(samples, n)
+    print('\ntweet cleaning (' + str(n) + ' tweets)')
+
+    start = time.perf_counter()
+    old_texts = [legacy_clean_tweet_text(t) for t in tweets]
+    report('5 re.sub calls per tweet', n, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    new_texts = [st.clean_tweet_text(t) for t in tweets]
+    report('3 precompiled patterns per tweet', n, time.perf_counter() - start)
+
+    column = pd.Series(tweets)
+    start = time.perf_counter()
+    many_texts = st.clean_many(column).tolist()
+    report('clean_many on the whole column', n, time.perf_counter() - start)
+
+    same_samples = ([legacy_clean_tweet_text(t) for t in samples] ==
+                    [st.clean_tweet_text(t) for t in samples] ==
+                    st.clean_many(pd.Series(samples)).tolist())
+    print('    same texts: ' + str(old_texts == new_texts == many_texts) +
+          ', same sample file texts: ' + str(same_samples))
+
+
+def make_model_frames(n_tickers = 500, n_days = 60, seed = 0):
+    '''
+    Makes random merged price and news sentiment data for many stocks, like
+    the data sn.merge_news_sa_price returns.
+
+    Returns
+    -------
+    Returns a dictionary ticker -> DataFrame with the columns 'Open',
+    'Compound', 'Polarity' and 'Adj Close'.
+    '''
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2020-09-01', periods = n_days).strftime('%Y-%m-%d')
+
+    frames = {}
+    for i in range(n_tickers):
+        df = pd.DataFrame(index = pd.Index(dates, name = 'Date'))
+        df['Open'] = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+        df['Compound'] = rng.uniform(-1, 1, n_days)
+        df['Polarity'] = rng.uniform(-1, 1, n_days)
+        df['Adj Close'] = (df['Open'] * (1 + rng.normal(0, 0.01, n_days)) +
+                           2 * df['Compound'])
+        frames['T' + str(i)] = df
+
+    return frames
+
+
+def bench_ols_batch(n_tickers = 500, n_days = 60):
+    '''
+    Times fitting the news sentiment model for many stocks the old way
+    (statsmodels fit and summary for each stock) against the numpy fast path
+    and the session model cache, and checks the coefficients are the same.
+    '''
+    frames = make_model_frames(n_tickers, n_days)
+    x_columns = sn.news_x_columns
+    smod.clear_models()
+    print('\nsentiment OLS models (' + str(n_tickers) + ' tickers x ' +
+          str(n_days) + ' days)')
+
+    start = time.perf_counter()
+    old_params = {}
+    for ticker, df in frames.items():
+        X = smod.sm.add_constant(df[x_columns])
+        model = smod.sm.OLS(df['Adj Close'], X).fit()
+        model.summary()
+        old_params[ticker] = model.params
+    report('statsmodels fit + summary', n_tickers, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    table = smod.batch_fit(frames, x_columns, full = True)
+    report('batch_fit, statsmodels', n_tickers, time.perf_counter() - start)
+
+    smod.clear_models()
+    start = time.perf_counter()
+    table = smod.batch_fit(frames, x_columns)
+    report('batch_fit, numpy fast path', n_tickers, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    smod.batch_fit(frames, x_columns)
+    report('batch_fit again, from the cache', n_tickers, time.perf_counter() - start)
+
+    old = pd.DataFrame(old_params).T
+    same = np.allclose(table[old.columns].values, old.values)
+    print('    same coefficients as statsmodels: ' + str(same))
+
+
+
+def refit_rolling_coefs(X, Y, window):
+    '''
+    Fits every rolling (or, for window None, expanding) window again from
+    scratch with numpy, the way sa_model.rolling_coefs would without the
+    recursive updates.
+    '''
+    n_coefs = X.shape[1]
+    coefs = np.full(X.shape, np.nan)
+    size = n_coefs + 1 if window is None else window
+
+    for i in range(size - 1, len(X)):
+        start = 0 if window is None else i - window + 1
+        coefs[i] = np.linalg.lstsq(X[start:i + 1], Y[start:i + 1], rcond = None)[0]
+
+    return coefs
+
+
+def bench_rolling_coefs(n_days = 5000, windows = (20, 250, 1000, None)):
+    '''
+    Times sa_model.rolling_coefs (fitting short windows directly, recursive
+    least squares for long and expanding windows) against fitting every 
+    window again, and checks they give the same coefficients. Then does the 
+    same with a stretch of days whose sentiment does not change, where the 
+    windows inside it cannot be fitted and must be left nan.
+    '''
+    df = make_model_frames(1, n_days)['T0']
+    x_columns = sn.news_x_columns
+    print('\nrolling sentiment model coefficients (' + str(n_days) + ' days)')
+
+    flat_df = df.copy()
+    flat_rows = slice(n_days // 5, n_days // 2)
+    for col in ['Compound', 'Polarity']:
+        flat_df.iloc[flat_rows, flat_df.columns.get_loc(col)] = 0.0
+
+    for name, data in [('', df), ('flat, ', flat_df)]:
+        columns, values = smod.model_values(data, x_columns)
+        X = np.column_stack([np.ones(n_days), values[:, :-1]])
+        Y = values[:, -1]
+
+        for window in windows:
+            size = 'expanding' if window is None else str(window) + ' day window'
+
+            start = time.perf_counter()
+            old = refit_rolling_coefs(X, Y, window)
+            report(name + size + ', refit every window', n_days, 
+                   time.perf_counter() - start)
+
+            start = time.perf_counter()
+            new = smod.rolling_coefs(data, x_columns, window).values
+            report(name + size + ', rolling_coefs', n_days, 
+                   time.perf_counter() - start)
+
+            # refitting gives some coefficients for windows that cannot be 
+            # fitted; compare only the windows rolling_coefs gives
+            fitted = ~np.isnan(new).any(axis = 1)
+            same = np.allclose(new[fitted], old[fitted], rtol = 1e-5, atol = 1e-6)
+            print('    same coefficients: ' + str(same) + ', windows left nan: ' +
+                  str(int((~fitted).sum())))
+
+
+def bench_render(n_tickers = 8, n_days = 750, chart_names = ('price_volm', 'sma')):
+    '''
+    Times saving the price charts of many stocks to files with
+    pr.render_tickers, in this process one stock after another against
+    shared out over worker processes, and checks every chart file was made.
+    The stocks have made-up saved prices, so no data is downloaded.
+    '''
+    panel = make_ohlc_panel(n_tickers, n_days)
+    tickers = ['T' + str(i) for i in range(n_tickers)]
+    # the dates of make_price_store
+    dates = np.datetime64('2000-01-03') + np.arange(n_days)
+    params = {'start_date': str(dates[0]), 'end_date': str(dates[-1])}
+    workers = pr.render_workers or os.cpu_count() or 1
+    print('\nheadless chart rendering (' + str(n_tickers) + ' tickers x ' +
+          str(len(chart_names)) + ' charts, ' + str(workers) + ' workers)')
+
+    # the charts load the prices from the current folder
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            for i, ticker in enumerate(tickers):
+                prices = {col: values[i] for col, values in panel.items()}
+                sp.save_price_store(ticker, make_price_store(prices))
+
+            results = {}
+            for n_workers in sorted({1, workers}):
+                start = time.perf_counter()
+                results[n_workers] = pr.render_tickers(tickers, list(chart_names),
+                                                       out_dir = str(n_workers),
+                                                       workers = n_workers, **params)
+                report(str(n_workers) + ' process(es)', n_tickers * len(chart_names),
+                       time.perf_counter() - start)
+
+            files = [f for result in results.values() for charts in result.values()
+                     for f in charts.values()]
+            made = all(f is not None and path.exists(f) for f in files)
+        finally:
+            os.chdir(cwd)
+
+    print('    all chart files made: ' + str(made))
+
+
+def put_chart_data(ticker, params, n_days = 60):
+    '''
+    Puts made-up news and tweet data for a stock in the session data cache
+    and the current folder, so every chart in pr.charts can be drawn without
+    downloading anything. The prices come from the stock's price store.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    params(dict): the chart parameters 'from_date' and 'pagenum'
+
+    n_days(int): number of days of news data
+    '''
+    today = datetime.today()
+    today_str = today.strftime('%Y%m%d')
+
+    df = make_model_frames(1, n_days)['T0']
+    df['PriceChg'] = df['Adj Close'].pct_change().fillna(0) * 100
+    for col in ['Negative', 'Neutral', 'Positive']:
+        df[col] = 1 / 3
+    dc.put(ticker, 'news_price', (today_str, params['from_date'], params['pagenum']), df)
+
+    df_tweets = df.tail(st.tweet_days)
+    dc.put(ticker, 'tweets_price', (today.strftime('%Y-%m-%d'),), df_tweets)
+    dc.put(ticker, 'tweets_daily', (today_str,), df_tweets[st.sa_columns])
+
+    # the word clouds read the news and tweet files of today
+    pd.DataFrame({'Headline': load_example_texts('HisNews')}).to_csv(
+        ticker + '_HisNews_' + today_str + '_p' + str(params['pagenum']) + '.csv',
+        index = False)
+    pd.DataFrame({'Tweet Text': load_example_texts('Tweets')}).to_csv(
+        ticker + '_Tweets_' + today_str + '.csv', index = False)
+
+
+def bench_chart_latency(repeat = 5, n_days = 750):
+    '''
+    Times the matplotlib style set up of a chart the old way (all rcParams
+    set back to the defaults, then style.use) against the cached style
+    context of pr.chart_style, and checks which one leaves rcParams as they
+    were. Then times saving each chart in pr.charts to a png file.
+
+    Parameters
+    ----------
+    repeat(int): number of times each chart is drawn
+
+    n_days(int): number of days of prices
+    '''
+    calls = 1000
+    print('\nchart style set up (' + str(calls) + ' charts)')
+
+    before = dict(pr.mpl.rcParams)
+    start = time.perf_counter()
+    for i in range(calls):
+        pr.mpl.rcParams.update(pr.mpl.rcParamsDefault)
+        pr.plt.style.use('ggplot')
+    report('rcParams reset + style.use', calls, time.perf_counter() - start)
+    legacy_leaks = dict(pr.mpl.rcParams) != before
+    pr.mpl.rcParams.update(before)
+
+    start = time.perf_counter()
+    for i in range(calls):
+        with pr.chart_style('ggplot'):
+            pass
+    report('cached style context', calls, time.perf_counter() - start)
+    print('    rcParams changed afterwards: ' + str(legacy_leaks) + ' vs ' +
+          str(dict(pr.mpl.rcParams) != before))
+
+    prices = {col: values[0] for col, values in make_ohlc_panel(1, n_days).items()}
+    dates = np.datetime64('2000-01-03') + np.arange(n_days)
+    params = {'start_date': str(dates[0]), 'end_date': str(dates[-1]),
+              'from_date': '2020-09-01', 'pagenum': 1}
+    print('\nchart render latency (png, ' + str(repeat) + ' charts each)')
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            sp.save_price_store('BENCH', make_price_store(prices))
+            put_chart_data('BENCH', params)
+
+            for chart in pr.charts:
+                # the model charts print their summaries
+                with redirect_stdout(io.StringIO()):
+                    pr.render_chart(chart, 'BENCH', params)
+                    start = time.perf_counter()
+                    for i in range(repeat):
+                        pr.render_chart(chart, 'BENCH', params)
+                    seconds = time.perf_counter() - start
+
+                report(chart, repeat, seconds)
+        finally:
+            os.chdir(cwd)
+            dc.invalidate('BENCH')
+
+
+def bench_decimate(n_days = 60000, n_tickers = 2):
+    '''
+    Times saving the price and volume chart of a long price history, and the
+    price comparison chart of a few stocks, with every day drawn against
+    only the lowest and highest points of every pixel column (pr.decimate).
+    Checks how many pixels of the two png files are different.
+
+    Parameters
+    ----------
+    n_days(int): number of days of prices
+    
+    n_tickers(int): number of stocks in the price comparison chart
+    '''
+    panel = make_ohlc_panel(n_tickers, n_days)
+    tickers = ['T' + str(i) for i in range(n_tickers)]
+    # trading days only, with a holiday every 50 days, like real prices
+    dates = np.busday_offset('2000-01-03', np.arange(n_days) * 51 // 50)
+    params = {'start_date': str(dates[0]), 'end_date': str(dates[-1])}
+    print('\nlong price history charts (' + str(n_days) + ' days)')
+
+    decimate_lines = pr.decimate_lines
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.chdir(tmp_dir)
+        try:
+            for i, ticker in enumerate(tickers):
+                prices = {col: values[i] for col, values in panel.items()}
+                store = make_price_store(prices)
+                store['Volume'] = np.random.default_rng(i).lognormal(15, 1, n_days)
+                store['Date'] = dates
+                store['Covered'] = np.array([dates[0], dates[-1]])
+                sp.save_price_store(ticker, store)
+
+            for chart, name in [('price_volm', tickers[0]), ('multi_price', tickers)]:
+                images = []
+                for pr.decimate_lines in [False, True]:
+                    start = time.perf_counter()
+                    f_name = pr.render_chart(chart, name, params,
+                                             out_dir = str(pr.decimate_lines))
+                    report(chart + (', decimated' if pr.decimate_lines else
+                                    ', every day'), 1, time.perf_counter() - start)
+                    images.append(pr.plt.imread(f_name))
+
+                different = np.any(images[0] != images[1], axis = -1).mean()
+                print('    pixels different: ' + str(round(different * 100, 2)) + '%')
+        finally:
+            os.chdir(cwd)
+            pr.decimate_lines = decimate_lines
+
+
+# run all the benchmarks if the current module is the main module
+if __name__ == "__main__":
+    bench_sia_reuse()
+    bench_score_pool()
+    bench_score_cache()
+    bench_price_move()
+    bench_indicators()
+    bench_indicator_updates()
+    bench_word_cloud_nlp()
+    bench_word_count()
+    bench_tweet_clean()
+    bench_ols_batch()
+    bench_rolling_coefs()
+    bench_render()
+    bench_chart_latency()
+    bench_decimate()
@@ -0,0 +1,155 @@
+
+#=========== pakages/modules that are used here ==============================
+import sys
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+#================ code =======================================================
+# max memory (in bytes) the cached data may take before the least recently
+# used data is removed
+max_bytes = 256 * 1024 * 1024
+
+# number of lookups that found / did not find their data, for this session
+hits = 0
+misses = 0
+
+# (ticker, dataset, params) -> (data, size in bytes, datasets it depends on),
+# least recently used first
+_entries = OrderedDict()
+_size = 0
+_lock = threading.Lock()
+
+
+def data_size(data):
+    '''
+    Gets the memory used by a piece of data.
+
+    Parameters
+    ----------
+    data(object): a DataFrame, Series or any other object
+
+    Returns
+    -------
+    Returns the size in bytes, including the text strings in a DataFrame or
+    Series.
+    '''
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(deep = True).sum())
+    if isinstance(data, pd.Series):
+        return int(data.memory_usage(deep = True))
+    return sys.getsizeof(data)
+
+
+def copy_data(data):
+    '''
+    Copies a DataFrame or Series, so changing the copy (like its index) never
+    changes the cached data. Other objects are returned as they are.
+    '''
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        return data.copy()
+    return data
+
+
+def get(ticker, dataset, params = ()):
+    '''
+    Gets data from the session cache.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    dataset(string): the kind of data, like 'price' or 'news'
+
+    params(tuple): the other values the data depends on, like a date range
+
+    Returns
+    -------
+    Returns a copy of the cached data, or None if it is not in the cache.
+    '''
+    global hits, misses
+
+    key = (ticker, dataset, params)
+
+    with _lock:
+        if key not in _entries:
+            misses += 1
+            return None
+
+        hits += 1
+        _entries.move_to_end(key)
+        return copy_data(_entries[key][0])
+
+
+def put(ticker, dataset, params, data, depends = ()):
+    '''
+    Saves data in the session cache, then removes the least recently used
+    data if the cache has grown past max_bytes.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    dataset(string): the kind of data, like 'price' or 'news'
+
+    params(tuple): the other values the data depends on, like a date range
+
+    data(object): the data, usually a DataFrame. A copy is saved.
+
+    depends(list): other datasets of the same ticker this data is made from;
+    invalidating any of them removes this data too
+    '''
+    global _size
+
+    key = (ticker, dataset, params)
+    size = data_size(data)
+
+    with _lock:
+        if key in _entries:
+            _size -= _entries.pop(key)[1]
+
+        _entries[key] = (copy_data(data), size, tuple(depends))
+        _size += size
+
+        # always keep the newest data, even if it is bigger than max_bytes
+        while _size > max_bytes and len(_entries) > 1:
+            _size -= _entries.popitem(last = False)[1][1]
+
+
+def invalidate(ticker = None, dataset = None):
+    '''
+    Removes data from the session cache, after the files it was read from
+    have changed.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol, None means all tickers
+
+    dataset(string): the kind of data, None means all kinds. The data made
+    from this dataset is removed too.
+    '''
+    global _size
+
+    with _lock:
+        for key in list(_entries):
+            key_ticker, key_dataset, params = key
+            depends = _entries[key][2]
+
+            if ticker is not None and key_ticker != ticker:
+                continue
+            if dataset is not None and key_dataset != dataset and dataset not in depends:
+                continue
+
+            _size -= _entries.pop(key)[1]
+
+
+def cache_size():
+    '''
+    Gets the number of cached pieces of data and the memory they use.
+
+    Returns
+    -------
+    Returns a tuple (number of entries, size in bytes).
+    '''
+    with _lock:
+        return len(_entries), _size
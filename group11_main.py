@@ -3,12 +3,20 @@
 import colored
 from colored import stylize
 from datetime import datetime, timedelta
+import threading
 
-import stock_profile as sf
-import stock_price as sp
-import stock_twitter as st
-import stock_news as sn
-import word_cloud as wc
+import prefetch as pf
+from lazy_import import lazy_import
+
+# the modules below (and pandas, matplotlib, statsmodels, tweepy, TextBlob,
+# NLTK and spaCy that they use) are only imported when a menu option first
+# needs them, so the main menu shows up at once
+sf = lazy_import('stock_profile')
+sp = lazy_import('stock_price')
+st = lazy_import('stock_twitter')
+sn = lazy_import('stock_news')
+wc = lazy_import('word_cloud')
+sa = lazy_import('sentiment_analysis')
 
 #================ code =======================================================
 # my company name
@@ -54,6 +62,7 @@ a_ticker_news_menu['2'] = "Plot closing price vs news sentiment"
 a_ticker_news_menu['3'] = "Display new sentiment model summary on closing price"
 a_ticker_news_menu['4'] = "News word cloud"
 a_ticker_news_menu['5'] = "Add more tickers to compare news sentiment"
+a_ticker_news_menu['6'] = "Plot rolling news sentiment model coefficients"
 a_ticker_news_menu['H'] = "Back to the main menu"
 a_ticker_news_menu['M'] = "Back to the one stock exploration menu"
 a_ticker_news_menu['Q'] = "Exit"
@@ -74,6 +83,10 @@ a_ticker_twitter_menu['Q'] = "Exit"
 invalid_style = colored.fg("red") + colored.attr("bold")
 input_style = colored.fg("light_yellow") + colored.attr("bold")
 
+# loads the data of the stock a user picks in the background, while the user
+# is still choosing from the menus
+prefetcher = pf.Prefetcher()
+
 def display_menu(menu_dict):
     '''
     Prints out a menu in a nice format
@@ -91,6 +104,26 @@ def display_menu(menu_dict):
         print("    "+ entry + ")  " + menu_dict[entry])
 
 
+def wait_prefetch(ticker, task_name):
+    '''
+    Waits for the background loading of a stock's data to finish, printing 
+    the loading progress if it is not done yet.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    task_name(string): the data being loaded: 'price', 'profile', 'news' or
+    'tweets'
+    '''
+    if prefetcher.status().get(task_name) in [pf.waiting, pf.running]:
+        print("\n    still loading " + task_name + " in the background ... " +
+              prefetcher.progress_text())
+    
+    # if the loading failed, the menu option will just load the data again
+    prefetcher.wait(ticker, task_name)
+
+
 def validate_choice(menu_dict, answer):
     '''
     Checks if a menu option entered by a user is one of the options provided
@@ -660,8 +693,13 @@ def display_a_ticker_menu():
             while ticker == "":
                 ticker = ask_a_ticker()
             
+            # start loading the stock's data in the background, which also
+            # cancels the loading of the stock picked before
+            prefetcher.start(ticker)
+            
             # display the stock company's profile
             if ans == '1':
+                wait_prefetch(ticker, 'profile')
                 sf.display_profile(ticker)
             
             # gets the start and end date for price inquiry from the user
@@ -669,6 +707,7 @@ def display_a_ticker_menu():
             elif ans == '2':
                 price_start_date = ask_start_date()
                 price_end_date = ask_end_date(price_start_date)
+                wait_prefetch(ticker, 'price')
     
                 return display_a_ticker_price_menu(ticker, 
                                                    price_start_date, 
@@ -677,9 +716,12 @@ def display_a_ticker_menu():
             # then displays "news" sub menu for a single stock exploration
             elif ans == '3':
                 pagenum = ask_news_page()
+                wait_prefetch(ticker, 'news')
                 return display_a_ticker_news_menu(ticker, pagenum)
             
             # displays "twitter" sub menu for a single stock exploration
+            # (the tweets keep loading in the background until an option
+            # that needs them is picked)
             elif ans == '4':
                 return display_a_ticker_twitter_menu(ticker)
             
@@ -809,8 +851,8 @@ def display_a_ticker_news_menu(ticker, pagenum):
             sn.display_news_10(ticker, pagenum)
         
         # ask for the start date of stock price inquiry if the users selects 
-        # 2 or 3
-        elif ans.lower() == '2' or ans.lower() == '3':
+        # 2, 3 or 6
+        elif ans.lower() in ['2', '3', '6']:
             price_start_date = ask_start_date()
             print('\n')
             
@@ -830,6 +872,12 @@ def display_a_ticker_news_menu(ticker, pagenum):
             elif ans.lower() == '3':
                 sn.model_news_sa_price(ticker, price_start_date, pagenum)
                 print('\n')
+            
+            # display a plot of how the news sentiment model coefficients 
+            # change over a rolling window of days
+            elif ans.lower() == '6':
+                sn.plot_news_sa_coefs(ticker, price_start_date, pagenum)
+                print('\n')
         
         # display the stock's word cloud based on news
         elif ans.lower() == '4':
@@ -891,12 +939,14 @@ def display_a_ticker_twitter_menu(ticker):
         
         # displays the ticker's tweets sentiment movement over the past 8 days
         elif ans.lower() == '1':
+            wait_prefetch(ticker, 'tweets')
             st.plot_twitter_sa(ticker)
             print('\n')
         
         # displays the ticker's tweets sentiment movement vs price movement
         # over the past 5 business dys.
         elif ans.lower() == '2':
+            wait_prefetch(ticker, 'tweets')
             st.plot_twitter_sa_price(ticker)
             print('\n')
         
@@ -906,17 +956,20 @@ def display_a_ticker_twitter_menu(ticker):
         # price.
         # date range is the past 5 business dys.
         elif ans.lower() == '3':  
+            wait_prefetch(ticker, 'tweets')
             st.model_tweet_sa_price(ticker)
             print('\n')
             
         # display the stock's word cloud based on tweets
         elif ans.lower() == '4':
+            wait_prefetch(ticker, 'tweets')
             wc.create_tweet_worldcloud(ticker)
             
         # gets a list of tickers the user wants to compare with the current one
         # then displays a plot of the tweets sentiment comparison over the past
         # 8 days
         elif ans.lower() == '5':
+            wait_prefetch(ticker, 'tweets')
             ticker_list = ask_4max_tickers(ticker)
             st.plot_multi_tweet_sa(ticker_list)
             print('\n')
@@ -925,6 +978,11 @@ def display_a_ticker_twitter_menu(ticker):
 # run the following if the current module is the main module
 if __name__ == "__main__":
     print('************ Welcome to ' + myCompanyName + '! ************' )
+
+    # load the sentiment lexicons once, before any news or tweets are scored,
+    # in the background so the main menu does not wait for them (sa is only
+    # imported inside the thread, when warm_up is looked up)
+    threading.Thread(target = lambda: sa.warm_up(), daemon = True).start()
     display_main_menu()
         
         
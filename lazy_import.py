@@ -0,0 +1,78 @@
+
+#=========== pakages/modules that are used here ==============================
+import sys
+import types
+import importlib
+import threading
+
+#================ code =======================================================
+class LazyModule(types.ModuleType):
+    '''
+    A stand-in for a module that is only imported the first time one of its
+    attributes is used.
+
+    After that, the stand-in passes every attribute on to the real module,
+    so code can use it just like the module itself.
+    '''
+
+    def __init__(self, name):
+        '''
+        Parameters
+        ----------
+        name(string): the full module name, like 'matplotlib.pyplot'
+        '''
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+        self.__dict__['_lazy_lock'] = threading.Lock()
+
+    def _load(self):
+        '''
+        Imports the real module the first time it is needed.
+
+        Returns
+        -------
+        Returns the real module.
+        '''
+        module = self.__dict__['_lazy_module']
+        if module is None:
+            with self.__dict__['_lazy_lock']:
+                module = self.__dict__['_lazy_module']
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self.__dict__['_lazy_module'] is None:
+            return "<lazy module '" + self.__name__ + "' (not imported yet)>"
+        return repr(self.__dict__['_lazy_module'])
+
+
+def lazy_import(name):
+    '''
+    Gets a module that is only imported the first time it is used, to keep
+    the program's start up fast.
+
+    Parameters
+    ----------
+    name(string): the full module name, like 'matplotlib.pyplot'
+
+    Returns
+    -------
+    Returns the module itself if it has already been imported, otherwise a
+    LazyModule that stands in for it.
+    '''
+    if name in sys.modules:
+        return sys.modules[name]
+
+    return LazyModule(name)
+
@@ -0,0 +1,391 @@
+
+#=========== pakages/modules that are used here ==============================
+import os
+import importlib
+import threading
+from os import path
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+#import from the modules I have created
+from lazy_import import lazy_import
+
+# matplotlib is only imported when the first chart is made
+mpl = lazy_import('matplotlib')
+plt = lazy_import('matplotlib.pyplot')
+mfigure = lazy_import('matplotlib.figure')
+
+#================ code =======================================================
+# settings for saving charts instead of showing them:
+#   render_dir - folder the chart files are saved in
+#   render_format - 'png' or 'svg'
+#   render_dpi - dots per inch of png files
+#   render_workers - number of worker processes, None means one per CPU
+render_dir = 'Charts'
+render_format = 'png'
+render_dpi = 100
+render_workers = None
+
+# True to draw long price and volume series with only the lowest and the
+# highest point of every pixel column (see decimate)
+decimate_lines = True
+
+# settings that are not about how a chart looks (like the backend), which
+# matplotlib styles leave alone
+non_style_params = ['backend', 'backend_fallback', 'date.epoch',
+                    'docstring.hardcopy', 'figure.max_open_warning',
+                    'figure.raise_window', 'interactive', 'savefig.directory',
+                    'timezone', 'tk.window_focus', 'toolbar', 'webagg.address',
+                    'webagg.open_in_browser', 'webagg.port',
+                    'webagg.port_retries']
+
+# style name -> the matplotlib settings of the style, built once
+_styles = {}
+_styles_lock = threading.Lock()
+
+# charts of one stock: chart name -> (module, function, names of the
+# parameters the function takes after the ticker)
+charts = {}
+charts['price_volm'] = ('stock_price', 'plot_price_volm', ['start_date', 'end_date'])
+charts['sma'] = ('stock_price', 'plot_sma', ['start_date', 'end_date'])
+charts['news_sa_price'] = ('stock_news', 'plot_news_sa_price', ['from_date', 'pagenum'])
+charts['news_model'] = ('stock_news', 'model_news_sa_price', ['from_date', 'pagenum'])
+charts['news_coefs'] = ('stock_news', 'plot_news_sa_coefs', ['from_date', 'pagenum'])
+charts['news_wordcloud'] = ('word_cloud', 'create_news_worldcloud', ['pagenum'])
+charts['twitter_sa'] = ('stock_twitter', 'plot_twitter_sa', [])
+charts['twitter_sa_price'] = ('stock_twitter', 'plot_twitter_sa_price', [])
+charts['twitter_model'] = ('stock_twitter', 'model_tweet_sa_price', [])
+charts['twitter_wordcloud'] = ('word_cloud', 'create_tweet_worldcloud', [])
+
+# charts that compare several stocks, which take a ticker list instead of a
+# ticker
+multi_charts = {}
+multi_charts['multi_price'] = ('stock_price', 'plot_multi_price', ['start_date', 'end_date'])
+multi_charts['multi_news_sa'] = ('stock_news', 'plot_mutli_news_sa', ['pagenum'])
+multi_charts['multi_twitter_sa'] = ('stock_twitter', 'plot_multi_tweet_sa', [])
+
+
+def style_params(name = 'default'):
+    '''
+    Gets the matplotlib settings of a style, on top of matplotlib's default
+    settings. They are worked out the first time a style is asked for, and
+    the values are already checked by matplotlib, so they can be applied
+    without checking them again.
+
+    Parameters
+    ----------
+    name(string): 'default', or a matplotlib style name like 'ggplot'
+
+    Returns
+    -------
+    Returns a dictionary of rcParams names and values.
+    '''
+    with _styles_lock:
+        if name not in _styles:
+            params = {key: value for key, value in mpl.rcParamsDefault.items()
+                      if key not in non_style_params}
+            if name != 'default':
+                params.update(plt.style.library[name])
+            _styles[name] = params
+
+        return _styles[name]
+
+
+@contextmanager
+def chart_style(name = 'default'):
+    '''
+    Applies a style only while a chart is drawn, so no chart changes the 
+    settings of the charts after it.
+
+    Parameters
+    ----------
+    name(string): 'default', or a matplotlib style name like 'ggplot'
+
+    Returns
+    -------
+    Applies the style in a with statement, and puts the settings back when
+    it ends.
+    '''
+    params = style_params(name)
+    rc = mpl.rcParams
+    
+    # the style's settings were checked when it was cached, so set them
+    # straight into rcParams (the backend is left as it is)
+    old_params = dict.copy(rc)
+    del old_params['backend']
+    dict.update(rc, params)
+    try:
+        yield
+    finally:
+        dict.update(rc, old_params)
+
+
+def new_figure(out_file = None, figsize = (6, 3), **kwargs):
+    '''
+    Makes a new figure for a chart.
+
+    Parameters
+    ----------
+    out_file(string): the file the chart will be saved to, None means the
+    chart will be shown on screen
+
+    figsize(tuple): width and height in inches
+
+    kwargs: other Figure settings, like facecolor
+
+    Returns
+    -------
+    Returns a pyplot figure if the chart will be shown. Otherwise, a
+    matplotlib Figure that pyplot does not know about, so it needs no screen
+    and leaves no global state behind.
+    '''
+    if out_file is None:
+        return plt.figure(figsize = figsize, **kwargs)
+
+    return mfigure.Figure(figsize = figsize, **kwargs)
+
+
+def finish(fig, out_file = None):
+    '''
+    Shows a chart made with new_figure, or saves it.
+
+    Parameters
+    ----------
+    fig(Figure): the chart's figure
+
+    out_file(string): the .png or .svg file to save the chart to, None means
+    show it on screen
+
+    Returns
+    -------
+    Returns the file name, or None if the chart was shown.
+    '''
+    if out_file is None:
+        plt.show()
+        return None
+
+    out_dir = path.dirname(out_file)
+    if out_dir != '':
+        os.makedirs(out_dir, exist_ok = True)
+
+    fig.savefig(out_file, dpi = render_dpi, facecolor = fig.get_facecolor())
+
+    return out_file
+
+
+def pixel_width(fig):
+    '''
+    Gets the width of a figure in pixels, on screen or in a saved file,
+    whichever is wider.
+    '''
+    return int(fig.get_figwidth() * max(fig.dpi, render_dpi))
+
+
+def decimate(values, n_buckets):
+    '''
+    Picks the rows of one or more series that are worth drawing when there
+    are far more rows than pixels: the rows are split into n_buckets groups
+    of rows next to each other, and only the lowest and the highest value of
+    each series in each group are kept, so the peaks and troughs still show.
+    The first and the last rows are always kept.
+
+    Parameters
+    ----------
+    values(array): a 1-D array, or a 2-D array with one column per series.
+    Missing values (nan) are never picked.
+
+    n_buckets(int): number of groups, usually the pixel width of the chart
+
+    Returns
+    -------
+    Returns a sorted array of row positions. Every row is kept if there are
+    no more than 2 rows per group.
+    '''
+    values = np.asarray(values, dtype = float)
+    if values.ndim == 1:
+        values = values[:, None]
+
+    n_rows = len(values)
+    if n_rows <= 2 * n_buckets:
+        return np.arange(n_rows)
+
+    # group number of every row, and the 1st row of every group
+    group = np.arange(n_rows) * n_buckets // n_rows
+    starts = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+
+    keep = [np.array([0, n_rows - 1])]
+    for col in values.T:
+        for reduce in [np.fmin, np.fmax]:
+            # rows that hold their group's lowest (or highest) value, and the
+            # 1st of them in each group
+            rows = np.flatnonzero(col == reduce.reduceat(col, starts)[group])
+            first = np.diff(group[rows], prepend = -1) != 0
+            keep.append(rows[first])
+
+    return np.unique(np.concatenate(keep))
+
+
+@contextmanager
+def chart_figure(chart, out_file = None, style = 'default', figsize = (6, 3),
+                 **kwargs):
+    '''
+    Makes the figure of a chart in a style, and shows or saves the chart
+    when the with statement ends. The style only applies inside the with
+    statement.
+
+    Parameters
+    ----------
+    chart(string): the chart name, like 'sma'
+
+    out_file(string): the .png or .svg file to save the chart to, None means
+    show it on screen
+
+    style(string): 'default', or a matplotlib style name like 'ggplot'
+
+    figsize(tuple): width and height in inches
+
+    kwargs: other Figure settings, like facecolor
+
+    Returns
+    -------
+    Gives the figure to draw the chart on, in a with statement like
+    'with pr.chart_figure('sma', out_file, 'ggplot') as fig:'.
+    '''
+    with chart_style(style):
+        fig = new_figure(out_file, figsize, **kwargs)
+        yield fig
+        finish(fig, out_file)
+
+
+def chart_file(name, chart, out_dir = None, fmt = None):
+    '''
+    Gets the file name a chart is saved to, for example
+    'Charts/AMZN_price_volm.png'.
+
+    Parameters
+    ----------
+    name(string or list): a ticker, or a ticker list for a multi chart
+
+    chart(string): the chart name (see charts and multi_charts)
+
+    out_dir(string): the folder, None means render_dir
+
+    fmt(string): 'png' or 'svg', None means render_format
+    '''
+    if out_dir is None:
+        out_dir = render_dir
+    if fmt is None:
+        fmt = render_format
+    if not isinstance(name, str):
+        name = '_'.join(name)
+
+    return path.join(out_dir, name + '_' + chart + '.' + fmt)
+
+
+def render_chart(chart, ticker, params, out_dir = None, fmt = None):
+    '''
+    Draws one chart and saves it to a file, without showing it.
+
+    Parameters
+    ----------
+    chart(string): a chart name from charts, or from multi_charts (then
+    ticker is a ticker list)
+
+    ticker(string or list): a ticker symbol, or a ticker list
+
+    params(dict): the chart's other parameters by name, like 'start_date'
+
+    out_dir(string): the folder, None means render_dir
+
+    fmt(string): 'png' or 'svg', None means render_format
+
+    Returns
+    -------
+    Returns the file name, or None if there was no data to draw.
+    '''
+    module_name, func_name, param_names = charts.get(chart) or multi_charts[chart]
+    func = getattr(importlib.import_module(module_name), func_name)
+
+    out_file = chart_file(ticker, chart, out_dir, fmt)
+    if path.exists(out_file):
+        os.remove(out_file)
+
+    func(ticker, *[params[name] for name in param_names], out_file = out_file)
+
+    return out_file if path.exists(out_file) else None
+
+
+def render_ticker(ticker, chart_names, params, out_dir = None, fmt = None):
+    '''
+    Draws a list of charts of one stock and saves them to files.
+
+    Returns
+    -------
+    Returns a dictionary that maps each chart name to its file name, None if
+    there was no data to draw, or the error text if drawing failed.
+    '''
+    results = {}
+    for chart in chart_names:
+        try:
+            results[chart] = render_chart(chart, ticker, params, out_dir, fmt)
+        except Exception as e:
+            results[chart] = 'error: ' + repr(e)
+
+    return results
+
+
+def use_agg():
+    '''
+    Makes matplotlib draw without a screen, in a worker process.
+    '''
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def render_tickers(tickers, chart_names = None, out_dir = None, fmt = None,
+                   workers = None, **params):
+    '''
+    Draws the charts of many stocks and saves them to files, with the stocks
+    shared out over worker processes.
+
+    Parameters
+    ----------
+    tickers(list): ticker symbols
+
+    chart_names(list): names from charts, None means every chart whose
+    parameters are all given
+
+    out_dir(string): the folder, None means render_dir
+
+    fmt(string): 'png' or 'svg', None means render_format
+
+    workers(int): number of worker processes, None means render_workers.
+    With 1 worker, the charts are drawn in this process.
+
+    params: the charts' other parameters, like start_date = '2020-01-01',
+    end_date = '2020-12-31', from_date = '2020-11-01' and pagenum = 10
+
+    Returns
+    -------
+    Returns a dictionary that maps each ticker to the results of
+    render_ticker.
+    '''
+    if chart_names is None:
+        chart_names = [name for name, (module_name, func_name, param_names)
+                       in charts.items()
+                       if all(p in params for p in param_names)]
+    if workers is None:
+        workers = render_workers or os.cpu_count() or 1
+
+    tickers = list(dict.fromkeys(tickers))
+    if workers == 1 or len(tickers) == 1:
+        return {ticker: render_ticker(ticker, chart_names, params, out_dir, fmt)
+                for ticker in tickers}
+
+    with ProcessPoolExecutor(max_workers = min(workers, len(tickers)),
+                             initializer = use_agg) as executor:
+        futures = {ticker: executor.submit(render_ticker, ticker, chart_names,
+                                           params, out_dir, fmt)
+                   for ticker in tickers}
+        return {ticker: future.result() for ticker, future in futures.items()}
@@ -0,0 +1,322 @@
+
+#=========== pakages/modules that are used here ==============================
+import queue
+import threading
+from concurrent.futures import CancelledError
+from datetime import datetime, timedelta
+
+#import from the modules I have created
+from lazy_import import lazy_import
+
+# the stock modules are imported by the first task that needs them, on a
+# background thread
+sf = lazy_import('stock_profile')
+sp = lazy_import('stock_price')
+sn = lazy_import('stock_news')
+st = lazy_import('stock_twitter')
+
+#================ code =======================================================
+# settings for loading a stock's data in the background:
+#   prefetch_workers - number of background threads
+#   prefetch_price_days - number of past days of prices loaded
+#   prefetch_news_pages - number of news pages loaded into the news store
+prefetch_workers = 4
+prefetch_price_days = 365
+prefetch_news_pages = 10
+
+# task states
+waiting = 'waiting'
+running = 'running'
+done = 'done'
+failed = 'failed'
+cancelled = 'cancelled'
+
+
+def default_tasks(ticker, stop = None):
+    '''
+    Gets the loading tasks run in the background when a stock is picked.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    stop(Event): optional threading.Event that stops the long tasks (news
+    and tweets) part way when it is set
+
+    Returns
+    -------
+    Returns a dictionary that maps each task name ('price', 'profile', 'news'
+    and 'tweets') to a function without parameters that runs the task.
+    '''
+    today = datetime.today()
+    start_date = (today - timedelta(days = prefetch_price_days)).strftime('%Y-%m-%d')
+    end_date = today.strftime('%Y-%m-%d')
+
+    tasks = {}
+    tasks['price'] = lambda: sp.load_stock_price(ticker, start_date, end_date)
+    tasks['profile'] = lambda: sf.get_co_stat(ticker)
+
+    tasks['news'] = lambda: prefetch_news(ticker, stop)
+
+    tasks['tweets'] = lambda: st.load_tweet_sa(ticker, stop)
+
+    return tasks
+
+
+def prefetch_news(ticker, stop = None):
+    '''
+    Loads a stock's newest news pages into its rolling news store, which any
+    number of pages asked for later is taken from. Nothing is loaded if the
+    news store is not used.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    stop(Event): optional threading.Event that stops the loading part way
+    '''
+    if sn.incremental_news == True:
+        sn.update_news_store(ticker, prefetch_news_pages, stop = stop)
+
+
+class Prefetcher:
+    '''
+    Loads a stock's data on background threads as soon as the stock is
+    picked, so the menu options that need the data later return at once.
+
+    Only one stock is loaded at a time: starting another stock cancels the
+    tasks of the old one that have not started yet, and asks the running
+    ones to stop. The long tasks (news pages and tweet day windows) stop
+    between pages or windows, keeping what they have finished for next time,
+    so the new stock does not wait behind them.
+
+    The background threads are daemon threads, so exiting the program does
+    not wait for them.
+    '''
+
+    def __init__(self, workers = None, on_update = None):
+        '''
+        Parameters
+        ----------
+        workers(int): number of background threads, None means
+        prefetch_workers
+
+        on_update(function): optional function called as
+        on_update(ticker, task name, state) every time a task changes state.
+        It is called from the background threads.
+        '''
+        self.workers = prefetch_workers if workers is None else workers
+        self.on_update = on_update
+        self.ticker = None
+
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stop = threading.Event()
+        self._states = {}
+        self._errors = {}
+        self._finished = {}
+
+        # (ticker, task name) -> Event set when the running task ends, kept
+        # even after its stock is cancelled
+        self._running = {}
+
+    def start(self, ticker, tasks = None):
+        '''
+        Starts loading a stock's data in the background. Nothing happens if
+        the stock is already being loaded.
+
+        Parameters
+        ----------
+        ticker(string): a ticker symbol
+
+        tasks(dict): task name -> function without parameters, None means
+        default_tasks(ticker) with a stop Event that cancel sets
+        '''
+        with self._lock:
+            if ticker == self.ticker:
+                return
+
+        self.cancel()
+        stop = threading.Event()
+        if tasks is None:
+            tasks = default_tasks(ticker, stop)
+
+        with self._lock:
+            self.ticker = ticker
+            generation = self._generation
+            self._stop = stop
+            self._states = {}
+            self._errors = {}
+            self._finished = {}
+
+            # start the background threads the first time they are needed
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target = self._work, daemon = True)
+                thread.start()
+                self._threads.append(thread)
+
+            for name, func in tasks.items():
+                self._states[name] = waiting
+                self._finished[name] = threading.Event()
+                self._queue.put((generation, ticker, name, func))
+
+    def cancel(self):
+        '''
+        Cancels the tasks of the current stock that have not started yet, and
+        asks the running ones to stop.
+        '''
+        with self._lock:
+            self._generation += 1
+            self._stop.set()
+            ticker = self.ticker
+            self.ticker = None
+
+            names = [name for name, state in self._states.items()
+                     if state == waiting]
+            for name in names:
+                self._states[name] = cancelled
+                self._finished[name].set()
+
+        for name in names:
+            self._notify(ticker, name, cancelled)
+
+    def status(self):
+        '''
+        Gets the state of every task of the current stock.
+
+        Returns
+        -------
+        Returns a dictionary that maps each task name to 'waiting',
+        'running', 'done', 'failed' or 'cancelled'.
+        '''
+        with self._lock:
+            return dict(self._states)
+
+    def progress_text(self):
+        '''
+        Gets a one line progress report, for example
+        'AMZN: 2 of 4 loaded (still loading: news, tweets)'.
+        '''
+        with self._lock:
+            if self.ticker is None:
+                return 'nothing is being loaded'
+
+            ticker = self.ticker
+            n_tasks = len(self._states)
+            n_done = list(self._states.values()).count(done)
+            unfinished = [name for name, state in self._states.items()
+                          if state in [waiting, running]]
+
+        text = ticker + ': ' + str(n_done) + ' of ' + str(n_tasks) + ' loaded'
+        if len(unfinished) > 0:
+            text += ' (still loading: ' + ', '.join(unfinished) + ')'
+
+        return text
+
+    def error(self, name):
+        '''
+        Gets the error a failed task raised, or None.
+        '''
+        with self._lock:
+            return self._errors.get(name)
+
+    def wait(self, ticker, name, timeout = None):
+        '''
+        Waits for a task of a stock to finish, so the same data is not loaded
+        twice at the same time. It returns at once if the task is neither
+        queued nor running.
+
+        Parameters
+        ----------
+        ticker(string): a ticker symbol
+
+        name(string): the task name
+
+        timeout(float): max seconds to wait for each of the queued and the
+        running task, None means no limit
+
+        Returns
+        -------
+        Returns the task's state, or None if the task is not known.
+        '''
+        with self._lock:
+            if ticker == self.ticker and name in self._finished:
+                finished = self._finished[name]
+            else:
+                finished = None
+
+        if finished is not None:
+            finished.wait(timeout)
+
+        # a task started for this stock before it was cancelled may still run
+        with self._lock:
+            running_event = self._running.get((ticker, name))
+
+        if running_event is not None:
+            running_event.wait(timeout)
+
+        with self._lock:
+            if ticker == self.ticker:
+                return self._states.get(name)
+            return None
+
+    def _notify(self, ticker, name, state):
+        if self.on_update is not None:
+            self.on_update(ticker, name, state)
+
+    def _set_state(self, generation, ticker, name, state, error = None):
+        '''
+        Saves a task's new state, unless the task's stock has been cancelled
+        since it was queued. Returns False in that case.
+        '''
+        with self._lock:
+            if generation != self._generation:
+                return False
+
+            self._states[name] = state
+            if error is not None:
+                self._errors[name] = error
+            if state in [done, failed, cancelled]:
+                self._finished[name].set()
+
+        self._notify(ticker, name, state)
+        return True
+
+    def _work(self):
+        '''
+        Runs queued tasks one after another, skipping the cancelled ones.
+        '''
+        while True:
+            generation, ticker, name, func = self._queue.get()
+
+            # if the same task is still running from before a cancel, wait
+            # for it instead of running it twice at the same time
+            with self._lock:
+                earlier = self._running.get((ticker, name))
+            if earlier is not None:
+                earlier.wait()
+
+            # mark the task running, unless its stock has been cancelled
+            with self._lock:
+                if generation != self._generation:
+                    continue
+                self._states[name] = running
+                ended = threading.Event()
+                self._running[(ticker, name)] = ended
+
+            self._notify(ticker, name, running)
+
+            try:
+                func()
+            except CancelledError:
+                self._set_state(generation, ticker, name, cancelled)
+            except Exception as e:
+                self._set_state(generation, ticker, name, failed, e)
+            else:
+                self._set_state(generation, ticker, name, done)
+            finally:
+                with self._lock:
+                    del self._running[(ticker, name)]
+                ended.set()
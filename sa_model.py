@@ -0,0 +1,499 @@
+
+#=========== pakages/modules that are used here ==============================
+import hashlib
+import threading
+from collections import OrderedDict, deque
+import numpy as np
+import pandas as pd
+
+#import from the modules I have created
+from lazy_import import lazy_import
+
+# statsmodels is only imported when the first full model is fitted
+sm = lazy_import('statsmodels.api')
+
+#================ code =======================================================
+# outcome variable of the sentiment models
+y_column = 'Adj Close'
+
+# max number of fitted models kept in the session, the least recently used
+# model is removed first
+max_models = 256
+
+# the rolling coefficients are fitted again directly every this many rows,
+# so rounding errors of the recursive updates do not add up on long series
+rls_refit_rows = 500
+
+# rolling windows shorter than this many rows (like the news chart's windows)
+# are each fitted directly with numpy, which takes about as long as the
+# recursive updates for windows this short and never drifts. Only longer
+# rolling windows and expanding windows use the recursive updates.
+rls_min_window = 500
+
+# the recursive updates are not trusted, and the window is fitted again
+# directly, if removing a row leaves 1 - x'Px below rls_min_denom (the row's
+# leverage is close to 1). Rows whose X'X has a condition number above
+# rls_max_cond are not fitted, and their coefficients are nan.
+rls_min_denom = 1e-4
+rls_max_cond = 1e10
+
+# (fingerprint, 'full' or 'fast') -> fitted model, least recently used first
+_models = OrderedDict()
+_models_lock = threading.Lock()
+
+
+def model_values(df, x_columns, y_col = None):
+    '''
+    Gets the model data as one numpy array.
+
+    Parameters
+    ----------
+    df(DataFrame): the model data
+
+    x_columns(list): names of the x variable columns
+
+    y_col(string): name of the outcome variable column, None means y_column
+
+    Returns
+    -------
+    Returns a tuple (column names, 2-D float array with the x variables then
+    the outcome variable as columns).
+    '''
+    if y_col is None:
+        y_col = y_column
+
+    columns = list(x_columns) + [y_col]
+    values = np.column_stack([df[col].to_numpy(dtype = float) for col in columns])
+
+    return columns, values
+
+
+def fingerprint(index, columns, values):
+    '''
+    Gets a short text that is the same only for the same model input, so a
+    model is fitted once for the same data, however many times it is asked
+    for.
+
+    Parameters
+    ----------
+    index(Index): the dates of the model data
+
+    columns(list): the column names
+
+    values(2-D array): the model data, as returned by model_values
+
+    Returns
+    -------
+    Returns a hex string made from the column names, the dates and the values.
+    '''
+    digest = hashlib.sha1(repr(columns).encode())
+    digest.update('|'.join(map(str, index)).encode())
+    digest.update(np.ascontiguousarray(values).tobytes())
+
+    return digest.hexdigest()
+
+
+def design(df, x_columns, y_col = None):
+    '''
+    Picks the x variables, with a constant added, and the outcome variable from
+    the model data. Rows with a missing value are left out.
+
+    Parameters
+    ----------
+    df(DataFrame): the model data
+
+    x_columns(list): names of the x variable columns
+
+    y_col(string): name of the outcome variable column, None means y_column
+
+    Returns
+    -------
+    Returns a tuple (X DataFrame whose 1st column is 'const', Y Series).
+    '''
+    if y_col is None:
+        y_col = y_column
+
+    data = df[list(x_columns) + [y_col]].dropna()
+
+    X = data[list(x_columns)].astype(float)
+    X.insert(0, 'const', 1.0)
+    Y = data[y_col].astype(float)
+
+    return X, Y
+
+
+def cached_model(key):
+    '''
+    Gets a fitted model from the session, or None.
+    '''
+    with _models_lock:
+        if key not in _models:
+            return None
+        _models.move_to_end(key)
+        return _models[key]
+
+
+def save_model(key, model):
+    '''
+    Keeps a fitted model for the session, removing the least recently used
+    models past max_models.
+    '''
+    with _models_lock:
+        _models[key] = model
+        _models.move_to_end(key)
+        while len(_models) > max_models:
+            _models.popitem(last = False)
+
+
+def fit_ols(df, x_columns, y_col = None):
+    '''
+    Fits a statsmodels OLS model, with a constant, of the outcome variable on
+    the x variables. The model is fitted only once for the same data.
+
+    Parameters
+    ----------
+    df(DataFrame): the model data
+
+    x_columns(list): names of the x variable columns
+
+    y_col(string): name of the outcome variable column, None means y_column
+
+    Returns
+    -------
+    Returns the fitted statsmodels results, which has the summary and the
+    model prices (fittedvalues).
+    '''
+    columns, values = model_values(df, x_columns, y_col)
+    key = (fingerprint(df.index, columns, values), 'full')
+    model = cached_model(key)
+
+    if model is None:
+        X, Y = design(df, x_columns, y_col)
+        model = sm.OLS(Y, X).fit()
+        save_model(key, model)
+
+    return model
+
+
+def lstsq_fit(X, Y):
+    '''
+    Fits least squares coefficients and R squared with numpy only.
+
+    Parameters
+    ----------
+    X(2-D array): the x variables, whose 1st column is the constant
+
+    Y(1-D array): the outcome variable
+
+    Returns
+    -------
+    Returns a tuple (coefficient array, R squared). Both are nan if there are
+    not more rows than coefficients.
+    '''
+    n_rows, n_coefs = X.shape
+    if n_rows <= n_coefs:
+        return np.full(n_coefs, np.nan), np.nan
+
+    coefs = np.linalg.lstsq(X, Y, rcond = None)[0]
+
+    resid = Y - X @ coefs
+    total = Y - Y.mean()
+    ss_total = total @ total
+    rsquared = 1 - (resid @ resid) / ss_total if ss_total > 0 else np.nan
+
+    return coefs, rsquared
+
+
+def coef_row(df, x_columns, y_col = None):
+    '''
+    Fits the same model as fit_ols with numpy least squares. The result is
+    kept for the session like the statsmodels models.
+
+    Returns
+    -------
+    Returns a 1-D array with the coefficients ('const' first, then the x
+    variables), R squared and the number of rows used.
+    '''
+    columns, values = model_values(df, x_columns, y_col)
+    key = (fingerprint(df.index, columns, values), 'fast')
+    row = cached_model(key)
+
+    if row is None:
+        # leave out rows with a missing value, and add the constant
+        values = values[~np.isnan(values).any(axis = 1)]
+        X = np.column_stack([np.ones(len(values)), values[:, :-1]])
+        coefs, rsquared = lstsq_fit(X, values[:, -1])
+
+        row = np.append(coefs, [rsquared, len(values)])
+        save_model(key, row)
+
+    return row.copy()
+
+
+def fit_coefs(df, x_columns, y_col = None):
+    '''
+    Fits the same model as fit_ols with numpy least squares, for when only
+    the coefficients and R squared are needed. This skips statsmodels and its
+    summary, and is much faster when many stocks are fitted.
+
+    Parameters
+    ----------
+    df(DataFrame): the model data
+
+    x_columns(list): names of the x variable columns
+
+    y_col(string): name of the outcome variable column, None means y_column
+
+    Returns
+    -------
+    Returns a Series with the coefficients ('const' and the x variables),
+    'R2' (R squared) and 'N' (number of rows used).
+    '''
+    return pd.Series(coef_row(df, x_columns, y_col),
+                     index = ['const'] + list(x_columns) + ['R2', 'N'])
+
+
+def batch_fit(frames, x_columns, y_col = None, full = False):
+    '''
+    Fits the same model for many stocks.
+
+    Parameters
+    ----------
+    frames(dict): ticker -> model data (DataFrame). Tickers whose data is not
+    a DataFrame (like -1 when there was no data) are left out.
+
+    x_columns(list): names of the x variable columns
+
+    y_col(string): name of the outcome variable column, None means y_column
+
+    full(bool): True to fit statsmodels models (which also gives p values),
+    False to use the numpy fast path
+
+    Returns
+    -------
+    Returns a DataFrame with one row per ticker and the columns 'const', the x
+    variables, 'R2' and 'N'. With full = True, there is also a p value column
+    for every coefficient, named like 'P>|t| Compound'.
+    '''
+    frames = {ticker: df for ticker, df in frames.items()
+              if type(df) == pd.DataFrame}
+
+    if full == False:
+        rows = [coef_row(df, x_columns, y_col) for df in frames.values()]
+        table = pd.DataFrame(np.array(rows).reshape(len(rows), len(x_columns) + 3),
+                             index = pd.Index(list(frames), name = 'Ticker'),
+                             columns = ['const'] + list(x_columns) + ['R2', 'N'])
+        return table
+
+    rows = {}
+    for ticker, df in frames.items():
+        # too few rows for statsmodels, so the fast path gives nan values
+        n_rows = len(df[list(x_columns) + [y_col or y_column]].dropna())
+        if n_rows <= len(x_columns) + 1:
+            rows[ticker] = fit_coefs(df, x_columns, y_col)
+            continue
+
+        model = fit_ols(df, x_columns, y_col)
+        row = model.params.copy()
+        row['R2'] = model.rsquared
+        row['N'] = model.nobs
+        for name, pvalue in model.pvalues.items():
+            row['P>|t| ' + name] = pvalue
+        rows[ticker] = row
+
+    table = pd.DataFrame.from_dict(rows, orient = 'index')
+    table.index.name = 'Ticker'
+
+    return table
+
+
+
+class RecursiveLS:
+    '''
+    Least squares coefficients that are updated one row at a time (recursive
+    least squares), instead of fitted again from scratch. A row can also be
+    removed, so the coefficients of a rolling window move along in O(k^2)
+    steps, where k is the number of coefficients.
+
+    The first rows are fitted directly with numpy; after that each row added
+    or removed is a rank-one (Sherman-Morrison) update of the inverse of X'X.
+    '''
+
+    def __init__(self, n_coefs):
+        '''
+        Parameters
+        ----------
+        n_coefs(int): number of coefficients, including the constant
+        '''
+        self.n_coefs = n_coefs
+        self.coefs = None
+        self.P = None       # inverse of X'X
+        self.rows = []      # rows kept until there are enough to fit
+
+    def ready(self):
+        '''
+        True, if there have been enough rows to fit the coefficients.
+        '''
+        return self.coefs is not None
+
+    def start(self, X, Y):
+        '''
+        Fits the coefficients directly from the given rows. Returns False,
+        and keeps the rows to wait for more, if X'X cannot be inverted (or
+        is too close to it, see rls_max_cond).
+        '''
+        XtX = X.T @ X
+        if len(X) < self.n_coefs or np.linalg.cond(XtX) > rls_max_cond:
+            self.coefs = None
+            self.P = None
+            self.rows = list(zip(X, Y))
+            return False
+
+        self.P = np.linalg.inv(XtX)
+        self.coefs = self.P @ (X.T @ Y)
+        self.rows = []
+        return True
+
+    def add(self, x, y):
+        '''
+        Adds a row (x with the constant 1 first, y) to the fit.
+        '''
+        if self.ready() == False:
+            self.rows.append((x, y))
+            if len(self.rows) >= self.n_coefs:
+                X = np.array([row[0] for row in self.rows])
+                Y = np.array([row[1] for row in self.rows])
+                self.start(X, Y)
+            return
+
+        Px = self.P @ x
+        gain = Px / (1 + x @ Px)
+        self.coefs = self.coefs + gain * (y - x @ self.coefs)
+        self.P = self.P - np.outer(gain, Px)
+
+    def remove(self, x, y):
+        '''
+        Removes a row that was added before from the fit. Returns False, and
+        leaves the fit as it was, if the update is not safe (see 
+        rls_min_denom); the rows left then need to be fitted with start.
+        '''
+        if self.ready() == False:
+            self.rows.remove(next(row for row in self.rows
+                                  if row[1] == y and np.array_equal(row[0], x)))
+            return True
+
+        Px = self.P @ x
+        denom = 1 - x @ Px
+        if denom <= rls_min_denom:
+            return False
+
+        gain = Px / denom
+        self.coefs = self.coefs - gain * (y - x @ self.coefs)
+        self.P = self.P + np.outer(gain, Px)
+        return True
+
+
+def rolling_coefs(df, x_columns, window = None, y_col = None, min_rows = None):
+    '''
+    Gets how the model coefficients change over time, by fitting the model on
+    a rolling window (or on all the rows so far) ending at every date. Each
+    rolling window shorter than rls_min_window rows is fitted directly with
+    numpy. Longer rolling windows and expanding windows are updated with
+    recursive least squares (RecursiveLS) as the window moves, instead of
+    being fitted again for every date.
+
+    Parameters
+    ----------
+    df(DataFrame): the model data, sorted by date
+
+    x_columns(list): names of the x variable columns
+
+    window(int): number of rows in each window, None means an expanding
+    window that starts at the first row
+
+    y_col(string): name of the outcome variable column, None means y_column
+
+    min_rows(int): rows needed before the first coefficients are given,
+    None means the window (or, for an expanding window, one more row than the
+    number of coefficients)
+
+    Returns
+    -------
+    Returns a DataFrame with the same dates as df and the columns 'const' and
+    the x variables. The coefficients are nan until there are enough rows.
+    '''
+    columns, values = model_values(df, x_columns, y_col)
+    n_coefs = len(x_columns) + 1
+
+    if min_rows is None:
+        min_rows = n_coefs + 1 if window is None else window
+    if window is not None and window < n_coefs:
+        raise ValueError('window must have at least ' + str(n_coefs) + ' rows')
+
+    X = np.column_stack([np.ones(len(values)), values[:, :-1]])
+    Y = values[:, -1]
+    usable = ~np.isnan(values).any(axis = 1)
+
+    coefs = np.full((len(values), n_coefs), np.nan)
+    
+    if window is not None and window < rls_min_window:
+        # number of usable rows in the window ending at every row
+        counts = np.cumsum(usable)
+        counts[window:] = counts[window:] - counts[:-window]
+        
+        for i in range(len(values)):
+            if counts[i] < min_rows:
+                continue
+            start = max(0, i - window + 1)
+            rows = slice(start, i + 1)
+            if counts[i] < i + 1 - start:
+                rows = start + np.flatnonzero(usable[rows])
+            
+            # the coefficients of lstsq_fit, without R squared; a window whose
+            # x variables do not vary enough is left nan, like in RecursiveLS
+            fit, resid, rank, sv = np.linalg.lstsq(X[rows], Y[rows], rcond = None)
+            if rank == n_coefs:
+                coefs[i] = fit
+        
+        return pd.DataFrame(coefs, index = df.index,
+                            columns = ['const'] + columns[:-1])
+
+    rls = RecursiveLS(n_coefs)
+
+    # rows inside the current window; rows with a missing value are skipped,
+    # but still move a rolling window along
+    in_window = deque()
+    for i in range(len(values)):
+        if usable[i]:
+            rls.add(X[i], Y[i])
+            in_window.append(i)
+
+        # a row that cannot be removed safely is dropped from the window,
+        # and the rows left are fitted again
+        refit = False
+        if window is not None:
+            while len(in_window) > 0 and in_window[0] <= i - window:
+                j = in_window.popleft()
+                if refit == False and rls.remove(X[j], Y[j]) == False:
+                    refit = True
+
+        if rls.ready() and i % rls_refit_rows == rls_refit_rows - 1:
+            refit = True
+
+        if refit == True:
+            rows = list(in_window)
+            rls.start(X[rows], Y[rows])
+
+        if rls.ready() and len(in_window) >= min_rows:
+            coefs[i] = rls.coefs
+
+    return pd.DataFrame(coefs, index = df.index,
+                        columns = ['const'] + columns[:-1])
+
+
+def clear_models():
+    '''
+    Removes every fitted model kept in the session.
+    '''
+    with _models_lock:
+        _models.clear()
@@ -1,10 +1,103 @@
 
 #=========== pakages/modules that are used here ==============================
-from textblob import TextBlob
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+import threading
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+#import from the modules I have created
+import sentiment_cache as sc
+from lazy_import import lazy_import
+
+# TextBlob and NLTK are only imported when the first text is scored
+textblob = lazy_import('textblob')
+vader = lazy_import('nltk.sentiment.vader')
 
 
 #================ code =======================================================
+# process-wide registry of sentiment analyzers, built lazily on first use and
+# then shared by every caller, so the VADER lexicon is only loaded once
+analyzer_factory = {'vader': lambda: vader.SentimentIntensityAnalyzer()}
+_analyzers = {}
+_analyzers_lock = threading.Lock()
+
+# all the sentiment scores score_frame can calculate, in column order
+score_columns = ['Subjectivity', 'Polarity', 'Compound', 'Negative',
+                 'Neutral', 'Positive']
+
+# scores that come from TextBlob, and VADER's dictionary keys for the rest
+textblob_columns = ['Subjectivity', 'Polarity']
+vader_keys = {'Compound': 'compound', 'Negative': 'neg', 'Neutral': 'neu',
+              'Positive': 'pos'}
+
+# the scores of each scorer, which are cached separately so a text is only
+# scored by the scorers whose scores are asked for
+scorer_columns = {'textblob': textblob_columns, 'vader': list(vader_keys)}
+
+# settings of the optional process pool behind score_frame:
+#   pool_workers - number of worker processes, 1 means score in this process
+#   pool_chunk_size - number of texts sent to a worker at a time
+#   pool_min_texts - inputs smaller than this are always scored in-process
+pool_workers = 1
+pool_chunk_size = 500
+pool_min_texts = 2000
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+# version of the scoring code, part of every sentiment cache key. Change it
+# whenever score_texts would give different scores for the same text.
+scorer_version = 'textblob+vader-1'
+
+# set use_cache to False to always score texts from scratch
+use_cache = True
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analyzer(name = 'vader'):
+    '''
+    Gets the shared sentiment analyzer with the given name, building it the
+    first time it is asked for.
+
+    The function is thread-safe: if several threads ask for the same analyzer
+    at the same time, only one of them builds it.
+
+    Parameters
+    ----------
+    name(string): a key of analyzer_factory, 'vader' by default
+
+    Returns
+    -------
+    Returns the shared analyzer object.
+    '''
+    analyzer = _analyzers.get(name)
+
+    # build the analyzer under the lock, checking again in case another
+    # thread has built it while this one was waiting
+    if analyzer is None:
+        with _analyzers_lock:
+            analyzer = _analyzers.get(name)
+            if analyzer is None:
+                analyzer = analyzer_factory[name]()
+                _analyzers[name] = analyzer
+
+    return analyzer
+
+
+def warm_up():
+    '''
+    Builds all the registered sentiment analyzers up front.
+
+    The function is called once when the program starts, so the first news
+    or tweet scoring does not have to wait for the lexicons to load.
+    '''
+    for name in analyzer_factory:
+        get_analyzer(name)
+
+
 def getSubjectivity(text):
     '''
     Gets the subjectivity score from a text input
@@ -18,7 +111,7 @@ def getSubjectivity(text):
     returns a number ranging from 0 to 1, where 
     0 = objective, 1 = subjective
     '''
-    return TextBlob(text).sentiment.subjectivity
+    return textblob.TextBlob(text).sentiment.subjectivity
 
 
 def getPolarity(text):
@@ -34,7 +127,7 @@ def getPolarity(text):
     returns a number ranging from 0 to 1, where 
     1 = positive, -1 = negative, 0 = neutral
     '''
-    return TextBlob(text).sentiment.polarity
+    return textblob.TextBlob(text).sentiment.polarity
 
 
 def getSIA(text):
@@ -53,7 +146,255 @@ def getSIA(text):
     
     compound score is a normalized value.
     '''
-    
-    sia = SentimentIntensityAnalyzer()
+
+    # reuse the shared analyzer instead of reloading the lexicon per text
+    sia = get_analyzer('vader')
     sentiment = sia.polarity_scores(text)
-    return sentiment
\ No newline at end of file
+    return sentiment
+
+
+def score_texts(texts, metrics, out = None):
+    '''
+    Calculates sentiment scores for a list of texts in this process.
+
+    Each text is parsed by TextBlob at most once (for both subjectivity and
+    polarity) and scored by the shared VADER analyzer at most once, and the
+    scores are written straight into a preallocated array.
+
+    Parameters
+    ----------
+    texts(list): text strings to score
+
+    metrics(list): score names to calculate, taken from score_columns
+
+    out(numpy array): optional array of shape (len(texts), len(metrics)) to
+    write the scores into
+
+    Returns
+    -------
+    Returns a 2-D numpy array with one row per text and one column per metric.
+    '''
+    # index of the output column for each score, skipping the ones not asked
+    blob_cols = [(metrics.index(m), m) for m in textblob_columns if m in metrics]
+    vader_cols = [(metrics.index(m), vader_keys[m]) for m in vader_keys
+                  if m in metrics]
+
+    if out is None:
+        out = np.empty((len(texts), len(metrics)), dtype = float)
+    sia = get_analyzer('vader') if vader_cols else None
+
+    for row, text in enumerate(texts):
+        # one TextBlob parse for both subjectivity and polarity
+        if blob_cols:
+            blob_sentiment = textblob.TextBlob(text).sentiment
+            for col, m in blob_cols:
+                out[row, col] = getattr(blob_sentiment, m.lower())
+
+        # one VADER call for compound, negative, neutral, positive
+        if vader_cols:
+            SIA = sia.polarity_scores(text)
+            for col, key in vader_cols:
+                out[row, col] = SIA[key]
+
+    return out
+
+
+def _score_chunk(chunk_metrics):
+    '''
+    Scores one chunk of texts inside a pool worker.
+
+    Parameters
+    ----------
+    chunk_metrics(tuple): a (texts, metrics) pair, packed together so the
+    function can be used with the pool's map
+
+    Returns
+    -------
+    Returns the chunk's 2-D numpy array of scores.
+    '''
+    texts, metrics = chunk_metrics
+    return score_texts(texts, metrics)
+
+
+def get_pool(workers):
+    '''
+    Gets the shared process pool used for sentiment scoring, starting it the
+    first time it is needed (or again if the number of workers changes).
+
+    Every worker builds its analyzers once when it starts (see warm_up), and
+    the pool is kept alive between calls so later batches reuse the warm
+    workers.
+
+    Parameters
+    ----------
+    workers(int): number of worker processes
+
+    Returns
+    -------
+    Returns a concurrent.futures.ProcessPoolExecutor.
+    '''
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown()
+            _pool = ProcessPoolExecutor(max_workers = workers,
+                                        initializer = warm_up)
+            _pool_workers = workers
+
+        return _pool
+
+
+def shutdown_pool():
+    '''
+    Stops the shared scoring process pool, if it has been started.
+    '''
+    global _pool, _pool_workers
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+
+def get_cache():
+    '''
+    Gets the shared sentiment score cache, opening the cache file the first
+    time it is needed.
+
+    Returns
+    -------
+    Returns the sentiment_cache.ScoreCache, or None if use_cache is False.
+    '''
+    global _cache
+
+    if not use_cache:
+        return None
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = sc.ScoreCache(sc.cache_file, scorer_version,
+                                   len(score_columns))
+            atexit.register(_cache.close)
+        return _cache
+
+
+def _score_list(text_list, metrics, workers, chunk_size, out):
+    '''
+    Scores a list of texts into out, in this process or in the process pool.
+
+    Parameters
+    ----------
+    text_list(list): text strings to score
+
+    metrics(list): score names to calculate, taken from score_columns
+
+    workers(int): number of worker processes
+
+    chunk_size(int): number of texts sent to a worker at a time
+
+    out(numpy array): array of shape (len(text_list), len(metrics)) to write
+    the scores into
+    '''
+    # score in this process if the input is too small to be worth the pool
+    if workers <= 1 or len(text_list) < pool_min_texts:
+        score_texts(text_list, metrics, out)
+
+    else:
+        # map returns the chunks in the order they were sent
+        starts = range(0, len(text_list), chunk_size)
+        chunks = [(text_list[i:i + chunk_size], metrics) for i in starts]
+
+        for i, chunk_scores in zip(starts, get_pool(workers).map(_score_chunk, chunks)):
+            out[i:i + len(chunk_scores)] = chunk_scores
+
+
+def score_frame(texts, metrics = None, workers = None, chunk_size = None,
+                cache = None):
+    '''
+    Calculates sentiment scores for a whole column of texts in one pass.
+
+    Texts that are already in the sentiment score cache are not scored again.
+    The rest (each distinct text once) are scored by each scorer (TextBlob or
+    VADER, see scorer_columns) that any asked metric comes from, and all the
+    scorer's scores are saved to the cache under the text and scorer name.
+
+    Small inputs (fewer than pool_min_texts texts) or workers = 1 are scored
+    in this process. Larger inputs are split into chunks that are scored by
+    a pool of worker processes, and the results are put back in input order.
+
+    Parameters
+    ----------
+    texts(list or Series): text strings to score
+
+    metrics(list): score names to calculate, taken from score_columns.
+    None means all 6 scores.
+
+    workers(int): number of worker processes, None means pool_workers
+
+    chunk_size(int): number of texts sent to a worker at a time, None means
+    pool_chunk_size
+
+    cache(ScoreCache): the score cache to use, None means the shared one
+    from get_cache
+
+    Returns
+    -------
+    Returns a DataFrame with one row per text (same index as texts if it is a
+    Series) and one column per metric, in the order they were asked for.
+    '''
+    if metrics is None:
+        metrics = score_columns
+    if workers is None:
+        workers = pool_workers
+    if chunk_size is None:
+        chunk_size = pool_chunk_size
+    if cache is None:
+        cache = get_cache()
+
+    metrics = list(metrics)
+    texts = pd.Series(texts)
+    text_list = texts.astype(str).tolist()
+    scores = np.empty((len(text_list), len(metrics)), dtype = float)
+
+    # without a cache, score the texts as they are
+    if cache is None:
+        _score_list(text_list, metrics, workers, chunk_size, scores)
+        return pd.DataFrame(scores, index = texts.index, columns = metrics)
+
+    for scorer, columns in scorer_columns.items():
+        asked = [m for m in metrics if m in columns]
+        if len(asked) == 0:
+            continue
+
+        # look up every distinct text in the cache
+        keys = [cache.key(text, scorer) for text in text_list]
+        found = cache.get_many(keys)
+
+        # score each distinct text that is not in the cache, then save all
+        # the scorer's scores (in the first columns of a cache row) so later
+        # calls asking for its other metrics hit the cache too
+        missing = {}
+        for k, text in zip(keys, text_list):
+            if k not in found and k not in missing:
+                missing[k] = text
+
+        if missing:
+            new_scores = np.full((len(missing), cache.n_scores), np.nan)
+            _score_list(list(missing.values()), columns, workers, chunk_size,
+                        new_scores[:, :len(columns)])
+            cache.put_many(list(missing.keys()), new_scores)
+            found.update(zip(missing.keys(), new_scores))
+
+        # pick the asked metrics out of the cached scores for each text
+        for m in asked:
+            col = columns.index(m)
+            scores[:, metrics.index(m)] = [found[k][col] for k in keys]
+
+    return pd.DataFrame(scores, index = texts.index, columns = metrics)
+
+
+# stop the worker processes when the program exits
+atexit.register(shutdown_pool)
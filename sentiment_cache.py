@@ -0,0 +1,245 @@
+
+#=========== pakages/modules that are used here ==============================
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+#================ code =======================================================
+# default cache file, saved in the same folder as the news and tweet csv files
+cache_file = 'SentimentCache.sqlite'
+
+# default max number of texts kept in the cache before the least recently
+# used ones are removed
+cache_max_entries = 500000
+
+# seconds to wait for another process (like a chart render worker) that is
+# writing to the same cache file, before giving up with an error
+cache_timeout = 30
+
+# sqlite allows a limited number of '?' parameters in a single statement
+_query_batch = 500
+
+# max number of keys found by get_many that wait to be marked as used, before
+# they are saved without waiting for the next put_many
+_touch_limit = 10000
+
+
+def normalize_text(text):
+    '''
+    Normalizes a text before it is hashed, so texts that only differ by
+    leading, trailing or repeated whitespace share one cache entry.
+
+    Parameters
+    ----------
+    text(string): a text string
+
+    Returns
+    -------
+    Returns the normalized text string.
+    '''
+    return ' '.join(str(text).split())
+
+
+class ScoreCache:
+    '''
+    A persistent cache that maps a hash of a normalized text plus the scorer
+    name and version to the text's sentiment scores from that scorer.
+
+    The cache is stored in a SQLite file, which several processes can share.
+    Lookups only read the file: the keys found are marked as used in the same
+    write as the next put_many (or flush). Every write takes the next 'last
+    used' counter from the file, and once the file holds more than max_entries
+    texts the least recently used rows are removed.
+
+    hits and misses count the texts found and not found by get_many.
+    '''
+
+    def __init__(self, f_name, version, n_scores, max_entries = cache_max_entries):
+        '''
+        Opens (or creates) a sentiment score cache.
+
+        Parameters
+        ----------
+        f_name(string): the SQLite file name, or ':memory:'
+
+        version(string): the scorer version, part of every key so scores from
+        an older scorer are never returned
+
+        n_scores(int): number of scores stored per text
+
+        max_entries(int): max number of texts kept in the cache
+        '''
+        self.version = version
+        self.n_scores = n_scores
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        # keys found by get_many, not yet marked as used in the file
+        self._touched = {}
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f_name, timeout = cache_timeout,
+                                     check_same_thread = False)
+
+        # write-ahead logging lets processes read the file while another one
+        # writes to it, instead of failing with 'database is locked'
+        if f_name != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+
+        score_cols = ', '.join('s' + str(i) + ' REAL' for i in range(n_scores))
+        self._conn.execute('CREATE TABLE IF NOT EXISTS scores ('
+                           'key TEXT PRIMARY KEY, last_used INTEGER, ' +
+                           score_cols + ')')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS scores_last_used '
+                           'ON scores (last_used)')
+        self._conn.commit()
+
+    def key(self, text, scorer = ''):
+        '''
+        Gets the cache key of a text.
+
+        Parameters
+        ----------
+        text(string): a text string
+
+        scorer(string): the name of the scorer whose scores are kept under
+        the key, like 'vader'
+
+        Returns
+        -------
+        Returns a hex string hash of the scorer version and name, and the
+        normalized text.
+        '''
+        data = (self.version + '\n' + scorer + '\n' + 
+                normalize_text(text)).encode('utf-8')
+        return hashlib.sha1(data).hexdigest()
+
+    def get_many(self, keys):
+        '''
+        Looks up the scores for a list of keys.
+
+        Parameters
+        ----------
+        keys(list): cache keys from the key function
+
+        Returns
+        -------
+        Returns a dictionary that maps each key found to a numpy array of its
+        scores. Keys that are not in the cache are left out.
+        '''
+        keys = list(dict.fromkeys(keys))
+        found = {}
+
+        with self._lock:
+            for i in range(0, len(keys), _query_batch):
+                batch = keys[i:i + _query_batch]
+                rows = self._conn.execute(
+                    'SELECT * FROM scores WHERE key IN (' +
+                    ','.join('?' * len(batch)) + ')', batch).fetchall()
+
+                for row in rows:
+                    found[row[0]] = np.array(row[2:], dtype = float)
+
+            # the rows found are marked as used with the next write
+            self._touched.update(dict.fromkeys(found))
+            if len(self._touched) >= _touch_limit:
+                self._write([])
+
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+
+        return found
+
+    def put_many(self, keys, scores):
+        '''
+        Saves the scores for a list of keys, then removes the least recently
+        used rows if the cache has grown past max_entries.
+
+        Parameters
+        ----------
+        keys(list): cache keys from the key function
+
+        scores(numpy array): one row of n_scores scores per key
+        '''
+        rows = [(k,) + tuple(float(x) for x in s) for k, s in zip(keys, scores)]
+        with self._lock:
+            self._write(rows)
+
+    def flush(self):
+        '''
+        Marks the keys found by get_many since the last write as used.
+        '''
+        with self._lock:
+            if self._touched:
+                self._write([])
+
+    def _write(self, rows):
+        '''
+        Saves new rows and the keys found by get_many in one write, then
+        removes the least recently used rows over max_entries. Must be called
+        with self._lock held.
+
+        Parameters
+        ----------
+        rows(list): tuples of a key and its n_scores scores
+        '''
+        # take the file's write lock first, so the counter and the row count
+        # are not changed by another process before this write is committed
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            clock = self._conn.execute(
+                'SELECT COALESCE(MAX(last_used), 0) + 1 FROM scores').fetchone()[0]
+
+            self._conn.executemany(
+                'UPDATE scores SET last_used = ? WHERE key = ?',
+                [(clock, k) for k in self._touched])
+
+            # rows already in the cache (e.g. saved by another thread or
+            # process since they were looked up) are kept as they are
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO scores VALUES (?, ' + str(clock) +
+                ''.join(',?' * self.n_scores) + ')', rows)
+
+            # remove the least recently used rows over the size limit
+            size = self._conn.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+            if size > self.max_entries:
+                self._conn.execute(
+                    'DELETE FROM scores WHERE key IN (SELECT key FROM scores '
+                    'ORDER BY last_used LIMIT ?)', (size - self.max_entries,))
+
+            self._conn.commit()
+        except BaseException:
+            self._conn.rollback()
+            raise
+
+        self._touched = {}
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def clear(self):
+        '''
+        Removes all the rows from the cache and resets the counters.
+        '''
+        with self._lock:
+            self._conn.execute('DELETE FROM scores')
+            self._conn.commit()
+            self._touched = {}
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        '''
+        Marks the keys found by get_many as used, then closes the cache file.
+        Does nothing if the file is already closed.
+        '''
+        with self._lock:
+            if self._conn is None:
+                return
+            if self._touched:
+                self._write([])
+            self._conn.close()
+            self._conn = None
@@ -4,36 +4,383 @@
 import colored
 from colored import stylize
 import requests
+import json
+from concurrent.futures import ThreadPoolExecutor
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import pandas as pd
 from os import path 
-import statsmodels.api as sm
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib as mpl
-from matplotlib import style
 
 #import from the modules I have created
 import stock_price as sp
 import sentiment_analysis as sa
+import web_session as ws
+import data_cache as dc
+import plot_render as pr
+import sa_model as smod
+from lazy_import import lazy_import
+
+# matplotlib is only imported when the first plot is made
+mdates = lazy_import('matplotlib.dates')
 
 #================ code =======================================================
 # text printing styles for alert messages
 invalid_style = colored.fg("red") + colored.attr("bold")
 
+# news page url, where the 1st {} is the lowercase ticker and the 2nd {} is
+# the page number
+news_url = 'https://markets.businessinsider.com/news/{}?p={}'
+
+# max number of news pages loaded at the same time
+fetch_workers = 8
+
+# settings for the rolling per-stock news store:
+#   incremental_news - True to load only new headlines into the store, False
+#   to load all the pages again for every new csv file
+#   news_refresh_minutes - the newest pages are not checked again within
+#   this many minutes of the last check
+#   max_news_pages - the most pages checked for new headlines in one update
+incremental_news = True
+news_refresh_minutes = 60
+max_news_pages = 100
+
+# x variables of the news sentiment model on the adj close price
+news_x_columns = ['Open', 'Compound', 'Polarity']
+
+# number of days in each window of the rolling news sentiment model
+news_coef_window = 10
+
+
+def parse_news_page(content, cur_time):
+    '''
+    Gets the news headlines and their post dates from one page of 'Business
+    Insider' news.
+
+    Parameters
+    ----------
+    content(bytes): the html of a news page
+
+    cur_time(datetime): the time the page was loaded, used to turn the
+    elapsed time since a headline was posted into a date
+
+    Returns
+    -------
+    Returns a list of [date, headline] lists, in the order they are shown on
+    the page. The date is a yyyy-mm-dd text string.
+    '''
+    page_news = []
+    soup = BeautifulSoup(content, 'lxml')
+    newsSoup = soup.find_all('div', 
+                             {"class": "col-md-6 further-news-container latest-news-padding"})
+    
+    for j in range(len(newsSoup)):
+        #news headline text
+        news_title = newsSoup[j].find('a').get_text()
+        
+        #elapsed time since the news headline has been posted
+        news_time_section = newsSoup[j].find('span', 
+                                             {"class": "warmGrey source-and-publishdate"}
+                                             ).get_text()
+        news_time = news_time_section.split()[-1]
+        
+        # the measurement unit of elapsed time: m (minutes), h (hours) or d (days)
+        time_unit = news_time[-1]
+        
+        # get the amount of elapsed time in the measurement unit
+        time_amount = int(news_time[:-1].replace(',', ''))
+        
+        #compare the current time and the elapsed time to get the date
+        #when the news was posted
+        if time_unit == 'm': 
+            news_date = cur_time - timedelta(minutes = time_amount)
+        elif time_unit == 'h': 
+            news_date = cur_time - timedelta(hours = time_amount)
+        elif time_unit == 'd': 
+            news_date = cur_time - timedelta(days = time_amount)
+    
+        # convert the new post date to yyyy-mm-dd text string
+        news_date = news_date.strftime('%Y-%m-%d')
+        
+        #append the news to the news list
+        page_news.append([news_date, news_title])
+
+    return page_news
+
+
+def fetch_news_page(ticker, page, cur_time):
+    '''
+    Loads and parses one page of a stock's news headlines.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    page(int): the page number, where 1 is the most recent news
+
+    cur_time(datetime): the time the news loading started
+
+    Returns
+    -------
+    Returns a list of [date, headline] lists (empty if the page has no
+    headlines), or None if the page could not be loaded.
+    '''
+    url = news_url.format(ticker.lower(), str(page))
+
+    try:
+        req = ws.fetch(url)
+    except requests.RequestException:
+        return None
+
+    #check if a url exists/works
+    if req.status_code != 200:
+        return None
+
+    return parse_news_page(req.content, cur_time)
+
+
+def fetch_news_pages(ticker, pages, cur_time, workers = None):
+    '''
+    Loads and parses several pages of a stock's news headlines, a few pages
+    at a time.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    pages(list): the page numbers to load
+
+    cur_time(datetime): the time the news loading started
+
+    workers(int): max number of pages loaded at the same time, None means
+    fetch_workers. 1 loads the pages one by one.
+
+    Returns
+    -------
+    Returns a list with one list of [date, headline] lists per page, in the
+    same order as pages, with None for a page that could not be loaded.
+    '''
+    if workers is None:
+        workers = fetch_workers
+
+    if workers <= 1:
+        return [fetch_news_page(ticker, i, cur_time) for i in pages]
+
+    # map returns the pages in the order they were asked for
+    with ThreadPoolExecutor(max_workers = workers) as executor:
+        return list(executor.map(lambda i: fetch_news_page(ticker, i, cur_time),
+                                 pages))
+
+
+def news_store_names(ticker):
+    '''
+    Gets the file names of a stock's rolling news store.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    Returns
+    -------
+    Returns a tuple of 2 file names: the csv file with all the headlines
+    (newest first) and their sentiment scores, and the json file with the
+    store's settings.
+
+    for example: if the ticker is AMZN, the file names are
+    ('AMZN_NewsStore.csv', 'AMZN_NewsStore.json')
+    '''
+    return ticker + '_NewsStore.csv', ticker + '_NewsStore.json'
+
+
+def load_news_store(ticker):
+    '''
+    Loads a stock's rolling news store.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    Returns
+    -------
+    Returns a tuple of a DataFrame with columns Date, Headline and the 6
+    sentiment scores (empty if there is no store yet), and a dictionary with
+    the store's settings:
+        'page_size': number of headlines on a news page
+        'updated': the time the newest page was last loaded, as a yyyy-mm-dd
+        HH:MM:SS text string
+    '''
+    f_store, f_meta = news_store_names(ticker)
+
+    if path.exists(f_store) == False or path.exists(f_meta) == False:
+        return pd.DataFrame(columns = ['Date', 'Headline'] + sa.score_columns), {}
+
+    with open(f_meta) as f:
+        meta = json.load(f)
+
+    return pd.read_csv(f_store), meta
+
+
+def update_news_store(ticker, pagenum, workers = None, stop = None):
+    '''
+    Brings a stock's rolling news store up to date, with at least pagenum
+    pages of news headlines in it.
+
+    News pages are loaded newest first, a few pages at a time, and the
+    loading stops at the first page that has no new headlines. If the store
+    still holds fewer than pagenum pages after that, the older pages it is
+    missing are loaded too. Only the new headlines are scored and added.
+    A headline is new if the store has no headline with the same text on
+    the same date.
+
+    The newest pages are not checked again if they were loaded less than
+    news_refresh_minutes ago. If one of them could not be loaded, the check
+    adds nothing and is done again at the next update.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    pagenum(int): number of pages of news headlines a user wants to extract
+
+    workers(int): max number of pages loaded at the same time, None means
+    fetch_workers
+
+    stop(Event): optional threading.Event; once it is set, the loading stops
+    before the next few pages and raises CancelledError without changing the
+    store
+
+    Returns
+    -------
+    Returns a tuple of the updated store as a DataFrame (newest headlines
+    first) and its settings dictionary (see load_news_store).
+    '''
+    if workers is None:
+        workers = fetch_workers
+
+    cur_time = datetime.now()   #current time
+    df_store, meta = load_news_store(ticker)
+    stored = set(zip(df_store['Date'], df_store['Headline']))
+    known = set(stored)
+    new_top = []        # new headlines from the newest pages
+    new_bottom = []     # headlines from the older pages the store is missing
+
+    # check the newest pages for headlines posted since the last update
+    if len(df_store) > 0:
+        updated = datetime.strptime(meta['updated'], '%Y-%m-%d %H:%M:%S')
+
+        if cur_time - updated >= timedelta(minutes = news_refresh_minutes):
+            page = 1
+            done = False
+            failed = False
+
+            while done == False and failed == False and page <= max_news_pages:
+                ws.check_stop(ticker, stop)
+                pages = range(page, min(page + workers, max_news_pages + 1))
+
+                for page_news in fetch_news_pages(ticker, pages, cur_time, workers):
+                    if page_news is None:
+                        failed = True
+                        break
+
+                    new_news = [n for n in page_news if tuple(n) not in known]
+
+                    # stop at an empty page or a page with only known headlines
+                    if len(new_news) == 0:
+                        done = True
+                        break
+
+                    known.update(tuple(n) for n in new_news)
+                    new_top.extend(new_news)
+
+                page += workers
 
-def get_stock_news(ticker, pagenum):    
+            # a page that could not be loaded may hide new headlines between
+            # the ones found and the stored ones, so keep none of them and
+            # check again at the next update
+            if failed == True:
+                new_top = []
+                known = set(stored)
+            else:
+                meta['updated'] = cur_time.strftime('%Y-%m-%d %H:%M:%S')
+
+    # load the older pages the store does not have yet. New headlines have
+    # moved the stored ones down by about len(new_top) / page_size pages.
+    page_size = meta.get('page_size', 0)
+    if page_size > 0:
+        stored_pages = (len(df_store) + len(new_top)) // page_size
+    else:
+        stored_pages = 0
+
+    if stored_pages < pagenum:
+        for page in range(stored_pages + 1, pagenum + 1, workers):
+            ws.check_stop(ticker, stop)
+            pages = range(page, min(page + workers, pagenum + 1))
+
+            for page_news in fetch_news_pages(ticker, pages, cur_time, workers):
+                if page_news is None:
+                    continue
+
+                new_news = [n for n in page_news if tuple(n) not in known]
+                known.update(tuple(n) for n in new_news)
+                new_bottom.extend(new_news)
+
+                # the 1st page loaded for a new store tells the page size
+                if page_size == 0 and len(page_news) > 0:
+                    page_size = len(page_news)
+
+        # a new store is only up to date if some of its pages were loaded
+        if len(df_store) == 0 and len(new_bottom) > 0:
+            meta['updated'] = cur_time.strftime('%Y-%m-%d %H:%M:%S')
+
+    # nothing new to add
+    if len(new_top) == 0 and len(new_bottom) == 0:
+        if len(df_store) > 0:
+            with open(news_store_names(ticker)[1], 'w') as f:
+                json.dump(meta, f)
+        return df_store, meta
+
+    # score only the new headlines, then put them before (newer) and after
+    # (older) the stored ones
+    df_top = pd.DataFrame(new_top, columns = ['Date', 'Headline'])
+    df_bottom = pd.DataFrame(new_bottom, columns = ['Date', 'Headline'])
+    df_new = pd.concat([df_top, df_bottom], ignore_index = True)
+    df_new[sa.score_columns] = sa.score_frame(df_new['Headline'], sa.score_columns)
+
+    df_store = pd.concat([df_new.iloc[:len(df_top)], df_store,
+                          df_new.iloc[len(df_top):]], ignore_index = True)
+
+    # save the store, then its settings
+    meta['page_size'] = page_size
+    f_store, f_meta = news_store_names(ticker)
+    df_store.to_csv(f_store, index = False, encoding = 'utf-8-sig')
+    with open(f_meta, 'w') as f:
+        json.dump(meta, f)
+
+    return df_store, meta
+
+
+def get_stock_news(ticker, pagenum, workers = None):    
     '''
     Web scrape a stock's news headlines from 'Business Insider' website, and 
     save the data in a csv, given number of pages of news headlines a user wants
     extract.
     
+    If incremental_news is True, only the headlines that are not in the
+    stock's rolling news store yet are loaded (see update_news_store), and
+    the csv file is the newest pagenum pages of the store, with the sentiment
+    scores already added.
+    
+    Otherwise, pages are loaded concurrently (see fetch_news_pages) but saved
+    in page order, so the csv file is the same as when loading them one by
+    one.
+    
     Parameters
     ----------
     ticker(string): a ticker symbol
     
     pagenum(int): number of pages of news headlines a user wants to extract
+    
+    workers(int): max number of pages loaded at the same time, None means
+    fetch_workers
         
     Returns
     -------
@@ -41,6 +388,8 @@ def get_stock_news(ticker, pagenum):
     
     for example: if the ticker is AMZN, today is Dec 12 2020, and pagenum = 30.
     output file name = 'AMZN_HisNews_20201212_p30.csv'
+    
+    Returns None, and saves no file, if no news page could be loaded.
     '''
     cur_time = datetime.now()   #current time
     all_news = []               # create an empty list to store news headlines
@@ -53,52 +402,36 @@ def get_stock_news(ticker, pagenum):
     if path.exists(fout) == True:
         return fout
     
-    # loop news webpage one by one to web scrape the news headlines
-    for i in range(1, pagenum + 1):
-        url='https://markets.businessinsider.com/news/{}?p={}'.format(ticker.lower(),
-                                                                      str(i))
-        req = requests.get(url)
+    # save the newest pagenum pages from the rolling news store
+    if incremental_news == True:
+        df_store, meta = update_news_store(ticker, pagenum, workers)
+        if len(df_store) == 0 or meta.get('page_size', 0) == 0:
+            print(stylize('\n    The news about ' + ticker + 
+                          ' could not be loaded. Try again later.', invalid_style))
+            return None
         
-        #check if a url exists/works
-        if req.status_code == 200:
-            soup = BeautifulSoup(req.content, 'lxml')
-            newsSoup = soup.find_all('div', 
-                                     {"class": "col-md-6 further-news-container latest-news-padding"})
-            
-            for j in range(len(newsSoup)):
-                #news headline text
-                news_title = newsSoup[j].find('a').get_text()
-                
-                #elapsed time since the news headline has been posted
-                news_time_section = newsSoup[j].find('span', 
-                                                     {"class": "warmGrey source-and-publishdate"}
-                                                     ).get_text()
-                news_time = news_time_section.split()[-1]
-                
-                # the measurement unit of elapsed time: m (minutes), h (hours) or d (days)
-                time_unit = news_time[-1]
-                
-                # get the amount of elapsed time in the measurement unit
-                time_amount = int(news_time[:-1].replace(',', ''))
-                
-                #compare the current time and the elapsed time to get the date
-                #when the news was posted
-                if time_unit == 'm': 
-                    news_date = cur_time - timedelta(minutes = time_amount)
-                elif time_unit == 'h': 
-                    news_date = cur_time - timedelta(hours = time_amount)
-                elif time_unit == 'd': 
-                    news_date = cur_time - timedelta(days = time_amount)
-            
-                # convert the new post date to yyyy-mm-dd text string
-                news_date = news_date.strftime('%Y-%m-%d')
-                
-                #append the news to the news list
-                all_news.append([news_date, news_title])
+        news_df = df_store.head(pagenum * meta['page_size'])
+        news_df.to_csv(fout, index = False, encoding = 'utf-8-sig')
+        dc.invalidate(ticker, 'news')
+        return fout
+    
+    # load the news webpages to web scrape the news headlines, then put the
+    # pages together in page order, leaving out the pages that could not be
+    # loaded
+    pages = fetch_news_pages(ticker, range(1, pagenum + 1), cur_time, workers)
+    if all(page_news is None for page_news in pages):
+        print(stylize('\n    The news about ' + ticker + 
+                      ' could not be loaded. Try again later.', invalid_style))
+        return None
+    
+    for page_news in pages:
+        if page_news is not None:
+            all_news.extend(page_news)
         
     # store all news in panda Dataframe and sace as csv
     news_df = pd.DataFrame(all_news, columns=['Date', 'Headline'])   
     news_df.to_csv(fout, index = False, encoding = 'utf-8-sig')
+    dc.invalidate(ticker, 'news')
  
     return fout
 
@@ -125,10 +458,18 @@ def calc_news_sa(ticker, pagenum):
     today_str = date_today.strftime("%Y%m%d")
     fint = ticker + '_HisNews_' + today_str + '_p' + str(pagenum) +'.csv'  
     
+    # use the news already loaded in this session, if they are there
+    df = dc.get(ticker, 'news', (today_str, pagenum))
+    if df is not None:
+        return df
+    
     # if news fint N/A, extract and save stock news first
+    # if the news could not be loaded, returns no headlines (the loading is
+    # tried again next time)
     print("\n    loading news about " + ticker +" ...")
     if path.exists(fint) == False:
-        get_stock_news(ticker, pagenum)
+        if get_stock_news(ticker, pagenum) is None:
+            return pd.DataFrame(columns = ['Date', 'Headline'] + sa.score_columns)
     
     df = pd.read_csv(fint)      #load news data
     
@@ -136,60 +477,64 @@ def calc_news_sa(ticker, pagenum):
     # and returns the file name.
     # beccause it means all sentiment scores have been added to the file.
     if 'Subjectivity' in df.columns:
+        dc.put(ticker, 'news', (today_str, pagenum), df)
         return df
         
-    # Get subjectivity and polarity for news headline
-    df['Subjectivity'] = df['Headline'].apply(sa.getSubjectivity)
-    df['Polarity'] = df['Headline'].apply(sa.getPolarity)
-    
-    # Get the sentiment scores for each day
-    compound = []   # compound score
-    neg = []        # negative score
-    neu = []        # neutral score
-    pos = []        # positive score
-    
-    # loop to calculate compound, negative, neutral, positive for each day 
-    for i in range(0, len(df['Headline'])):
-        SIA = sa.getSIA(df['Headline'][i])
-        compound.append(SIA['compound'])
-        neg.append(SIA['neg'])
-        neu.append(SIA['neu'])
-        pos.append(SIA['pos'])
-      
-    # store the sentiment scores as columns in the DataFrame
-    df['Compound'] = compound
-    df['Negative'] = neg
-    df['Neutral'] = neu
-    df['Positive'] = pos
+    # calculate subjectivity, polarity, compound, negative, neutral, positive
+    # for all news headlines in one pass, and store them as columns in the
+    # DataFrame
+    df[sa.score_columns] = sa.score_frame(df['Headline'], sa.score_columns)
 
     #save the updated DataFrame to the news csv file.
     df.to_csv(fint, index = False, encoding='utf-8-sig')
+    dc.put(ticker, 'news', (today_str, pagenum), df)
     
     return df
 
 
-def display_news_10(ticker, pagenum):
+def daily_news_sa(ticker, pagenum):
     '''
-    Displays the most recent 10 news headlines for a stock.
+    Gets the average sentiment scores of a stock's news headlines by date.
     
     Parameters
     ----------
     ticker(string): a ticker symbol
     
     pagenum(int): number of pages of news headlines a user wants to extract
+        
+    Returns
+    -------
+    a panda Dataframe indexed by date (yyyy-mm-dd text strings), with the 
+    average of each sentiment score column.
     '''
-    # news input file name
-    date_today = datetime.today()
-    today_str = date_today.strftime("%Y%m%d")
-    fint = ticker + '_HisNews_' + today_str + '_p' + str(pagenum) +'.csv'
+    today_str = datetime.today().strftime("%Y%m%d")
     
-    # if news fint N/A, extract and save stock news first
-    print("\n    loading news about " + ticker +" ...")
-    if path.exists(fint) == False:
-        calc_news_sa(ticker, pagenum)
+    # use the averages already worked out in this session, if they are there
+    df_daily = dc.get(ticker, 'news_daily', (today_str, pagenum))
+    if df_daily is not None:
+        return df_daily
     
-    # load the most recent 10 news headlines
-    df = pd.read_csv(fint).head(10)
+    df_news = calc_news_sa(ticker, pagenum)
+    df_daily = df_news.groupby(['Date'])[sa.score_columns].mean()
+    dc.put(ticker, 'news_daily', (today_str, pagenum), df_daily, 
+           depends = ['news'])
+    
+    return df_daily
+
+
+def display_news_10(ticker, pagenum):
+    '''
+    Displays the most recent 10 news headlines for a stock.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    pagenum(int): number of pages of news headlines a user wants to extract
+    '''
+    # load the most recent 10 news headlines (extract and save stock news 
+    # first if they are not loaded yet)
+    df = calc_news_sa(ticker, pagenum).head(10)
     
     # print the most recent 10 news headlines
     print('''
@@ -220,49 +565,41 @@ def merge_news_sa_price(ticker, from_date, pagenum):
     a merged panda Dataframe that contains price info and news sentiment scores.
     '''
     
-    # news input file name
     # date_today = datetime.today() - timedelta(days = 1)
     date_today = datetime.today()
     today_str = date_today.strftime("%Y%m%d")
-    fint_news = ticker + '_HisNews_' + today_str + '_p' + str(pagenum) +'.csv'  
     
-    # stock price input file name
+    # stock price end date
     end_date = date_today.strftime('%Y-%m-%d')  
-    fint_price = ticker + '_HisPrice_' + from_date.replace('-','') +\
-                '_' + end_date.replace('-','') + '.csv' 
+    
+    # use the merged data already made in this session, if it is there
+    params = (today_str, from_date, pagenum)
+    df_price_news = dc.get(ticker, 'news_price', params)
+    if df_price_news is not None:
+        return df_price_news
                          
-    # if news file N/A, extract and save stock news
-    # otherwise, load stock news data
-    if path.exists(fint_news) == False:
-        df_news  = calc_news_sa(ticker, pagenum)
-    else:
-        df_news = pd.read_csv(fint_news, index_col = 0)
-        
     # get avergae Compound and Polarity score by date for news headlines
-    df_news_new = df_news.groupby(['Date']).agg({'Compound':'mean', 
-                                             'Polarity':'mean'})    
+    # (the news are extracted and saved first if they are not loaded yet)
+    df_news_new = daily_news_sa(ticker, pagenum)[['Compound', 'Polarity']]
          
-    # if price file N/A, extract and save stock price
-    if path.exists(fint_price) == False:
-        # if there is no price data between the from_date to today, 
-        # returns -1 and stop
-        if sp.load_stock_price(ticker, from_date, end_date) == False:
-            return -1
-        
-        #add price movement direction and change in % to the stock price data
-    sp.add_price_move(ticker, from_date, end_date)
-        
-    # load stock price data
-    df_price = pd.read_csv(fint_price, index_col = 0)
+    # load stock price data from the price store, with price movement
+    # direction and change in % added
+    # if there is no price data between the from_date to today, 
+    # returns -1 and stop
+    df_price = sp.add_price_move(ticker, from_date, end_date)
+    if type(df_price) != pd.DataFrame:
+        return -1
     
     # inner join stock price and news sentiment by date
     df_price_news = df_price.merge(df_news_new, how = 'inner', on ='Date', 
                                    left_index = True)
+    dc.put(ticker, 'news_price', params, df_price_news, 
+           depends = ['news', 'price'])
     
     return df_price_news
 
 
-def model_news_sa_price(ticker, from_date, pagenum):
+def model_news_sa_price(ticker, from_date, pagenum, out_file = None):
     '''
     Analyzes the significance of the news headlines sentiments on the stock 
     price movement day over day, by using OLS model
@@ -278,6 +615,9 @@ def model_news_sa_price(ticker, from_date, pagenum):
     price inquiry, with format like yyyy-mm-dd
     
     pagenum(int): number of pages of news headlines a user wants to extract
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     # load the merged dataset between price and news sentiment
     df = merge_news_sa_price(ticker, from_date, pagenum)
@@ -294,47 +634,71 @@ def model_news_sa_price(ticker, from_date, pagenum):
         return -1
     
     #pick opening price, Compound score, Polarity scores as x variables
-    X = df[['Open','Compound', 'Polarity']] 
-    
-    #pick adj close price as outcome variable
-    Y = df['Adj Close']
-    
-    X = sm.add_constant(X) # adding a constant
-     
-    #assign OLS model
-    model = sm.OLS(Y, X).fit()
-    predictions = model.predict(X) 
+    #and adj close price as outcome variable, then fit the OLS model (or
+    #reuse the model already fitted on the same data)
+    model = smod.fit_ols(df, news_x_columns)
+    df = df.loc[model.fittedvalues.index]
+    Y = df[smod.y_column]
+    predictions = model.fittedvalues.values
      
     #print model summary
     print_model = model.summary()
     print(print_model)
     
     # plot sentiment scores for all tickers 
-    mpl.rcParams.update(mpl.rcParamsDefault) #set plot format back to default 
     df.index = pd.to_datetime(df.index)      #convert index from string to date type
-    fig, ax = plt.subplots(figsize=(6, 3))
+    with pr.chart_figure('news_model', out_file) as fig:
+        ax = fig.add_subplot(111)
+    
+        #plot actual stock price
+        ax.plot(df.index, Y.values, '-', color = 'royalblue', label = 'Real Price')
+    
+        #plot model stock price
+        ax.plot(df.index, predictions , '--*', color = 'darkorange',
+                                            label = 'Model Price')
+        # format labels and ticks
+        ax.set_ylabel('Price').set_size(10)
+        ax.set_xlabel('Date').set_size(10)
+        ax.tick_params(axis = "x", labelsize = 8 ,  rotation = 0)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+        ax.tick_params(axis = "y", labelsize = 8 )
+        ax.set_title(ticker +': Real stock price vs OLS Model price').set_size(10)
+        ax.legend(loc=2, prop={"size":8})
+        fig.tight_layout()
+
+
+
+def model_multi_news_sa_price(ticker_list, from_date, pagenum, full = False):
+    '''
+    Fits the news sentiment model of model_news_sa_price for many stocks, 
+    without printing the summaries or plotting.
     
-    #plot actual stock price
-    ax.plot(df.index, Y.values, '-', color = 'royalblue', label = 'Real Price')
+    Parameters
+    ----------
+    ticker_list(list): a list of ticker symbols
     
-    #plot model stock price
-    ax.plot(df.index, predictions , '--*', color = 'darkorange',
-                                        label = 'Model Price')
-    # format labels and ticks
-    ax.set_ylabel('Price').set_size(10)
-    ax.set_xlabel('Date').set_size(10)
-    ax.tick_params(axis = "x", labelsize = 8 ,  rotation = 0)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-    ax.tick_params(axis = "y", labelsize = 8 )
-    ax.set_title(ticker +': Real stock price vs OLS Model price').set_size(10)
-    plt.legend(loc=2, prop={"size":8})
-    plt.tight_layout()
-    plt.show()
-
+    from_date(string): a string that means the start date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    pagenum(int): number of pages of news headlines a user wants to extract
+    
+    full(bool): True to fit statsmodels models (which also gives p values), 
+    False to get only the coefficients and R squared the fast way
+        
+    Returns
+    -------
+    Returns a DataFrame with one row per ticker that has data, and the 
+    coefficients, 'R2' and 'N' (number of days) as columns.
+    '''
+    frames = {}
+    for ticker in dict.fromkeys(ticker_list):
+        frames[ticker] = merge_news_sa_price(ticker, from_date, pagenum)
+    
+    return smod.batch_fit(frames, news_x_columns, full = full)
 
 
 
-def plot_news_sa_price(ticker, from_date, pagenum):
+def plot_news_sa_price(ticker, from_date, pagenum, out_file = None):
     '''
     Plots a stock's news headlines' sentiment movement vs price movement
     
@@ -346,6 +710,9 @@ def plot_news_sa_price(ticker, from_date, pagenum):
     price inquiry, with format like yyyy-mm-dd
     
     pagenum(int): number of pages of news headlines a user wants to extract
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     # get df with merged news sentiment and price history
     df_price_news = merge_news_sa_price(ticker, from_date, pagenum)
@@ -369,42 +736,121 @@ def plot_news_sa_price(ticker, from_date, pagenum):
     y_score = df_price_news['Polarity']
     
     # create graph
-    mpl.rcParams.update(mpl.rcParamsDefault)
-    fig = plt.figure(figsize=(6, 3))
-    ax = fig.add_subplot(111)
-    
-    # plot price change percentage over time
-    ax.set_xlabel('Date').set_size(10)
-    ax.set_ylabel('Price Chg %', color = 'brown')
-    lns1 = ax.plot(x_date, y_price, color = 'brown', label='Price Chg %' )
+    with pr.chart_figure('news_sa_price', out_file) as fig:
+        ax = fig.add_subplot(111)
+    
+        # plot price change percentage over time
+        ax.set_xlabel('Date').set_size(10)
+        ax.set_ylabel('Price Chg %', color = 'brown')
+        lns1 = ax.plot(x_date, y_price, color = 'brown', label='Price Chg %' )
  
-    # plot polarity score over time on a secondary y-axis
-    ax2 = ax.twinx()
-    lns2 = ax2.plot(x_date, y_score, color = 'royalblue',label='Polarity Score')
-    ax2.set_ylabel('Polarity Score', color ='royalblue')  
+        # plot polarity score over time on a secondary y-axis
+        ax2 = ax.twinx()
+        lns2 = ax2.plot(x_date, y_score, color = 'royalblue',label='Polarity Score')
+        ax2.set_ylabel('Polarity Score', color ='royalblue')  
+    
+        # set axis limit
+        ax.set_ylim(min(y_price) *1.1, max(y_price)*1.1)
+        ax2.set_ylim(min(y_score)*1.1, max(y_score)*1.1)
+        ax.set_xlim(min(x_date), max(x_date))
+    
+        # format labels and ticks
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+        ax.set_title('Price Change% vs News Sentiment Score').set_size(10)
+        ax.tick_params(axis="x", labelsize = 8)
+        ax.tick_params(axis="y", labelsize = 8)
+        ax2.tick_params(axis="y", labelsize = 8)
+    
+        # merge legends
+        lns = lns1 + lns2
+        labs = [l.get_label() for l in lns]
+        ax.legend(lns, labs, loc = 2, prop={'size': 8})
+        fig.tight_layout()
+
+
+def plot_news_sa_coefs(ticker, from_date, pagenum, window = None, out_file = None):
+    '''
+    Plots how the news sentiment model coefficients change over time, to be 
+    looked at next to plot_news_sa_price. The model of model_news_sa_price is
+    fitted on a rolling window of days ending at every date.
     
-    # set axis limit
-    ax.set_ylim(min(y_price) *1.1, max(y_price)*1.1)
-    ax2.set_ylim(min(y_score)*1.1, max(y_score)*1.1)
-    ax.set_xlim(min(x_date), max(x_date))
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    from_date(string): a string that means the start date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    pagenum(int): number of pages of news headlines a user wants to extract
+    
+    window(int): number of days in each window, None means news_coef_window.
+    0 means an expanding window that starts at the first day.
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
+    '''
+    if window is None:
+        window = news_coef_window
+    
+    # get df with merged news sentiment and price history
+    df_price_news = merge_news_sa_price(ticker, from_date, pagenum)
+
+    #if there is no data between from_date and today, return -1 and stop.
+    if type(df_price_news) != pd.DataFrame:
+        return -1
     
-    # format labels and ticks
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-    ax.set_title('Price Change% vs News Sentiment Score').set_size(10)
-    ax.tick_params(axis="x", labelsize = 8)
-    ax.tick_params(axis="y", labelsize = 8)
-    ax2.tick_params(axis="y", labelsize = 8)
+    # returns -1 if there is not enough data for one window
+    if len(df_price_news) < max(window, len(news_x_columns) + 2):
+        print(stylize('    Not enough price or news data to display. Try again.', 
+                      invalid_style))
+        return -1
     
-    # merge legends
-    lns = lns1 + lns2
-    labs = [l.get_label() for l in lns]
-    ax.legend(lns, labs, loc = 2, prop={'size': 8})
-    fig.tight_layout()
-    plt.show()
+    # get the coefficients of every window, leaving out the days before the
+    # first full window
+    df_price_news.index = pd.to_datetime(df_price_news.index)
+    df_price_news = df_price_news.sort_index()
+    coefs = smod.rolling_coefs(df_price_news, news_x_columns, 
+                               window if window > 0 else None).dropna()
+    
+    # create graph
+    with pr.chart_figure('news_coefs', out_file) as fig:
+        ax = fig.add_subplot(111)
+    
+        # plot the sentiment coefficients over time
+        ax.set_xlabel('Date').set_size(10)
+        ax.set_ylabel('Sentiment Coefficient')
+        lns1 = ax.plot(coefs.index, coefs['Compound'], color = 'royalblue', 
+                       label = 'Compound')
+        lns2 = ax.plot(coefs.index, coefs['Polarity'], color = 'darkorange', 
+                       label = 'Polarity')
+        ax.axhline(0, color = 'grey', linewidth = 0.5)
+ 
+        # plot the opening price coefficient on a secondary y-axis
+        ax2 = ax.twinx()
+        lns3 = ax2.plot(coefs.index, coefs['Open'], '--', color = 'brown', 
+                        label = 'Open')
+        ax2.set_ylabel('Open Price Coefficient', color = 'brown')
+    
+        # format labels and ticks
+        if window > 0:
+            title = ticker + ': ' + str(window) + '-day rolling model coefficients'
+        else:
+            title = ticker + ': expanding window model coefficients'
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+        ax.set_title(title).set_size(10)
+        ax.tick_params(axis="x", labelsize = 8)
+        ax.tick_params(axis="y", labelsize = 8)
+        ax2.tick_params(axis="y", labelsize = 8)
+    
+        # merge legends
+        lns = lns1 + lns2 + lns3
+        labs = [l.get_label() for l in lns]
+        ax.legend(lns, labs, loc = 2, prop={'size': 8})
+        fig.tight_layout()
 
 
 
-def plot_mutli_news_sa(ticker_list, pagenum):
+def plot_mutli_news_sa(ticker_list, pagenum, out_file = None):
     '''
     Plots several stocks' news headlines polarity score movement during a period
     
@@ -413,6 +859,9 @@ def plot_mutli_news_sa(ticker_list, pagenum):
     ticker_list(list): a list containing up to 5 tickers
     
     pagenum(int): number of pages of news headlines a user wants to extract
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     
     # create an empty panda DataFrame
@@ -423,11 +872,8 @@ def plot_mutli_news_sa(ticker_list, pagenum):
     for i in range(len(ticker_list)):
         ticker = ticker_list[i]
         
-        #load Dataframe about a stock's news with its sentiment scores
-        df_news_i = calc_news_sa(ticker, pagenum)  
-        
-        # get avergae Polarity score by date for news headlines
-        df_news_i = df_news_i.groupby(['Date']).agg({'Polarity':'mean'})    
+        # get avergae Polarity score by date for a stock's news headlines
+        df_news_i = daily_news_sa(ticker, pagenum)[['Polarity']]
         
         #rename 'Polarity' column to 'Polarity - ticker'
         df_news_i.rename(columns={'Polarity': 'Polarity - ' + ticker}, inplace = True)
@@ -443,30 +889,27 @@ def plot_mutli_news_sa(ticker_list, pagenum):
     pd_merge_news.index = pd.to_datetime(pd_merge_news.index)
     
     # plot Polarity movements for all tickers 
-    mpl.rcParams.update(mpl.rcParamsDefault)
-    style.use("ggplot")
-    
-    fig, ax = plt.subplots(figsize=(6, 3))
-    
-    # line styles for each different stock
-    all_linestyles = [':*', '-', '--', '-.', ':' ]
-    used_linestyles = all_linestyles [ : len(ticker_list)]
-    
-    # loop to add plots one by one with unique line styles
-    for i, j in zip(pd_merge_news.columns, used_linestyles ):
-        ax.plot(pd_merge_news.index, pd_merge_news[i].values, j)
-    
-    # format labels and ticks
-    ax.tick_params(axis="x", labelsize = 8)
-    ax.tick_params(axis="y", labelsize = 8)
-    ax.set_xlim(min(pd_merge_news.index), max(pd_merge_news.index))
-    ax.set_ylabel('News Polarity Score').set_size(8)
-    ax.set_xlabel('Date').set_size(8)
-    ax.set_title('News Polarity Score Comparison').set_size(10)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%b-%d'))
-    plt.legend(ticker_list, loc = 2, prop={"size":8})
-    fig.tight_layout()
-    plt.show()
+    with pr.chart_figure('multi_news_sa', out_file, 'ggplot') as fig:
+        ax = fig.add_subplot(111)
+    
+        # line styles for each different stock
+        all_linestyles = [':*', '-', '--', '-.', ':' ]
+        used_linestyles = all_linestyles [ : len(ticker_list)]
+    
+        # loop to add plots one by one with unique line styles
+        for i, j in zip(pd_merge_news.columns, used_linestyles ):
+            ax.plot(pd_merge_news.index, pd_merge_news[i].values, j)
+    
+        # format labels and ticks
+        ax.tick_params(axis="x", labelsize = 8)
+        ax.tick_params(axis="y", labelsize = 8)
+        ax.set_xlim(min(pd_merge_news.index), max(pd_merge_news.index))
+        ax.set_ylabel('News Polarity Score').set_size(8)
+        ax.set_xlabel('Date').set_size(8)
+        ax.set_title('News Polarity Score Comparison').set_size(10)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b-%d'))
+        ax.legend(ticker_list, loc = 2, prop={"size":8})
+        fig.tight_layout()
 
 
 
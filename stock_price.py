@@ -1,22 +1,57 @@
 
 #=========== pakages/modules that are used here ==============================
-import requests, time, re, string
+import time, io, os, threading, math
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib as mpl
-from matplotlib import style
 from os import path 
 import colored
 from colored import stylize
+
+#import from the modules I have created
+import web_session as ws
+import symbol_cache as sym
+import data_cache as dc
+import plot_render as pr
+from lazy_import import lazy_import
+
+# matplotlib is only imported when the first plot is made
+mdates = lazy_import('matplotlib.dates')
 #================ code =======================================================
 # text printing styles for alert messages
 invalid_style = colored.fg("red") + colored.attr("bold")
 
-def get_co_full_name(ticker):
+# price columns kept in a stock's price store, besides the dates
+price_columns = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+# max number of stocks' prices downloaded at the same time by load_prices
+download_workers = 8
+
+# settings for the technical indicators (see calc_indicators):
+#   sma_windows - days in each simple moving average
+#   ema_span - days in the exponential moving average
+#   rsi_days - days of Wilder smoothing in the relative strength index
+#   macd_spans - (fast, slow, signal) EMA spans of the MACD
+#   bollinger_days, bollinger_width - days of the Bollinger bands' moving
+#   average, and the number of standard deviations (ddof = 0) to the bands
+#   atr_days - days of Wilder smoothing in the average true range
+sma_windows = [10, 20, 50]
+ema_span = 20
+rsi_days = 14
+macd_spans = (12, 26, 9)
+bollinger_days = 20
+bollinger_width = 2
+atr_days = 14
+
+# one lock per ticker, so 2 threads never update the same price store at once
+_store_locks = {}
+_store_locks_lock = threading.Lock()
+
+
+def fetch_co_full_name(ticker):
     '''
-    Gets a company's name based on a ticker symbol'
+    Looks up a company's name on yahoo finance, based on a ticker symbol.
     
     Parameters
     ----------
@@ -28,7 +63,7 @@ def get_co_full_name(ticker):
     Otherwise, returns False.
     '''
     url = "http://d.yimg.com/autoc.finance.yahoo.com/autoc?query={}&region=1&lang=en".format(ticker)
-    result = requests.get(url).json()
+    result = ws.fetch(url).json()
 
     for x in result['ResultSet']['Result']:
         if x['symbol'] == ticker:
@@ -36,6 +71,24 @@ def get_co_full_name(ticker):
     
     return False
 
+def get_co_full_name(ticker):
+    '''
+    Gets a company's name based on a ticker symbol'
+    
+    The name is taken from the local symbol list or the symbol cache if they
+    have it, so the same ticker is only looked up on the web once in a while.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+        
+    Returns
+    -------
+    Returns the company's name if the ticker is valid.
+    Otherwise, returns False.
+    '''
+    return sym.lookup(ticker, fetch_co_full_name)['name']
+
 def get_co_short_name(ticker):
     '''
     Gets the first word from a company's name, given a ticker.
@@ -52,11 +105,10 @@ def get_co_short_name(ticker):
         
     Returns
     -------
-    Returns the first word (string) from a company's full name.
+    Returns the first word (string) from a company's full name, or False if
+    the ticker is not valid.
     '''
-    co_fullname = get_co_full_name(ticker)
-    co_name_split = re.split("[" + string.punctuation + " ]+", co_fullname)
-    return co_name_split[0]
+    return sym.lookup(ticker, fetch_co_full_name)['short_name']
 
 
 def format_date(date_text):
@@ -83,36 +135,125 @@ def format_date(date_text):
     return date_str
 
 
-def load_stock_price(ticker, start_date, end_date): 
+def price_store_name(ticker):
     '''
-    Saves a stock's historical prices as a csv file, given a start and end date.
-    
+    Gets the file name of a stock's price store.
+
     Parameters
     ----------
     ticker(string): a ticker symbol
-    
-    start_date(string): a string that means the start date for a stock's 
-    price inquiry, with format like yyyy-mm-dd
-    
-    end_date(string): a string that means the end date for a stock's 
-    price inquiry, with format like yyyy-mm-dd
-    
+
     Returns
     -------
-    Returns a text, which means the output file name.
-    
-    Returns False, if there is no price data between the given start and end
-    dates.
+    Returns the file name, for example 'AMZN_PriceStore.npz' if the ticker is
+    AMZN.
     '''
+    return ticker + '_PriceStore.npz'
+
+
+def load_price_store(ticker):
+    '''
+    Loads a stock's price store.
+
+    The store is a binary file with one numpy array per column: 'Date'
+    (numpy datetime64 days, sorted), the 6 price_columns, and 'Covered', the
+    first and last date of the date range that has been downloaded.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    Returns
+    -------
+    Returns a dictionary of numpy arrays, or None if the stock has no price
+    store yet.
+    '''
+    f_name = price_store_name(ticker)
+
+    if path.exists(f_name) == False:
+        return None
+
+    with np.load(f_name) as data:
+        return {col: data[col] for col in data.files}
+
+
+def save_price_store(ticker, store):
+    '''
+    Saves a stock's price store, replacing the old file in one step so a
+    crash never leaves half a file behind.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    store(dict): the price store's numpy arrays (see load_price_store)
+    '''
+    f_name = price_store_name(ticker)
+    f_tmp = f_name[:-len('.npz')] + '_tmp.npz'
+    np.savez(f_tmp, **store)
+    os.replace(f_tmp, f_name)
     
-    # output file name
-    f_name = ticker + '_HisPrice_' + start_date.replace('-','') + \
-             '_' + end_date.replace('-','') + '.csv'
-    
-    # if outpout file exists, stop
-    if path.exists(f_name) == True:
-        return f_name
-    
+    # the prices read from the old file are out of date
+    dc.invalidate(ticker, 'price')
+
+
+def store_lock(ticker):
+    '''
+    Gets the lock that guards a stock's price store file.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    Returns
+    -------
+    Returns a threading.Lock.
+    '''
+    with _store_locks_lock:
+        return _store_locks.setdefault(ticker, threading.Lock())
+
+
+def store_rows(store, start_date, end_date):
+    '''
+    Finds the rows of a price store between a start and end date, by binary
+    search on the sorted dates.
+
+    Parameters
+    ----------
+    store(dict): the price store's numpy arrays (see load_price_store)
+
+    start_date(string): the start date, with format like yyyy-mm-dd
+
+    end_date(string): the end date, with format like yyyy-mm-dd
+
+    Returns
+    -------
+    Returns a tuple (lo, hi), where store rows lo to hi - 1 are between the 2
+    dates (both included). lo == hi if there are no such rows.
+    '''
+    lo = np.searchsorted(store['Date'], np.datetime64(start_date, 'D'), side = 'left')
+    hi = np.searchsorted(store['Date'], np.datetime64(end_date, 'D'), side = 'right')
+    return lo, hi
+
+
+def download_price(ticker, start_date, end_date):
+    '''
+    Downloads a stock's daily prices between a start and end date from yahoo
+    finance hidden API.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    start_date(string): the start date, with format like yyyy-mm-dd
+
+    end_date(string): the end date, with format like yyyy-mm-dd
+
+    Returns
+    -------
+    Returns a DataFrame with a 'Date' column and the 6 price_columns, which is
+    empty if there is no price data between the 2 dates.
+    '''
     # convert dates to a proper integer that an url can understand
     start_date_str = format_date(start_date)
     end_date_str = format_date(end_date)
@@ -128,28 +269,24 @@ def load_stock_price(ticker, start_date, end_date):
         'events':'history'}
     
     #load the historical data
-    response = requests.get(stock_url, params = price_param)
+    response = ws.fetch(stock_url, params = price_param)
     
     # if there is no stock price between 2 dates (when date duration is too short)
     if response.text == '404 Not Found: Timestamp data missing.' or\
        "400 Bad Request: Data doesn't exist for" in response.text:
-        
-        print (stylize('\n    There is no data between these 2 dates. Try again.',
-                           invalid_style))
-        return False
-    else:
-        #save the historical data as a csv file
-        f = open(f_name, "w")
-        f.write(response.text) 
-        f.close()
-        
-        return f_name
-  
+        return pd.DataFrame(columns = ['Date'] + price_columns)
     
-def add_price_move(ticker, start_date, end_date):
+    df_price = pd.read_csv(io.StringIO(response.text), na_values = 'null')
+    return df_price[['Date'] + price_columns]
+
+
+def load_stock_price(ticker, start_date, end_date): 
     '''
-    add 2 more columns to indicate the stock price movements and change
-    percentage day over day in its csv output file
+    Makes sure a stock's price store has its historical prices between a
+    start and end date.
+    
+    Only the dates outside the range already in the store are downloaded, so
+    overlapping date ranges are never downloaded twice.
     
     Parameters
     ----------
@@ -163,74 +300,88 @@ def add_price_move(ticker, start_date, end_date):
     
     Returns
     -------
-    Returns a text, which means the output file name if 2 columns can be added.
+    Returns a text, which means the price store file name.
     
-    Reurns -1, if there is no price data between the given start and end dates.
+    Returns False, if there is no price data between the given start and end
+    dates.
     '''
+    # only one thread at a time may update a stock's price store
+    with store_lock(ticker):
+        store = update_price_store(ticker, start_date, end_date)
     
-    # csv file that stores price history
-    f_name = ticker + '_HisPrice_' + start_date.replace('-','') + \
-             '_' + end_date.replace('-','') + '.csv'
+    # if there is no stock price between 2 dates (when date duration is too short)
+    lo, hi = store_rows(store, start_date, end_date)
+    if lo == hi:
+        print (stylize('\n    There is no data between these 2 dates. Try again.',
+                           invalid_style))
+        return False
     
-    # if there is no price data between the given start and end dates,
-    # returns -1
-    if path.exists(f_name) == False:
-        if load_stock_price(ticker, start_date, end_date) == False:
-            return -1
-        
-    #open the price history csv file
-    df_price = pd.read_csv(f_name, index_col=0)
-    
-    # if a column called 'PriceDir' exists in the csv file, just stop and return
-    # the csv file name.
-    # because it means the 2 columns have been added.
-    if 'PriceDir' in df_price.columns:
-        return f_name
-        
-    # create a list to store price movement direction day over day, where
-    #   -1 means price goes down, 0 means no change, and 1 means price goes up
-    price_dir = []
+    return price_store_name(ticker)
+
+
+def update_price_store(ticker, start_date, end_date):
+    '''
+    Downloads the prices between a start and end date that are not in a
+    stock's price store yet, and adds them to the store.
     
-    # create a list to store price change in percentage day over day
-    price_chg = []
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
     
-    for i in range(0, len(df_price['Adj Close'])):
-        # first row of the price, mark both price movement direction and change
-        # in percentage as 0.
-        if i == 0:
-            price_dir.append(0)
-            price_chg.append(0)
-        else:
-            pre_price = df_price['Adj Close'].iloc[i-1]  #previous day's price
-            cur_price = df_price['Adj Close'].iloc[i]    #current day's price
+    start_date(string): the start date, with format like yyyy-mm-dd
+    
+    end_date(string): the end date, with format like yyyy-mm-dd
+    
+    Returns
+    -------
+    Returns the updated price store (see load_price_store).
+    '''
+    start = np.datetime64(start_date, 'D')
+    end = np.datetime64(end_date, 'D')
+    store = load_price_store(ticker)
+    old_store = store
+    
+    # date ranges that are not in the store yet
+    if store is None:
+        missing = [(start, end)]
+    else:
+        covered_start, covered_end = store['Covered']
+        missing = []
+        if start < covered_start:
+            missing.append((start, covered_start))
+        if end > covered_end:
+            missing.append((covered_end, end))
+        start = min(start, covered_start)
+        end = max(end, covered_end)
+    
+    # download the missing date ranges and add them to the store
+    if len(missing) > 0:
+        df_new = pd.concat([download_price(ticker, str(s), str(e))
+                            for s, e in missing], ignore_index = True)
+        df_new['Date'] = pd.to_datetime(df_new['Date']).values.astype('datetime64[D]')
         
-            #append the price movement direction to the price_dir list
-            if cur_price > pre_price:
-                price_dir.append(1)
-                
-            elif cur_price < pre_price:
-                price_dir.append(-1)
-            else:
-                price_dir.append(0)
+        if store is not None:
+            df_old = pd.DataFrame({col: store[col] for col in ['Date'] + price_columns})
+            df_new = pd.concat([df_new, df_old], ignore_index = True)
             
-            #append the price change in % to the price_chg list
-            price_chg.append((cur_price - pre_price)/ pre_price * 100)
-            
-    # add 2 columns called 'PriceDir' and 'PriceChg' in the DataFrame to 
-    # represent the price movement direction and change in %
-    df_price['PriceDir'] = price_dir
-    df_price['PriceChg'] = price_chg
-    
-    # save the updated DataFrame as a csv file, with the same file name.
-    df_price.to_csv(f_name, encoding = 'utf-8')
+        # keep one row per date (the newly downloaded one), sorted by date
+        df_new = df_new.drop_duplicates('Date').sort_values('Date')
+        
+        store = {col: df_new[col].to_numpy(dtype = float) for col in price_columns}
+        store['Date'] = df_new['Date'].to_numpy(dtype = 'datetime64[D]')
+        store['Covered'] = np.array([start, end], dtype = 'datetime64[D]')
+        save_price_store(ticker, store)
+        
+        # add the new days to the saved indicators
+        update_indicator_store(ticker, old_store, store)
     
-    return f_name
+    return store
 
- 
-def plot_price_volm(ticker, start_date, end_date):
+
+def read_price(ticker, start_date, end_date):
     '''
-    Plots a stock's Adj Close Price and Trading Volume movement as 2 subplots 
-    in one big plot.
+    Gets a stock's historical prices between a start and end date from its
+    price store, downloading any dates the store does not have yet.
     
     Parameters
     ----------
@@ -244,148 +395,210 @@ def plot_price_volm(ticker, start_date, end_date):
     
     Returns
     -------
-    Reurns -1, if there is no price data between the given start and end dates.
-    '''
+    Returns a DataFrame with a 'Date' column (yyyy-mm-dd text strings) and the
+    6 price_columns, one row per trading day.
     
-    # set plot format back to default 
-    mpl.rcParams.update(mpl.rcParamsDefault)
-    style.use("ggplot")
+    Returns False, if there is no price data between the given start and end
+    dates.
+    '''
+    # use the prices already read in this session, if they are there
+    df_price = dc.get(ticker, 'price', (start_date, end_date))
+    if df_price is not None:
+        return df_price
     
-    # stock price file name
-    fint = ticker + '_HisPrice_' + start_date.replace('-','') +\
-           '_' + end_date.replace('-','') + '.csv'
+    if load_stock_price(ticker, start_date, end_date) == False:
+        return False
     
-    # if there is no price data between the given start and end dates,
-    # returns -1
-    if path.exists(fint) == False:
-        if load_stock_price(ticker, start_date, end_date) == False:
-            return -1
+    df_price = price_slice(load_price_store(ticker), start_date, end_date)
+    dc.put(ticker, 'price', (start_date, end_date), df_price)
     
-    #load price data
-    df_price = pd.read_csv(fint)
+    return df_price
+  
     
-    if len(df_price) <= 3:
-        print (stylize('\n    There is no data to display. Try again.',
-                           invalid_style))
-        return False
+def price_slice(store, start_date, end_date):
+    '''
+    Gets the rows of a price store between a start and end date as a 
+    DataFrame.
     
-    # convert date from string to date type
-    df_price['Date'] = pd.to_datetime(df_price['Date'])
+    Parameters
+    ----------
+    store(dict): the price store's numpy arrays (see load_price_store)
     
-    # create 2 subplots
-    plt1 = plt.subplot2grid((4,4), (0, 0), rowspan = 3, colspan = 4)
-    plt2 = plt.subplot2grid((4,4), (3,0), rowspan = 1, colspan = 4, sharex= plt1)
+    start_date(string): the start date, with format like yyyy-mm-dd
     
-    plt1.plot(df_price['Date'], df_price["Adj Close"], color='royalblue') 
-    plt2.fill_between(df_price['Date'], df_price['Volume'].values, 0, color='royalblue')
+    end_date(string): the end date, with format like yyyy-mm-dd
     
-    plt1.axes.get_xaxis().set_visible(False) #hide top graph's x-axis
-    plt2.set_xlim(min(df_price['Date']), max(df_price['Date'])) #set x-axis limit
+    Returns
+    -------
+    Returns a DataFrame with a 'Date' column (yyyy-mm-dd text strings) and the
+    6 price_columns, one row per trading day.
+    '''
+    lo, hi = store_rows(store, start_date, end_date)
     
-    #set labels
-    plt1.set_title(ticker + ' - closing price and trading volume').set_size(10)
-    plt1.set_ylabel('Adj Closing Price').set_size(10)
-    plt2.set_ylabel('Volume').set_size(10)
-    plt2.set_xlabel('Date').set_size(10)
-    plt1.tick_params(axis = "x", labelsize = 8 , rotation = 0)
-    plt1.tick_params(axis = "y", labelsize = 8 )
-    plt2.tick_params(axis = "x", labelsize = 8 , rotation = 0)
-    plt2.tick_params(axis = "y", labelsize = 8 )
-    plt2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    df_price = pd.DataFrame({col: store[col][lo:hi] for col in price_columns})
+    df_price.insert(0, 'Date', np.datetime_as_string(store['Date'][lo:hi], unit = 'D'))
     
-    #set size and space
-    plt.gcf().set_size_inches(6,3)
-    plt.tight_layout(pad=0.2, w_pad=0.5, h_pad=0.1)
-    plt.show()
+    return df_price
 
 
-def plot_sma(ticker, start_date, end_date):
+def store_covers(ticker, start_date, end_date):
     '''
-    Plots a stock's price simple moving averages(SMA) during a given start
-    and end dates.
+    Checks if a stock's price store already has the date range between a
+    start and end date, so nothing needs to be downloaded.
     
     Parameters
     ----------
     ticker(string): a ticker symbol
     
-    start_date(string): a string that means the start date for a stock's 
-    price inquiry, with format like yyyy-mm-dd
+    start_date(string): the start date, with format like yyyy-mm-dd
     
-    end_date(string): a string that means the end date for a stock's 
-    price inquiry, with format like yyyy-mm-dd
+    end_date(string): the end date, with format like yyyy-mm-dd
     
     Returns
     -------
-    Reurns -1, if there is no price data between the given start and end dates.
+    True, if the store has the whole date range. Otherwise, False.
     '''
+    store = load_price_store(ticker)
+    if store is None:
+        return False
     
-    mpl.rcParams.update(mpl.rcParamsDefault) #set plot format back to default 
-    style.use("ggplot")
+    covered_start, covered_end = store['Covered']
+    return bool(covered_start <= np.datetime64(start_date, 'D') and
+                np.datetime64(end_date, 'D') <= covered_end)
+
+
+def load_prices(tickers, start_date, end_date, column = 'Adj Close', 
+                workers = None):
+    '''
+    Gets one price column for many stocks between a start and end date, as
+    one table.
     
-    # stock price file name
-    fint = ticker + '_HisPrice_' + start_date.replace('-','') +\
-            '_' + end_date.replace('-','') + '.csv'
+    Duplicate tickers are only loaded once. Stocks whose price store already
+    has the date range are read from it, and the others are downloaded at 
+    the same time over the shared web session.
     
-    # if there is no price data between the given start and end dates,
-    # returns -1
-    if path.exists(fint) == False:
-        if load_stock_price(ticker, start_date, end_date) == False:
-            return -1
+    Parameters
+    ----------
+    tickers(list): ticker symbols
     
-    #load price data
-    df_price = pd.read_csv(fint)   
+    start_date(string): a string that means the start date for the stocks'
+    price inquiry, with format like yyyy-mm-dd
     
-    if len(df_price) <= 3:
-        print (stylize('\n    There is no data to display. Try again.',
-                           invalid_style))
-        return False
+    end_date(string): a string that means the end date for the stocks'
+    price inquiry, with format like yyyy-mm-dd
     
+    column(string): the price column to get, one of price_columns
     
-    # convert date from string to date type
-    df_price['Date'] = pd.to_datetime(df_price['Date'])
+    workers(int): max number of stocks downloaded at the same time, None
+    means download_workers
+    
+    Returns
+    -------
+    Returns a DataFrame indexed by date with one column per ticker, keeping
+    only the dates every stock has a price for. Tickers with no price data
+    between the 2 dates are left out.
+    '''
+    if workers is None:
+        workers = download_workers
+    
+    # keep the first of any duplicate tickers, in the order they were given
+    tickers = list(dict.fromkeys(tickers))
+    
+    # download the stocks whose store does not have the date range yet
+    # (the caller tells the user about stocks with no data)
+    def update_store(ticker):
+        with store_lock(ticker):
+            update_price_store(ticker, start_date, end_date)
+    
+    to_load = [t for t in tickers if store_covers(t, start_date, end_date) == False]
+    if len(to_load) > 0:
+        with ThreadPoolExecutor(max_workers = max(1, min(workers, len(to_load)))) as executor:
+            list(executor.map(update_store, to_load))
+    
+    # read each stock's column from its store, then line them up by date 
+    # with one concat
+    columns = []
+    for ticker in tickers:
+        store = load_price_store(ticker)
+        if store is None:
+            continue
+        
+        lo, hi = store_rows(store, start_date, end_date)
+        if lo < hi:
+            columns.append(pd.Series(store[column][lo:hi], name = ticker,
+                                     index = pd.DatetimeIndex(store['Date'][lo:hi], name = 'Date')))
+    
+    if len(columns) == 0:
+        return pd.DataFrame()
     
-    # create simple moving average for every 10, 20 or 50 days
-    sma10 = df_price['Adj Close'].rolling(10).mean() #10 days
-    sma20 = df_price['Adj Close'].rolling(20).mean() #20 days
-    sma50 = df_price['Adj Close'].rolling(50).mean() #50 days
+    return pd.concat(columns, axis = 1, join = 'inner')
+  
     
+def calc_price_move(adj_close, horizons = None, log_return = False):
+    '''
+    Calculates the price movement direction and change percentage day over
+    day, for a single stock or a whole table of stocks at once.
     
-    #create a Dataframe to store moving average related data
-    df_MA = pd.DataFrame({'Date': df_price['Date'],
-                          'Adj Close': df_price['Adj Close'],
-                          'SMA 10': sma10, 
-                          'SMA 20': sma20, 
-                          'SMA 50': sma50})
+    Parameters
+    ----------
+    adj_close(Series or DataFrame): Adj Close prices in date order. A 
+    DataFrame holds one stock per column.
     
-    # convert 'Date' column as index
-    df_MA.set_index('Date',inplace = True)
+    horizons(list): optional extra numbers of days to calculate the change
+    percentage over, for example [5, 20]
     
-    # plot
-    ax = df_MA.plot(figsize=(6, 3), legend = True, 
-               color = {'Adj Close': 'brown',
-                        'SMA 10':'seagreen' ,
-                        'SMA 20':'mediumblue',
-                        'SMA 50':'darkorange',})
+    log_return(bool): True to also calculate log returns
     
-    #format labels and ticks
-    ax.set_title(ticker + " - simple moving average over time").set_size(10)
-    ax.set_ylabel('Price').set_size(10)
-    ax.set_xlabel('Date').set_size(10)
-    ax.tick_params(axis = "x", labelsize = 8 , rotation = 0)
-    ax.tick_params(axis = "y", labelsize = 8 )
-    plt.legend(loc =2, prop={"size":8})
-    plt.tight_layout()
-    plt.show()
-
+    Returns
+    -------
+    Returns a dictionary of Series (or DataFrames, if adj_close is a
+    DataFrame) with the same index as adj_close:
+        'PriceDir': -1 means price goes down, 0 means no change, and 1 means
+        price goes up, compared to the day before
+        'PriceChg': price change in % compared to the day before
+        'PriceChg<n>': price change in % compared to n days before, for each
+        n in horizons
+        'LogRet' and 'LogRet<n>': log returns over 1 and n days, if
+        log_return is True
+    
+    On the first row, 'PriceDir', 'PriceChg' and 'LogRet' are 0. On the first
+    n rows, 'PriceChg<n>' and 'LogRet<n>' are NaN.
+    '''
+    if horizons is None:
+        horizons = []
+    
+    pre_price = adj_close.shift(1)      #previous day's price
+    diff = adj_close - pre_price
+    
+    moves = {}
+    
+    # compare each day's price with the previous day's price. Missing
+    # prices count as no change, like the first row.
+    moves['PriceDir'] = np.sign(diff.fillna(0)).astype(int)
+    moves['PriceChg'] = (diff / pre_price * 100).fillna(0)
+    
+    for n in horizons:
+        pre_n_price = adj_close.shift(n)    #price n days before
+        moves['PriceChg' + str(n)] = (adj_close - pre_n_price) / pre_n_price * 100
+        
+    if log_return == True:
+        moves['LogRet'] = np.log(adj_close / pre_price).fillna(0)
+        for n in horizons:
+            moves['LogRet' + str(n)] = np.log(adj_close / adj_close.shift(n))
+            
+    return moves
 
 
-def plot_multi_price(ticker_list, start_date, end_date):
+def add_price_move(ticker, start_date, end_date, horizons = None, 
+                   log_return = False):
     '''
-    Plots several stocks' price movement during a period
+    add 2 more columns to indicate the stock price movements and change
+    percentage day over day to the stock's prices between a start and end
+    date
     
     Parameters
     ----------
-    ticker_list(list): a list containing up to 5 tickers
+    ticker(string): a ticker symbol
     
     start_date(string): a string that means the start date for a stock's 
     price inquiry, with format like yyyy-mm-dd
@@ -393,72 +606,1020 @@ def plot_multi_price(ticker_list, start_date, end_date):
     end_date(string): a string that means the end date for a stock's 
     price inquiry, with format like yyyy-mm-dd
     
+    horizons(list): optional extra numbers of days to add price change
+    percentage columns for (see calc_price_move)
+    
+    log_return(bool): True to also add log return columns
+    
     Returns
     -------
+    Returns a DataFrame indexed by date (yyyy-mm-dd text strings) with the 6
+    price_columns and 2 more columns: 'PriceDir' and 'PriceChg' (and the
+    optional columns from calc_price_move).
+    
     Reurns -1, if there is no price data between the given start and end dates.
     '''
     
-    # create an empty panda DataFrame
-    pd_merge_price = pd.DataFrame()
+    # use the price movements already worked out in this session, if they
+    # are there
+    params = (start_date, end_date, tuple(horizons or []), log_return)
+    df_price = dc.get(ticker, 'price_move', params)
+    if df_price is not None:
+        return df_price
     
+    # if there is no price data between the given start and end dates,
+    # returns -1
+    df_price = read_price(ticker, start_date, end_date)
+    if type(df_price) != pd.DataFrame:
+        return -1
     
-    # loop each ticker to get historical price info
-    # then merge their 'Adj Close' column by date
-    for i in range(len(ticker_list)):
-        ticker = ticker_list[i]                               # ticker symbol
-        fint = load_stock_price(ticker, start_date, end_date) # price file name
-        
-        # if there is no price data between the given start and end dates,
-        # returns -1 and stop
-        if fint == False:
-            return -1
-        
-        # load price data
-        df_price_i = pd.read_csv(fint)
-        
-        if len(df_price_i) <= 3:
-            print (stylize('\n    There is no data to display. Try again.',
-                           invalid_style))
-            return False
+    df_price.set_index('Date', inplace = True)
     
+    # add columns called 'PriceDir' and 'PriceChg' in the DataFrame to 
+    # represent the price movement direction and change in %
+    moves = calc_price_move(df_price['Adj Close'], horizons, log_return)
+    for col in moves:
+        df_price[col] = moves[col]
     
-        df_price_i = df_price_i[['Date', 'Adj Close']]
-        
-        #rename 'Adj Close' column to their ticker symbol
-        df_price_i.rename(columns={'Date': 'Date', 'Adj Close': ticker},
-                          inplace=True)
-        
-        # merge Dataframe by their Date column
-        if i == 0:
-            pd_merge_price = df_price_i
-        else:
-            pd_merge_price = pd_merge_price.merge(df_price_i, how = 'inner', on ='Date', 
-                                                  left_index = True)
+    dc.put(ticker, 'price_move', params, df_price, depends = ['price'])
     
-    # convert Date from string to date type
-    pd_merge_price['Date'] = pd.to_datetime(pd_merge_price['Date'])
+    return df_price
+
+
+def rolling_means(values, windows):
+    '''
+    Calculates moving averages over the last axis (days) of an array, for
+    every row (stock) at once. One set of running sums is made and shared by
+    all the windows.
+
+    Parameters
+    ----------
+    values(array): prices, with days on the last axis
+
+    windows(list): numbers of days in each average
+
+    Returns
+    -------
+    Returns a dictionary that maps each window to an array of the same shape
+    as values, which is nan on the first window - 1 days and wherever a price
+    in the window is missing, like pandas' rolling(window).mean().
+    '''
+    missing = np.isnan(values)
+    has_missing = bool(missing.any())
+    shape = values.shape[:-1] + (values.shape[-1] + 1,)
+
+    # sums[..., i] is the sum of the first i days
+    sums = np.zeros(shape)
+    np.cumsum(np.where(missing, 0, values) if has_missing else values, 
+              axis = -1, out = sums[..., 1:])
+    if has_missing:
+        counts = np.zeros(shape, dtype = int)
+        np.cumsum(missing, axis = -1, out = counts[..., 1:])
+
+    means = {}
+    for window in windows:
+        window_means = np.full(values.shape, np.nan)
+        window_sums = window_means[..., window - 1:]
+        np.subtract(sums[..., window:], sums[..., :-window], out = window_sums)
+        window_sums /= window
+
+        if has_missing:
+            window_sums[counts[..., window:] - counts[..., :-window] > 0] = np.nan
+        means[window] = window_means
+
+    return means
+
+
+def rolling_std(values, window):
+    '''
+    Calculates the moving standard deviation (ddof = 0) over the last axis of
+    an array, like rolling_means.
+    '''
+    # the standard deviation does not change when every price moves by the
+    # same amount, so move each stock's prices near 0 first to keep the
+    # sums of squares accurate
+    first = values[..., :1]
+    shifted = values - np.where(np.isnan(first), 0, first)
+
+    means = rolling_means(shifted, [window])[window]
+    variances = rolling_means(shifted * shifted, [window])[window] - means * means
+
+    return np.sqrt(np.maximum(variances, 0))
+
+
+def smooth(values, alphas, min_days = None):
+    '''
+    Exponentially smooths several arrays in one pass over the days:
     
-    # change Date from column to index
-    pd_merge_price.set_index('Date',inplace = True)
+        smoothed = smoothed before + alpha * (value - smoothed before)
+    
+    starting from the first value, like pandas' ewm(alpha, adjust = False).
+    A missing value keeps the smoothed value of the day before.
+
+    Parameters
+    ----------
+    values(array): shape (number of arrays, stocks, days)
+
+    alphas(list): the smoothing factor of each array, between 0 and 1
+
+    min_days(list): for each array, number of values needed before the
+    result is given (nan before that), None means 1 for every array
+
+    Returns
+    -------
+    Returns an array of the same shape as values.
+    '''
+    alphas = np.asarray(alphas, dtype = float).reshape(-1, 1)
+
+    # loop over the days on the first axis, so each day is one contiguous
+    # block of memory
+    days_first = np.ascontiguousarray(np.moveaxis(values, -1, 0))
+    n_days = len(days_first)
+
+    # when no price is missing after a stock's first one, each day is just
+    # 3 in-place steps; the missing first values only matter until the day
+    # every stock has started
+    known = ~np.isnan(days_first)
+    leading = np.where(known.any(axis = 0), np.argmax(known, axis = 0), n_days)
+    has_gaps = bool(known.size - known.sum() > leading.sum())
+    start_day = int(leading.max())
+
+    out = np.empty(days_first.shape)
+    state = days_first[0].copy()
+    step = np.empty(state.shape)
+    out[0] = state
+
+    for t in range(1, n_days):
+        value = days_first[t]
+
+        if has_gaps:
+            # a stock's smoothing starts on its first known value, and a
+            # missing value keeps the day before's
+            new = np.where(np.isnan(state), value, state + alphas * (value - state))
+            state = np.where(np.isnan(value), state, new)
+        else:
+            np.subtract(value, state, out = step)
+            step *= alphas
+            state += step
+            if t <= start_day:
+                np.copyto(state, value, where = np.isnan(state))
+
+        out[t] = state
+
+    out = np.moveaxis(out, 0, -1)
+
+    if min_days is not None:
+        for i, days in enumerate(min_days):
+            if days > 1:
+                # number of known values up to each day
+                seen = np.cumsum(~np.isnan(values[i]), axis = -1)
+                out[i][seen < days] = np.nan
+
+    return out
+
+
+def calc_indicators(prices, last_smoothed = None):
+    '''
+    Calculates technical indicators for one stock or a whole panel of stocks
+    at once.
+
+    Parameters
+    ----------
+    prices(dict): price column name -> numpy array, with one row per stock
+    and one column per day (a 1-D array is one stock). 'Adj Close' is
+    needed; 'High', 'Low' and 'Close' are needed for the ATR.
+
+    last_smoothed(dict): optional dictionary that gets the last day's value
+    of every smoothed series (see IndicatorState.smoothed_names), to start
+    an IndicatorState from (see IndicatorState.from_history)
+
+    Returns
+    -------
+    Returns a dictionary of arrays with the same shape as the prices:
+        'SMA <n>': simple moving average of Adj Close, for each n in
+        sma_windows
+        'EMA <n>': exponential moving average (span ema_span)
+        'RSI <n>': relative strength index, with Wilder smoothing over
+        rsi_days
+        'MACD', 'MACD Signal', 'MACD Hist': the MACD line (fast EMA - slow
+        EMA), its signal line and their difference
+        'BB Mid', 'BB Upper', 'BB Lower': Bollinger bands
+        'ATR <n>': average true range with Wilder smoothing over atr_days,
+        only if High, Low and Close are given
+    The indicators are nan until there are enough days.
+    '''
+    adj_close = np.atleast_2d(np.asarray(prices['Adj Close'], dtype = float))
+    has_range = all(col in prices for col in ['High', 'Low', 'Close'])
+    fast, slow, signal = macd_spans
+
+    indicators = {}
+    means = rolling_means(adj_close, set(sma_windows + [bollinger_days]))
+    for n in sma_windows:
+        indicators['SMA ' + str(n)] = means[n]
+
+    mid = means[bollinger_days]
+    width = bollinger_width * rolling_std(adj_close, bollinger_days)
+    indicators['BB Mid'] = mid
+    indicators['BB Upper'] = mid + width
+    indicators['BB Lower'] = mid - width
+
+    # day over day gains and losses (nan on the first day)
+    change = np.full(adj_close.shape, np.nan)
+    change[:, 1:] = np.diff(adj_close, axis = 1)
+    gains = np.where(np.isnan(change), np.nan, np.maximum(change, 0))
+    losses = np.where(np.isnan(change), np.nan, np.maximum(-change, 0))
+
+    # smooth all the EMA-like series in one pass over the days
+    series = [adj_close, adj_close, adj_close, gains, losses]
+    alphas = [2 / (ema_span + 1), 2 / (fast + 1), 2 / (slow + 1),
+              1 / rsi_days, 1 / rsi_days]
+    min_days = [1, 1, 1, rsi_days, rsi_days]
+
+    if has_range:
+        high = np.atleast_2d(np.asarray(prices['High'], dtype = float))
+        low = np.atleast_2d(np.asarray(prices['Low'], dtype = float))
+        close = np.atleast_2d(np.asarray(prices['Close'], dtype = float))
+
+        # true range: the day's range, stretched to the close the day before
+        pre_close = np.full(close.shape, np.nan)
+        pre_close[:, 1:] = close[:, :-1]
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - pre_close),
+                                                 np.abs(low - pre_close)))
+        series.append(true_range)
+        alphas.append(1 / atr_days)
+        min_days.append(atr_days)
+
+    smoothed = smooth(np.stack(series), alphas, min_days)
+
+    indicators['EMA ' + str(ema_span)] = smoothed[0]
+
+    macd = smoothed[1] - smoothed[2]
+    macd_signal = smooth(macd[np.newaxis], [2 / (signal + 1)])[0]
+    indicators['MACD'] = macd
+    indicators['MACD Signal'] = macd_signal
+    indicators['MACD Hist'] = macd - macd_signal
+
+    avg_gain, avg_loss = smoothed[3], smoothed[4]
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    indicators['RSI ' + str(rsi_days)] = np.where(avg_loss == 0, 100, rsi)
+    indicators['RSI ' + str(rsi_days)][np.isnan(avg_gain)] = np.nan
+
+    if has_range:
+        indicators['ATR ' + str(atr_days)] = smoothed[5]
+
+    if last_smoothed is not None:
+        names = ['EMA', 'Fast', 'Slow', 'Gain', 'Loss', 'ATR'][:len(series)]
+        for k, name in enumerate(names):
+            last_smoothed[name] = smoothed[k][:, -1]
+        last_smoothed['Signal'] = macd_signal[:, -1]
+
+    # give 1-D arrays back for 1 stock
+    if np.ndim(prices['Adj Close']) == 1:
+        indicators = {name: values[0] for name, values in indicators.items()}
+        if last_smoothed is not None:
+            for name in last_smoothed:
+                last_smoothed[name] = float(last_smoothed[name][0])
+
+    return indicators
+
+
+def indicator_names():
+    '''
+    Gets the names of the indicators calc_indicators gives, in order.
+    '''
+    names = ['SMA ' + str(n) for n in sma_windows]
+    names += ['BB Mid', 'BB Upper', 'BB Lower', 'EMA ' + str(ema_span),
+              'MACD', 'MACD Signal', 'MACD Hist', 'RSI ' + str(rsi_days),
+              'ATR ' + str(atr_days)]
+    return names
+
+
+def indicator_settings():
+    '''
+    Gets a text of the indicator settings, saved with the indicator store so
+    the store is built again when a setting changes.
+    '''
+    return repr((sma_windows, ema_span, rsi_days, macd_spans, bollinger_days,
+                 bollinger_width, atr_days))
+
+
+def nan_max(a, b):
+    '''
+    Gets the bigger of 2 numbers, ignoring a nan (like np.fmax).
+    '''
+    if math.isnan(a):
+        return b
+    if math.isnan(b):
+        return a
+    return max(a, b)
+
+
+class IndicatorState:
+    '''
+    The running state of calc_indicators for one stock: the last days' Adj
+    Close prices with their running sums, and the smoothed values of the
+    EMAs, the RSI and the ATR. Each new day (bar) updates the state in O(1)
+    steps and gives that day's indicators, the same as calc_indicators on
+    the whole price history would.
+
+    The running sums are worked out again from the kept prices every
+    max(window) days, so rounding errors do not add up.
+    '''
+
+    # smoothed series, in the order they are saved
+    smoothed_names = ['EMA', 'Fast', 'Slow', 'Signal', 'Gain', 'Loss', 'ATR']
+
+    def __init__(self):
+        self.windows = sorted(set(sma_windows + [bollinger_days]))
+        self.size = max(self.windows)
+        fast, slow, signal = macd_spans
+
+        self.alphas = {'EMA': 2 / (ema_span + 1), 'Fast': 2 / (fast + 1),
+                       'Slow': 2 / (slow + 1), 'Signal': 2 / (signal + 1),
+                       'Gain': 1 / rsi_days, 'Loss': 1 / rsi_days,
+                       'ATR': 1 / atr_days}
+
+        # last size days' Adj Close, where day i is at i % size
+        self.buffer = [math.nan] * self.size
+        self.n_bars = 0
+
+        # the Bollinger sums are of the prices minus the 1st day's price
+        self.shift = math.nan
+
+        self.smoothed = dict.fromkeys(self.smoothed_names, math.nan)
+        self.seen = {'Gain': 0, 'Loss': 0, 'ATR': 0}
+        self.pre_adj_close = math.nan
+        self.pre_close = math.nan
+
+        self.resync()
+
+    def resync(self):
+        '''
+        Works out the running sums again from the kept prices.
+        '''
+        self.sums = {}
+        self.missing = {}
+        for window in self.windows:
+            days = [self.buffer[i % self.size]
+                    for i in range(max(0, self.n_bars - window), self.n_bars)]
+            known = [x for x in days if not math.isnan(x)]
+            self.sums[window] = math.fsum(known)
+            self.missing[window] = len(days) - len(known)
+
+        days = [self.buffer[i % self.size]
+                for i in range(max(0, self.n_bars - bollinger_days), self.n_bars)]
+        shifted = [x - self.shift for x in days if not math.isnan(x)]
+        self.shift_sum = math.fsum(shifted)
+        self.square_sum = math.fsum([x * x for x in shifted])
+
+    def smooth(self, name, value):
+        '''
+        Updates one smoothed series with a new value, like smooth().
+        '''
+        if math.isnan(value):
+            return
+        if math.isnan(self.smoothed[name]):
+            self.smoothed[name] = value
+        else:
+            self.smoothed[name] += self.alphas[name] * (value - self.smoothed[name])
+        if name in self.seen:
+            self.seen[name] += 1
+
+    def update(self, adj_close, high = math.nan, low = math.nan, close = math.nan):
+        '''
+        Adds a new day's prices to the state.
+
+        Parameters
+        ----------
+        adj_close, high, low, close(float): the day's prices, nan if missing
+
+        Returns
+        -------
+        Returns a dictionary that maps each indicator name (see
+        indicator_names) to its value on the new day.
+        '''
+        i = self.n_bars
+        if i == 0:
+            self.shift = 0.0 if math.isnan(adj_close) else adj_close
+
+        # add the new price to every window, and take out the price that 
+        # leaves it
+        for window in self.windows:
+            leaving = self.buffer[(i - window) % self.size] if i >= window else 0.0
+            if math.isnan(leaving):
+                self.missing[window] -= 1
+            else:
+                self.sums[window] -= leaving
+
+            if math.isnan(adj_close):
+                self.missing[window] += 1
+            else:
+                self.sums[window] += adj_close
+
+            if window == bollinger_days:
+                if i >= window and not math.isnan(leaving):
+                    self.shift_sum -= leaving - self.shift
+                    self.square_sum -= (leaving - self.shift) ** 2
+                if not math.isnan(adj_close):
+                    self.shift_sum += adj_close - self.shift
+                    self.square_sum += (adj_close - self.shift) ** 2
+
+        self.buffer[i % self.size] = adj_close
+        self.n_bars += 1
+
+        values = {}
+        means = {}
+        for window in self.windows:
+            if self.n_bars >= window and self.missing[window] == 0:
+                means[window] = self.sums[window] / window
+            else:
+                means[window] = math.nan
+        for n in sma_windows:
+            values['SMA ' + str(n)] = means[n]
+
+        mid = means[bollinger_days]
+        if math.isnan(mid):
+            width = math.nan
+        else:
+            shift_mean = self.shift_sum / bollinger_days
+            variance = self.square_sum / bollinger_days - shift_mean * shift_mean
+            width = bollinger_width * math.sqrt(max(variance, 0.0))
+        values['BB Mid'] = mid
+        values['BB Upper'] = mid + width
+        values['BB Lower'] = mid - width
+
+        # exponential moving averages and MACD
+        for name in ['EMA', 'Fast', 'Slow']:
+            self.smooth(name, adj_close)
+        macd = self.smoothed['Fast'] - self.smoothed['Slow']
+        self.smooth('Signal', macd)
+        values['EMA ' + str(ema_span)] = self.smoothed['EMA']
+        values['MACD'] = macd
+        values['MACD Signal'] = self.smoothed['Signal']
+        values['MACD Hist'] = macd - self.smoothed['Signal']
+
+        # RSI, from the day over day gains and losses
+        change = adj_close - self.pre_adj_close
+        self.smooth('Gain', max(change, 0.0) if not math.isnan(change) else math.nan)
+        self.smooth('Loss', max(-change, 0.0) if not math.isnan(change) else math.nan)
+        if self.seen['Gain'] < rsi_days:
+            rsi = math.nan
+        elif self.smoothed['Loss'] == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + self.smoothed['Gain'] / self.smoothed['Loss'])
+        values['RSI ' + str(rsi_days)] = rsi
+
+        # ATR, from the true range
+        true_range = nan_max(high - low, nan_max(abs(high - self.pre_close),
+                                                 abs(low - self.pre_close)))
+        self.smooth('ATR', true_range)
+        values['ATR ' + str(atr_days)] = (self.smoothed['ATR'] 
+                                          if self.seen['ATR'] >= atr_days 
+                                          else math.nan)
+
+        self.pre_adj_close = adj_close
+        self.pre_close = close
+
+        if self.n_bars % self.size == 0:
+            self.resync()
+
+        return values
+
+    def to_arrays(self):
+        '''
+        Gets the state as numpy arrays, to be saved in the indicator store.
+        '''
+        scalars = [self.n_bars, self.shift, self.pre_adj_close, self.pre_close]
+        scalars += [self.smoothed[name] for name in self.smoothed_names]
+        scalars += [self.seen['Gain'], self.seen['Loss'], self.seen['ATR']]
+
+        return {'State': np.array(scalars, dtype = float),
+                'StateBuffer': np.array(self.buffer, dtype = float),
+                'Settings': np.array(indicator_settings())}
+
+    @classmethod
+    def from_history(cls, prices, last_smoothed):
+        '''
+        Makes the state after the last day of a stock's price history, from
+        the prices and the last smoothed values given by calc_indicators,
+        without running the days through the state.
+
+        Parameters
+        ----------
+        prices(dict): 'Adj Close', 'High', 'Low' and 'Close' 1-D arrays
+
+        last_smoothed(dict): the last_smoothed of calc_indicators on the 
+        same prices
+
+        Returns
+        -------
+        Returns the IndicatorState, or None if there are too few known
+        prices for the RSI or the ATR (calc_indicators gives nan for them
+        then, not their smoothed values).
+        '''
+        adj_close = np.asarray(prices['Adj Close'], dtype = float)
+        high = np.asarray(prices['High'], dtype = float)
+        low = np.asarray(prices['Low'], dtype = float)
+        close = np.asarray(prices['Close'], dtype = float)
+        n_bars = len(adj_close)
+        if n_bars == 0:
+            return None
+
+        # number of known day over day changes and true ranges
+        n_changes = int(np.count_nonzero(~np.isnan(np.diff(adj_close))))
+        pre_close = np.concatenate([[np.nan], close[:-1]])
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - pre_close),
+                                                 np.abs(low - pre_close)))
+        n_ranges = int(np.count_nonzero(~np.isnan(true_range)))
+        if n_changes < rsi_days or n_ranges < atr_days:
+            return None
+
+        state = cls()
+        state.n_bars = n_bars
+        state.shift = 0.0 if math.isnan(adj_close[0]) else float(adj_close[0])
+        state.pre_adj_close = float(adj_close[-1])
+        state.pre_close = float(close[-1])
+        for name in cls.smoothed_names:
+            state.smoothed[name] = float(last_smoothed[name])
+        state.seen = {'Gain': n_changes, 'Loss': n_changes, 'ATR': n_ranges}
+
+        for i in range(max(0, n_bars - state.size), n_bars):
+            state.buffer[i % state.size] = float(adj_close[i])
+
+        state.resync()
+        return state
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        '''
+        Makes the state again from the arrays of to_arrays.
+        '''
+        state = cls()
+        scalars = [float(x) for x in arrays['State']]
+
+        state.n_bars = int(scalars[0])
+        state.shift, state.pre_adj_close, state.pre_close = scalars[1:4]
+        for k, name in enumerate(cls.smoothed_names):
+            state.smoothed[name] = scalars[4 + k]
+        n = 4 + len(cls.smoothed_names)
+        state.seen = {'Gain': int(scalars[n]), 'Loss': int(scalars[n + 1]),
+                      'ATR': int(scalars[n + 2])}
+        state.buffer = [float(x) for x in arrays['StateBuffer']]
+
+        state.resync()
+        return state
+
+
+def indicator_store_name(ticker):
+    '''
+    Gets the file name of a stock's indicator store, for example 
+    'AMZN_IndicatorStore.npz' if the ticker is AMZN.
+    '''
+    return ticker + '_IndicatorStore.npz'
+
+
+def load_indicator_store(ticker):
+    '''
+    Loads a stock's indicator store.
+
+    The store is kept next to the price store and has the same days: 'Date',
+    one array per indicator (see indicator_names), and the IndicatorState
+    after the last day ('State', 'StateBuffer' and 'Settings').
+
+    Returns
+    -------
+    Returns a dictionary of numpy arrays, or None if there is no indicator
+    store yet or it was made with other indicator settings.
+    '''
+    f_name = indicator_store_name(ticker)
+
+    if path.exists(f_name) == False:
+        return None
+
+    with np.load(f_name) as data:
+        istore = {col: data[col] for col in data.files}
+
+    if str(istore['Settings']) != indicator_settings():
+        return None
+
+    return istore
+
+
+def save_indicator_store(ticker, istore):
+    '''
+    Saves a stock's indicator store, replacing the old file in one step.
+    '''
+    f_name = indicator_store_name(ticker)
+    f_tmp = f_name[:-len('.npz')] + '_tmp.npz'
+    np.savez(f_tmp, **istore)
+    os.replace(f_tmp, f_name)
+
+
+def run_indicator_state(state, store, lo, hi):
+    '''
+    Runs the price store's days lo to hi - 1 through an indicator state.
+
+    Returns
+    -------
+    Returns a dictionary that maps each indicator name to an array of its 
+    values on those days.
+    '''
+    names = indicator_names()
+    values = {name: np.empty(hi - lo) for name in names}
+
+    columns = [store[col][lo:hi].tolist() for col in ['Adj Close', 'High', 'Low', 'Close']]
+    for k, prices in enumerate(zip(*columns)):
+        day = state.update(*prices)
+        for name in names:
+            values[name][k] = day[name]
+
+    return values
+
+
+def build_indicator_store(ticker, store):
+    '''
+    Works out a stock's indicators for every day of its price store, and 
+    saves them with the indicator state as its indicator store.
+
+    The whole price history is worked out at once with calc_indicators, and
+    the state after the last day is made from it; only the days added later
+    go through the state one day at a time (see update_indicator_store).
+
+    Returns
+    -------
+    Returns the indicator store (see load_indicator_store).
+    '''
+    prices = {col: store[col] for col in ['Adj Close', 'High', 'Low', 'Close']}
+    
+    state = None
+    if len(store['Date']) > 0:
+        last_smoothed = {}
+        istore = calc_indicators(prices, last_smoothed)
+        state = IndicatorState.from_history(prices, last_smoothed)
+    
+    # a short price history is run through the state instead
+    if state is None:
+        state = IndicatorState()
+        istore = run_indicator_state(state, store, 0, len(store['Date']))
+    
+    istore['Date'] = store['Date']
+    istore.update(state.to_arrays())
+
+    save_indicator_store(ticker, istore)
+    return istore
+
+
+def appended_only(old_store, store):
+    '''
+    Checks if a price store only has new days added after the last day of
+    its old version, with every old day unchanged.
+    '''
+    n_old = len(old_store['Date'])
+    if len(store['Date']) < n_old:
+        return False
+
+    return all(np.array_equal(old_store[col], store[col][:n_old], equal_nan = True)
+               for col in ['Date'] + price_columns)
+
+
+def update_indicator_store(ticker, old_store, store):
+    '''
+    Brings a stock's indicator store up to date after its price store has
+    changed. The caller must hold the stock's store lock.
+
+    If only new days were added after the last day, they are run through the
+    saved indicator state one day at a time. After any other change (older 
+    days added, or an old day's prices changed) the indicator store is 
+    removed, and it is built again the next time it is needed.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    old_store(dict): the price store before the change, or None
+
+    store(dict): the price store after the change
+    '''
+    istore = load_indicator_store(ticker)
+    if istore is None:
+        return
+
+    n_old = len(istore['Date'])
+    if (old_store is None or len(old_store['Date']) != n_old or
+            appended_only(old_store, store) == False):
+        os.remove(indicator_store_name(ticker))
+        return
+
+    n_new = len(store['Date'])
+    if n_new == n_old:
+        return
+
+    state = IndicatorState.from_arrays(istore)
+    new_values = run_indicator_state(state, store, n_old, n_new)
+
+    for name, values in new_values.items():
+        istore[name] = np.concatenate([istore[name], values])
+    istore['Date'] = store['Date']
+    istore.update(state.to_arrays())
+
+    save_indicator_store(ticker, istore)
+
+
+def indicator_store(ticker, store):
+    '''
+    Gets a stock's indicator store for its current price store, building it
+    first if it is missing or out of date.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+
+    store(dict): the stock's price store
+
+    Returns
+    -------
+    Returns the indicator store (see load_indicator_store).
+    '''
+    with store_lock(ticker):
+        istore = load_indicator_store(ticker)
+        if istore is None or not np.array_equal(istore['Date'], store['Date']):
+            istore = build_indicator_store(ticker, store)
+
+    return istore
+
+
+def add_indicators(ticker, start_date, end_date):
+    '''
+    Gets a stock's prices between a start and end date with the technical
+    indicators of calc_indicators added. The result is kept for the session,
+    until the stock's price store changes.
+    
+    The indicators are taken from the stock's indicator store, which has
+    them for every day in the price store and is updated one day at a time
+    as new days are added. So they are worked out over all the price history
+    in the store, not only from the start date.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    start_date(string): a string that means the start date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    end_date(string): a string that means the end date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    Returns
+    -------
+    Returns a DataFrame indexed by date (pandas dates) with the 6
+    price_columns and one column per indicator.
+    
+    Reurns -1, if there is no price data between the given start and end dates.
+    '''
+    params = (start_date, end_date)
+    df_price = dc.get(ticker, 'indicators', params)
+    if df_price is not None:
+        return df_price
+    
+    df_price = read_price(ticker, start_date, end_date)
+    if type(df_price) != pd.DataFrame:
+        return -1
+    
+    df_price.index = pd.DatetimeIndex(pd.to_datetime(df_price.pop('Date')), 
+                                      name = 'Date')
+    
+    # take the date range's rows of the indicator store
+    store = load_price_store(ticker)
+    istore = indicator_store(ticker, store)
+    lo, hi = store_rows(store, start_date, end_date)
+    for name in indicator_names():
+        df_price[name] = istore[name][lo:hi]
+    
+    dc.put(ticker, 'indicators', params, df_price, depends = ['price'])
+    
+    return df_price
+
+
+def panel_indicators(tickers, start_date, end_date):
+    '''
+    Calculates the technical indicators for many stocks at once, on the days
+    every stock has prices for.
+    
+    Parameters
+    ----------
+    tickers(list): ticker symbols
+    
+    start_date(string): the start date, with format like yyyy-mm-dd
+    
+    end_date(string): the end date, with format like yyyy-mm-dd
+    
+    Returns
+    -------
+    Returns a dictionary that maps each indicator name (see calc_indicators)
+    to a DataFrame indexed by date with one column per ticker.
+    '''
+    # the first load downloads anything missing; the others read the stores
+    panels = {'Adj Close': load_prices(tickers, start_date, end_date)}
+    for col in ['High', 'Low', 'Close']:
+        panels[col] = load_prices(tickers, start_date, end_date, column = col)
+    
+    index = panels['Adj Close'].index
+    columns = panels['Adj Close'].columns
+    prices = {col: panel.loc[index, columns].to_numpy(dtype = float).T
+              for col, panel in panels.items()}
+    
+    return {name: pd.DataFrame(values.T, index = index, columns = columns)
+            for name, values in calc_indicators(prices).items()}
+
+ 
+def plot_price_volm(ticker, start_date, end_date, out_file = None):
+    '''
+    Plots a stock's Adj Close Price and Trading Volume movement as 2 subplots 
+    in one big plot.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    start_date(string): a string that means the start date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    end_date(string): a string that means the end date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
+    
+    Returns
+    -------
+    Reurns -1, if there is no price data between the given start and end dates.
+    '''
+    
+    # load price data from the stock's price store
+    # if there is no price data between the given start and end dates,
+    # returns -1
+    df_price = read_price(ticker, start_date, end_date)
+    if type(df_price) != pd.DataFrame:
+        return -1
+    
+    if len(df_price) <= 3:
+        print (stylize('\n    There is no data to display. Try again.',
+                           invalid_style))
+        return False
+    
+    # convert date from string to date type
+    df_price['Date'] = pd.to_datetime(df_price['Date'])
+    
+    # create 2 subplots
+    with pr.chart_figure('price_volm', out_file, 'ggplot') as fig:
+        grid = fig.add_gridspec(4, 4)
+        plt1 = fig.add_subplot(grid[0:3, 0:4])
+        plt2 = fig.add_subplot(grid[3, 0:4], sharex = plt1)
+        
+        # for long price histories, draw only the lowest and highest price
+        # and volume of every pixel column
+        df_plot = df_price
+        if pr.decimate_lines == True:
+            df_plot = df_price.iloc[pr.decimate(df_price[['Adj Close', 'Volume']].values,
+                                                pr.pixel_width(fig))]
+    
+        plt1.plot(df_plot['Date'], df_plot["Adj Close"], color='royalblue') 
+        plt2.fill_between(df_plot['Date'], df_plot['Volume'].values, 0, color='royalblue')
+    
+        plt1.axes.get_xaxis().set_visible(False) #hide top graph's x-axis
+        plt2.set_xlim(min(df_price['Date']), max(df_price['Date'])) #set x-axis limit
+    
+        #set labels
+        plt1.set_title(ticker + ' - closing price and trading volume').set_size(10)
+        plt1.set_ylabel('Adj Closing Price').set_size(10)
+        plt2.set_ylabel('Volume').set_size(10)
+        plt2.set_xlabel('Date').set_size(10)
+        plt1.tick_params(axis = "x", labelsize = 8 , rotation = 0)
+        plt1.tick_params(axis = "y", labelsize = 8 )
+        plt2.tick_params(axis = "x", labelsize = 8 , rotation = 0)
+        plt2.tick_params(axis = "y", labelsize = 8 )
+        plt2.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+    
+        #set space
+        fig.tight_layout(pad=0.2, w_pad=0.5, h_pad=0.1)
+
+
+def plot_sma(ticker, start_date, end_date, out_file = None):
+    '''
+    Plots a stock's price simple moving averages(SMA) during a given start
+    and end dates.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    start_date(string): a string that means the start date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    end_date(string): a string that means the end date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
+    
+    Returns
+    -------
+    Reurns -1, if there is no price data between the given start and end dates.
+    '''
+    
+    # load price data from the stock's price store
+    # if there is no price data between the given start and end dates,
+    # returns -1
+    df_price = add_indicators(ticker, start_date, end_date)
+    if type(df_price) != pd.DataFrame:
+        return -1
+    
+    if len(df_price) <= 3:
+        print (stylize('\n    There is no data to display. Try again.',
+                           invalid_style))
+        return False
     
     
+    # pick the simple moving averages (10, 20 and 50 days by default) from
+    # the indicators already calculated for this date range
+    df_MA = df_price[['Adj Close'] + ['SMA ' + str(n) for n in sma_windows]]
     
+    # plot
+    with pr.chart_figure('sma', out_file, 'ggplot') as fig:
+        ax = fig.add_subplot(111)
+        df_MA.plot(ax = ax, legend = True, 
+                   color = dict(zip(df_MA.columns, ['brown', 'seagreen', 
+                                                    'mediumblue', 'darkorange'])))
+    
+        #format labels and ticks
+        ax.set_title(ticker + " - simple moving average over time").set_size(10)
+        ax.set_ylabel('Price').set_size(10)
+        ax.set_xlabel('Date').set_size(10)
+        ax.tick_params(axis = "x", labelsize = 8 , rotation = 0)
+        ax.tick_params(axis = "y", labelsize = 8 )
+        ax.legend(loc =2, prop={"size":8})
+        fig.tight_layout()
+
+
+
+def plot_multi_price(ticker_list, start_date, end_date, out_file = None):
+    '''
+    Plots several stocks' price movement during a period
     
+    Parameters
+    ----------
+    ticker_list(list): a list of tickers (any number of them)
+    
+    start_date(string): a string that means the start date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    end_date(string): a string that means the end date for a stock's 
+    price inquiry, with format like yyyy-mm-dd
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
+    
+    Returns
+    -------
+    Reurns -1, if there is no price data between the given start and end dates.
+    '''
+    
+    # load all tickers' 'Adj Close' prices at once, lined up by date
+    pd_merge_price = load_prices(ticker_list, start_date, end_date)
+    
+    # if there is no price data between the given start and end dates for
+    # any ticker, returns -1 and stop
+    if len(pd_merge_price.columns) < len(set(ticker_list)):
+        print (stylize('\n    There is no data between these 2 dates. Try again.',
+                       invalid_style))
+        return -1
+    
+    if len(pd_merge_price) <= 3:
+        print (stylize('\n    There is no data to display. Try again.',
+                       invalid_style))
+        return False
     
     # plot price movements for all tickers 
-    mpl.rcParams.update(mpl.rcParamsDefault) #set plot format back to default 
-    style.use("ggplot")
-    
-    ax = pd_merge_price.plot(figsize=(6, 3), legend = True)
-    
-    #format labels and ticks
-    ax.set_xlim(min(pd_merge_price.index), max(pd_merge_price.index))
-    ax.set_title('Adj Close Price Movement Comparison').set_size(10)
-    ax.set_ylabel('Adj Close Price').set_size(10)
-    ax.set_xlabel('Date').set_size(10)
-    ax.tick_params(axis = "x", labelsize = 8 )
-    ax.tick_params(axis = "y", labelsize = 8 )
-    plt.legend(loc = 2, prop={"size":8})
-    plt.tight_layout()
-    plt.show()
+    with pr.chart_figure('multi_price', out_file, 'ggplot') as fig:
+        ax = fig.add_subplot(111)
+        
+        # for long price histories, draw only the days that are the lowest
+        # or highest price of a stock in a pixel column
+        df_plot = pd_merge_price
+        if pr.decimate_lines == True:
+            df_plot = pd_merge_price.iloc[pr.decimate(pd_merge_price.values,
+                                                      pr.pixel_width(fig))]
+        df_plot.plot(ax = ax, legend = True)
+    
+        #format labels and ticks
+        ax.set_xlim(min(pd_merge_price.index), max(pd_merge_price.index))
+        ax.set_title('Adj Close Price Movement Comparison').set_size(10)
+        ax.set_ylabel('Adj Close Price').set_size(10)
+        ax.set_xlabel('Date').set_size(10)
+        ax.tick_params(axis = "x", labelsize = 8 )
+        ax.tick_params(axis = "y", labelsize = 8 )
+        ax.legend(loc = 2, prop={"size":8})
+        fig.tight_layout()
         
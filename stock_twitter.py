@@ -1,18 +1,37 @@
 #=========== pakages/modules that are used here ==============================
 import re
-import tweepy as tw
+import os
+import time
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
 import pandas as pd
 from datetime import datetime, timedelta
 from os import path 
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-import matplotlib.dates as mdates
-import statsmodels.api as sm
 
 import stock_price as sp
 import sentiment_analysis as sa
+import data_cache as dc
+import plot_render as pr
+import sa_model as smod
+import web_session as ws
+from lazy_import import lazy_import
+
+# tweepy and matplotlib are only imported when they are first used
+tw = lazy_import('tweepy')
+mdates = lazy_import('matplotlib.dates')
 
 #================ code =======================================================
+# the 5 cleaning steps of a tweet merged into 3 precompiled patterns. Each
+# pattern has to run after the one before it: removing a '#' or an @mention 
+# can make a new 'RT :', and removing a line break can join a hyperlink back
+# together, so the 3 patterns cannot be merged into one.
+mention_hash_re = re.compile(r'@[A-Za-z0-9]+|#')  # remove @mentions and '#'
+retweet_line_re = re.compile(r'RT [@:]|\n')  # remove RT and empty lines
+link_re = re.compile(r'https?://[A-Za-z0-9./]+')  # remove hyperlink
+clean_patterns = [mention_hash_re, retweet_line_re, link_re]
+
+
 def clean_tweet_text(tweet): 
     '''
     Cleans a tweet text by removing @mentions, hashtags, replies, any empty
@@ -26,37 +45,126 @@ def clean_tweet_text(tweet):
     -------
     Returns a cleaned tweet text.
     '''
-    tweet = re.sub(r'@[A-Za-z0-9]+','', tweet)  # remove @mentions
-    tweet = re.sub(r'#', '', tweet)  # Remove '#' hash tag
-    tweet = re.sub(r'RT [@:]', '', tweet) # remove RT
-    tweet = re.sub(r'\n', '', tweet) # remove an empty line
-    tweet = re.sub('https?://[A-Za-z0-9./]+','', tweet)  # remove hyperlink
+    for pattern in clean_patterns:
+        tweet = pattern.sub('', tweet)
     
     return tweet
-    
 
-def collect_tweet(ticker):
+
+def clean_many(tweets):
     '''
-    Import tweets about a stock over past 8 days, up to 200 tweets per day.
-    Save the cleaned the tweets as a csv file.
+    Cleans a whole column of tweet texts at once, the same way as 
+    clean_tweet_text.
     
     Parameters
     ----------
-    ticker(string): a ticker symbol
+    tweets(Series): twitter tweets
         
     Returns
     -------
-    Returns twitter output's csv file name.
+    Returns a Series of cleaned tweet texts, with the same index.
     '''
-    # output file name
-    date_today = datetime.today()
-    today_str = date_today.strftime("%Y%m%d")
-    fout = ticker + '_Tweets_' + today_str + '.csv'
+    # pattern strings (not compiled patterns) let pandas use its fastest 
+    # string engine, such as pyarrow when it is installed
+    for pattern in clean_patterns:
+        tweets = tweets.str.replace(pattern.pattern, '', regex = True)
     
-    # if output file already exists, stop and return the filename
-    if path.exists(fout) == True:
-        return fout
+    return tweets
+    
+
+class TokenBucket:
+    '''
+    A token bucket that limits how many requests are made in a time period,
+    shared by all the threads that make them.
+    
+    The bucket holds up to 'rate' tokens and is refilled at 'rate' tokens 
+    per 'period' seconds. Every request takes a token first, and waits if
+    the bucket is empty.
+    '''
+    
+    def __init__(self, rate, period):
+        '''
+        Parameters
+        ----------
+        rate(int): max number of requests in a period
+        
+        period(float): the period in seconds
+        '''
+        self.capacity = rate
+        self.fill_rate = rate / period
+        self._tokens = float(rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def take(self, n = 1, stop = None):
+        '''
+        Takes n tokens from the bucket, waiting until there are enough.
+        
+        Parameters
+        ----------
+        n(int): number of tokens (requests)
+        
+        stop(Event): optional threading.Event; once it is set, the wait ends
+        and CancelledError is raised without taking any tokens
+        '''
+        while True:
+            if stop is not None and stop.is_set():
+                raise CancelledError('waiting for the rate limit was stopped')
+            
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, 
+                                   self._tokens + (now - self._last) * self.fill_rate)
+                self._last = now
+                
+                if self._tokens >= n:
+                    self._tokens -= n
+                    return
+                
+                wait = (n - self._tokens) / self.fill_rate
+            
+            if stop is None:
+                time.sleep(wait)
+            else:
+                stop.wait(wait)
+
+
+# settings for collecting tweets:
+#   tweet_days - number of past days to collect tweets for, one search 
+#   window per day
+#   tweets_per_day - max number of tweets collected per day
+#   tweets_per_page - number of tweets asked for in one search request (100
+#   at most)
+#   search_workers - max number of day windows searched at the same time
+tweet_days = 8
+tweets_per_day = 200
+tweets_per_page = 100
+search_workers = 4
+
+# number of tweets cleaned, scored and saved at a time while collecting, and
+# number of rows scored at a time by calc_twitter_sa
+tweet_chunk_size = 100
+score_chunk_size = 5000
+
+# sentiment score columns added to every tweet
+sa_columns = ['Compound', 'Negative', 'Neutral', 'Positive']
+
+# x variables of the tweet sentiment model on the adj close price
+tweet_x_columns = ['Open', 'Compound']
+
+# Twitter's standard search allows 180 requests every 15 minutes. All day
+# windows and tickers take their requests from this one bucket.
+search_bucket = TokenBucket(180, 15 * 60)
+
+
+def get_twitter_api():
+    '''
+    Sets up the Twitter API with the project's API keys.
     
+    Returns
+    -------
+    Returns a tweepy API object.
+    '''
     # add your Tweeter API key info 
     consumerKey=''
     consumerSecret = ''
@@ -66,53 +174,334 @@ def collect_tweet(ticker):
     # set up the authentication object
     auth = tw.OAuthHandler(consumerKey, consumerSecret)
     auth.set_access_token(accessToken, accessTokenSecret)
-    api = tw.API(auth, wait_on_rate_limit = True)
+    return tw.API(auth, wait_on_rate_limit = True)
+
+
+def day_windows():
+    '''
+    Gets the day windows to search tweets in, for the past tweet_days days.
     
-    # Collect tweets with keyword, English language for the past 8 days
-    search_word = ticker + " " + sp.get_co_short_name(ticker)  #keywords
-    tweets_list = []
+    Returns
+    -------
+    Returns a list of (since, until) date strings like yyyy-mm-dd, newest 
+    day first.
+    '''
+    windows = []
     
-    # search up to 200 tweets per day, for past 8 days
-    for i in range(0, 8):
+    for i in range(0, tweet_days):
         date_until = datetime.today() - timedelta(days= i)
         date_until_str = date_until.strftime("%Y-%m-%d")  #end date for search
         
         date_since = date_until - timedelta(days= 1)
         date_since_str = date_since.strftime("%Y-%m-%d") #start date for search
         
-        # collect tweets up to 200 tweets per day
-        tweets = tw.Cursor(api.search,
-                            q = search_word,
-                            lang = "en",
-                            since = date_since_str,
-                            until = date_until_str,
-                            result_type = "mixed",
-                            tweet_mode = 'extended').items(200)
-   
-        for tweet in tweets:
-            #tweet date
-            tweet_date = tweet.created_at.strftime("%Y-%m-%d")
-            
-            #get full text
-            if tweet.truncated == True:
-                full_tweet_text = tweet.retweeted_status.full_text
-            else:
-                full_tweet_text = tweet.full_text
-            
-            #clean text
-            clean_text = clean_tweet_text(full_tweet_text)
-            tweets_list.append([tweet_date, clean_text])
+        windows.append((date_since_str, date_until_str))
+    
+    return windows
+
+
+def search_window(api, search_word, date_since_str, date_until_str, 
+                  limit = None, bucket = None, stop = None):
+    '''
+    Searches tweets with keywords, English language, in one day window, one
+    page of results at a time. Every page request takes a token from the
+    rate limit bucket first.
+    
+    Parameters
+    ----------
+    api(object): the Twitter API (see get_twitter_api), or any object with
+    the same 'search' method
+    
+    search_word(string): the search keywords
+    
+    date_since_str(string): start date for the search, like yyyy-mm-dd
+    
+    date_until_str(string): end date for the search, like yyyy-mm-dd
+    
+    limit(int): max number of tweets, None means tweets_per_day
+    
+    bucket(TokenBucket): the rate limit bucket, None means search_bucket
+    
+    stop(Event): optional threading.Event; once it is set, waiting for the
+    rate limit stops and raises CancelledError
+    
+    Returns
+    -------
+    Returns a generator of tweets (tweepy Status objects), newest first.
+    '''
+    if limit is None:
+        limit = tweets_per_day
+    if bucket is None:
+        bucket = search_bucket
+    
+    count = 0
+    max_id = None
+    
+    while count < limit:
+        params = {'q': search_word,
+                  'lang': "en",
+                  'since': date_since_str,
+                  'until': date_until_str,
+                  'result_type': "mixed",
+                  'tweet_mode': 'extended',
+                  'count': min(tweets_per_page, limit - count)}
+        
+        # ask for the tweets older than the last page
+        if max_id is not None:
+            params['max_id'] = max_id
+        
+        bucket.take(stop = stop)
+        page = api.search(**params)
+        if len(page) == 0:
+            return
+        
+        for tweet in page:
+            yield tweet
+            count += 1
+            if count == limit:
+                return
+        
+        max_id = page[-1].id - 1
+
+
+def tweet_row(tweet):
+    '''
+    Gets a tweet's date and full text.
+    
+    Parameters
+    ----------
+    tweet(object): a tweepy Status object
+    
+    Returns
+    -------
+    Returns a list [date string like yyyy-mm-dd, full tweet text].
+    '''
+    #tweet date
+    tweet_date = tweet.created_at.strftime("%Y-%m-%d")
+    
+    #get full text
+    if tweet.truncated == True:
+        full_tweet_text = tweet.retweeted_status.full_text
+    else:
+        full_tweet_text = tweet.full_text
+    
+    return [tweet_date, full_tweet_text]
+
+
+def row_chunks(rows, chunk_size = None):
+    '''
+    Groups tweet rows into DataFrames of up to chunk_size rows, as the rows 
+    come in.
+    
+    Parameters
+    ----------
+    rows(iterable): [date, tweet text] lists, such as the ones from tweet_row
+    
+    chunk_size(int): max number of rows per DataFrame, None means 
+    tweet_chunk_size
+    
+    Returns
+    -------
+    Returns a generator of DataFrames with a 'Date' and a 'Tweet Text' 
+    column.
+    '''
+    if chunk_size is None:
+        chunk_size = tweet_chunk_size
+    
+    tweets_list = []
+    for row in rows:
+        tweets_list.append(row)
+        if len(tweets_list) == chunk_size:
+            yield pd.DataFrame(tweets_list,  columns = ['Date','Tweet Text'])
+            tweets_list = []
+    
+    if len(tweets_list) > 0:
+        yield pd.DataFrame(tweets_list,  columns = ['Date','Tweet Text'])
+
+
+def clean_chunks(chunks):
+    '''
+    Cleans the tweet texts of each DataFrame, as the DataFrames come in.
+    
+    Parameters
+    ----------
+    chunks(iterable): DataFrames with a 'Tweet Text' column
+    
+    Returns
+    -------
+    Returns a generator of the same DataFrames with cleaned texts.
+    '''
+    for df in chunks:
+        df['Tweet Text'] = clean_many(df['Tweet Text'])
+        yield df
+
+
+def score_chunks(chunks):
+    '''
+    Adds the sentiment scores (compound, negative, neutral, positive) of the
+    tweet texts to each DataFrame, as the DataFrames come in.
+    
+    Parameters
+    ----------
+    chunks(iterable): DataFrames with a 'Tweet Text' column
+    
+    Returns
+    -------
+    Returns a generator of the same DataFrames with the 4 sa_columns added.
+    '''
+    for df in chunks:
+        df[sa_columns] = sa.score_frame(df['Tweet Text'].fillna(''), sa_columns)
+        yield df
+
+
+def tweet_part_name(fout, window_num):
+    '''
+    Gets the file name of one day window's part of a tweet file.
+    
+    Parameters
+    ----------
+    fout(string): the tweet csv file name
     
-    # save in a panda Dataframe
-    df = pd.DataFrame(tweets_list,  columns = ['Date','Tweet Text']) 
+    window_num(int): the day window number, 0 for the newest day
     
-    # save in csv
-    df.to_csv(fout, index = False, encoding='utf-8-sig')
+    Returns
+    -------
+    Returns the part file name, for example 'AMZN_Tweets_20201208_part3.csv'.
+    '''
+    return fout[:-len('.csv')] + '_part' + str(window_num) + '.csv'
+
+
+def collect_window(api, search_word, fout, window_num, window, bucket = None,
+                   stop = None):
+    '''
+    Collects, cleans and scores the tweets of one day window, and saves them
+    in the window's part file as they come in. A window whose part file is 
+    already there (from a run that was stopped) is not searched again.
+    
+    Parameters
+    ----------
+    api(object): the Twitter API (see get_twitter_api)
+    
+    search_word(string): the search keywords
+    
+    fout(string): the tweet csv file name
+    
+    window_num(int): the day window number, 0 for the newest day
+    
+    window(tuple): the window's (since, until) date strings
+    
+    bucket(TokenBucket): the rate limit bucket, None means search_bucket
+    
+    stop(Event): optional threading.Event; once it is set, the window stops
+    before its next chunk of tweets (or while it waits for the rate limit)
+    and raises CancelledError, without saving its part file
+    
+    Returns
+    -------
+    Returns the part file name.
+    '''
+    f_part = tweet_part_name(fout, window_num)
+    if path.exists(f_part) == True:
+        return f_part
+    
+    ws.check_stop(search_word, stop)
+    
+    # tweets go through the pipeline one chunk at a time: search, clean,
+    # score, and append to the window's unfinished part file
+    date_since_str, date_until_str = window
+    tweets = search_window(api, search_word, date_since_str, date_until_str, 
+                           bucket = bucket, stop = stop)
+    chunks = score_chunks(clean_chunks(row_chunks(tweet_row(tweet) 
+                                                  for tweet in tweets)))
+    
+    f_tmp = f_part + '.tmp'
+    with open(f_tmp, 'w', encoding = 'utf-8', newline = '') as f:
+        f.write(','.join(['Date','Tweet Text'] + sa_columns) + os.linesep)
+        for df in chunks:
+            df.to_csv(f, header = False, index = False)
+            ws.check_stop(search_word, stop)
+    
+    # checkpoint: the part file only shows up once the whole window is saved
+    os.replace(f_tmp, f_part)
+    
+    return f_part
+
+
+def collect_tweet(ticker, api = None, workers = None, bucket = None, stop = None):
+    '''
+    Import tweets about a stock over past 8 days, up to 200 tweets per day.
+    Save the cleaned the tweets and their sentiment scores as a csv file.
+    
+    The day windows are searched at the same time, sharing one rate limit
+    bucket. Each finished window is saved in a part file first, so if the
+    collection is stopped, running it again on the same day only searches
+    the windows that are not finished.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    api(object): the Twitter API, None means get_twitter_api()
+    
+    workers(int): max number of day windows searched at the same time, None
+    means search_workers
+    
+    bucket(TokenBucket): the rate limit bucket, None means search_bucket
+    
+    stop(Event): optional threading.Event; once it is set, the collection
+    stops and raises CancelledError. The finished windows are kept for the
+    next run.
+        
+    Returns
+    -------
+    Returns twitter output's csv file name.
+    '''
+    # output file name
+    date_today = datetime.today()
+    today_str = date_today.strftime("%Y%m%d")
+    fout = ticker + '_Tweets_' + today_str + '.csv'
+    
+    # if output file already exists, stop and return the filename
+    if path.exists(fout) == True:
+        return fout
+    
+    if api is None:
+        api = get_twitter_api()
+    if workers is None:
+        workers = search_workers
+    
+    # Collect tweets with keyword, English language for the past 8 days
+    search_word = ticker + " " + sp.get_co_short_name(ticker)  #keywords
+    windows = day_windows()
+    
+    # search all day windows, up to 'workers' windows at a time
+    with ThreadPoolExecutor(max_workers = max(1, workers)) as executor:
+        part_files = list(executor.map(
+            lambda i: collect_window(api, search_word, fout, i, windows[i], bucket,
+                                   stop),
+            range(len(windows))))
+    
+    # join the part files in day order, newest first, a block of text at a
+    # time, keeping only the 1st part's header line
+    f_tmp = fout + '.tmp'
+    with open(f_tmp, 'w', encoding = 'utf-8-sig', newline = '') as f:
+        for i in range(len(part_files)):
+            with open(part_files[i], 'r', encoding = 'utf-8', newline = '') as f_part:
+                header = f_part.readline()
+                if i == 0:
+                    f.write(header)
+                shutil.copyfileobj(f_part, f)
+    
+    os.replace(f_tmp, fout)
+    dc.invalidate(ticker, 'tweets')
+    
+    for f_part in part_files:
+        os.remove(f_part)
     
     return fout
 
 
-def calc_twitter_sa(ticker):
+def calc_twitter_sa(ticker, stop = None):
     '''
     Calculates sentiment score for all stock tweets, and add the scores(positive, 
     negative, neutral, compound) as 4 new columns to the original csv file
@@ -120,6 +509,9 @@ def calc_twitter_sa(ticker):
     Parameters
     ----------
     ticker(string): a ticker symbol
+    
+    stop(Event): optional threading.Event that stops the tweet collection
+    (see collect_tweet)
         
     Returns
     -------
@@ -133,43 +525,87 @@ def calc_twitter_sa(ticker):
     
     # if twitter file N/A, collect tweets first.
     if path.exists(fint) == False:
-        collect_tweet(ticker)
-    
-    #load tweet data
-    df = pd.read_csv(fint)
+        collect_tweet(ticker, stop = stop)
     
     # if a column called 'Compound' already exists in the file, return the file
     # name and stop.
     # because it means sentiment scores have been added.
-    if 'Compound' in df.columns:
+    columns = pd.read_csv(fint, nrows = 0).columns.tolist()
+    if 'Compound' in columns:
         return fint
     
-    # Get the sentiment scores for each trading day
-    compound = []   # compound score
-    neg = []        # negative score
-    neu = []        # neutral score
-    pos = []        # positive score
-    
-    # calculate compound, negative, neutral, positive for each day by loop
-    for i in range(0, len(df['Tweet Text'])):
-        SIA = sa.getSIA(df['Tweet Text'][i])
-        compound.append(SIA['compound'])
-        neg.append(SIA['neg'])
-        neu.append(SIA['neu'])
-        pos.append(SIA['pos'])
-          
-    #store the sentiment scores in the data frame
-    df['Compound'] = compound
-    df['Negative'] = neg
-    df['Neutral'] = neu
-    df['Positive'] = pos
-    
-    #save in csv
-    df.to_csv(fint, index = False, encoding='utf-8-sig')
+    # calculate compound, negative, neutral, positive for the tweets one
+    # chunk at a time, and save each scored chunk in a new file 
+    f_tmp = fint + '.tmp'
+    with open(f_tmp, 'w', encoding = 'utf-8-sig', newline = '') as f:
+        f.write(','.join(columns + sa_columns) + os.linesep)
+        for df in score_chunks(pd.read_csv(fint, chunksize = score_chunk_size)):
+            df.to_csv(f, header = False, index = False)
+    
+    os.replace(f_tmp, fint)
+    dc.invalidate(ticker, 'tweets')
     
     return fint
 
 
+def load_tweet_sa(ticker, stop = None):
+    '''
+    Loads a stock's tweets over the past 8 days with their sentiment scores,
+    collecting and scoring them first if that has not been done today.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+    
+    stop(Event): optional threading.Event that stops the tweet collection
+    (see collect_tweet)
+        
+    Returns
+    -------
+    Returns a DataFrame with 'Date', 'Tweet Text' and the 4 sa_columns.
+    '''
+    today_str = datetime.today().strftime("%Y%m%d")
+    
+    # use the tweets already loaded in this session, if they are there
+    df = dc.get(ticker, 'tweets', (today_str,))
+    if df is not None:
+        return df
+    
+    # collect tweets and calculate sentiment scores if it is not done yet
+    fint = calc_twitter_sa(ticker, stop)
+    
+    df = pd.read_csv(fint)
+    dc.put(ticker, 'tweets', (today_str,), df)
+    
+    return df
+
+
+def daily_tweet_sa(ticker):
+    '''
+    Gets the average sentiment scores of a stock's tweets by date.
+    
+    Parameters
+    ----------
+    ticker(string): a ticker symbol
+        
+    Returns
+    -------
+    Returns a DataFrame indexed by date (yyyy-mm-dd text strings), with the 
+    average of each of the 4 sa_columns.
+    '''
+    today_str = datetime.today().strftime("%Y%m%d")
+    
+    # use the averages already worked out in this session, if they are there
+    df_daily = dc.get(ticker, 'tweets_daily', (today_str,))
+    if df_daily is not None:
+        return df_daily
+    
+    df_daily = load_tweet_sa(ticker).groupby(['Date'])[sa_columns].mean()
+    dc.put(ticker, 'tweets_daily', (today_str,), df_daily, depends = ['tweets'])
+    
+    return df_daily
+
+
 
 def merge_twitter_price(ticker):
     '''
@@ -189,48 +625,40 @@ def merge_twitter_price(ticker):
     today_str = date_today.strftime("%Y-%m-%d")     #today's date
     from_date_str = from_date.strftime("%Y-%m-%d")  #date that is 8 days ago
 
-    #tweet file name
-    fint_1 = ticker + '_Tweets_' + today_str.replace('-','') + '.csv'
+    # use the merged data already made in this session, if it is there
+    params = (today_str,)
+    df_twitter_price = dc.get(ticker, 'tweets_price', params)
+    if df_twitter_price is not None:
+        return df_twitter_price
     
-    #stock price file name, where from_date is 8 days ago, and to_date is today.
-    fint_2 = ticker + '_HisPrice_' + from_date_str.replace('-','') +\
-                         '_' + today_str.replace('-','') + '.csv' 
-                         
     print("\n    loading tweets about " + ticker +" ... (this can take a while)")
-    #collect tweets and calculate sentiment scores if tweet file N/A
-    if path.exists(fint_1) == False:
-        calc_twitter_sa(ticker)   
+    # get average Compound score by date (tweets are collected and scored
+    # first if that has not been done today)
+    df_twitter_new = daily_tweet_sa(ticker)[['Compound']]
     
-    #get stock price if price file N/A
-    if path.exists(fint_2) == False:
-        sp.load_stock_price(ticker, from_date_str, today_str)
-        
-    #add price movement direction and change in % for the price file
-    sp.add_price_move(ticker, from_date_str,today_str)
-        
-    #load twitter data
-    df_twitter = pd.read_csv(fint_1, index_col = 0)
-    # get average Compound score by date and save it as a new DataFrame
-    df_twitter_new = df_twitter.groupby(['Date']).agg({'Compound':'mean',
-                                                       })    
-    
-    #load price data
-    df_price = pd.read_csv(fint_2, index_col = 0)
+    #load price data from the price store, where from_date is 8 days ago, and
+    #to_date is today, with price movement direction and change in % added
+    df_price = sp.add_price_move(ticker, from_date_str, today_str)
     
     # inner join by date
     df_twitter_price= df_price.merge(df_twitter_new, how = 'inner', on ='Date', 
                                      left_index = True)
+    dc.put(ticker, 'tweets_price', params, df_twitter_price, 
+           depends = ['tweets', 'price'])
     
     return df_twitter_price
 
 
-def plot_twitter_sa_price(ticker):
+def plot_twitter_sa_price(ticker, out_file = None):
     '''
     Plots tweet sentiment score vs stock price movement over the past 8 days
     
     Parameters
     ----------
     ticker(string): a ticker symbol
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     
     # gets the merged data about tweet sentiment and price over the past 8 days
@@ -240,42 +668,41 @@ def plot_twitter_sa_price(ticker):
     df.index = pd.to_datetime(df.index)
 
     # create graph
-    mpl.rcParams.update(mpl.rcParamsDefault)
-    fig, ax = plt.subplots(figsize=(6, 3))
+    with pr.chart_figure('twitter_sa_price', out_file) as fig:
+        ax = fig.add_subplot(111)
     
-    # plot price change percentage over time
-    ax.set_xlabel('Date').set_size(10)
-    ax.set_ylabel('Closing Price', color = 'brown')
+        # plot price change percentage over time
+        ax.set_xlabel('Date').set_size(10)
+        ax.set_ylabel('Closing Price', color = 'brown')
     
-    # bar chart for price change in %
-    ax.bar(df.index, df['PriceChg'], color = 'lightsalmon', label='Price Change %' )
+        # bar chart for price change in %
+        ax.bar(df.index, df['PriceChg'], color = 'lightsalmon', label='Price Change %' )
   
-    # plot polarity score percentage over time on a secondary y-axis
-    ax2 = ax.twinx()
-    ax2.plot(df.index, df['Compound'], color = 'royalblue',label='Compound Score')
-    ax2.set_ylabel('Compound Score', color ='royalblue')  
+        # plot polarity score percentage over time on a secondary y-axis
+        ax2 = ax.twinx()
+        ax2.plot(df.index, df['Compound'], color = 'royalblue',label='Compound Score')
+        ax2.set_ylabel('Compound Score', color ='royalblue')  
     
-    # set axis limit and format labels/ticks
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%b-%d'))
-    ax.set_title(ticker.upper() +" - price change% vs tweets' sentiment").set_size(10)
-    ax.tick_params(axis= "x", labelsize = 8)
-    ax.tick_params(axis= "y", labelsize = 8)
-    ax2.tick_params(axis= "y", labelsize = 8)
+        # set axis limit and format labels/ticks
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b-%d'))
+        ax.set_title(ticker.upper() +" - price change% vs tweets' sentiment").set_size(10)
+        ax.tick_params(axis= "x", labelsize = 8)
+        ax.tick_params(axis= "y", labelsize = 8)
+        ax2.tick_params(axis= "y", labelsize = 8)
     
-    # display one single legend when there is multiple y-axis
-    handles,labels = [],[]
-    for ax in fig.axes:
-        for h,l in zip(*ax.get_legend_handles_labels()):
-            handles.append(h)
-            labels.append(l)
+        # display one single legend when there is multiple y-axis
+        handles,labels = [],[]
+        for ax in fig.axes:
+            for h,l in zip(*ax.get_legend_handles_labels()):
+                handles.append(h)
+                labels.append(l)
     
-    plt.legend(handles,labels, loc = 2, prop={'size': 8})
+        ax2.legend(handles,labels, loc = 2, prop={'size': 8})
     
-    fig.tight_layout()
-    plt.show()
+        fig.tight_layout()
     
 
-def model_tweet_sa_price(ticker):
+def model_tweet_sa_price(ticker, out_file = None):
     '''
     Analyzes the significance of tweet sentiment score on stock price 
     during the past 8 days.
@@ -283,51 +710,74 @@ def model_tweet_sa_price(ticker):
     Parameters
     ----------
     ticker(string): a ticker symbol
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     
     # load the merged dataset that contains price and tweet sentiment scores
     df = merge_twitter_price(ticker)
     
     #pick opening price, Compound score, Polarity scores as x variables
-    X = df[['Open','Compound']] 
-    
-    #pick adj close price as outcome variable
-    Y = df['Adj Close']
-    X = sm.add_constant(X) # adding a constant
-     
-    #assign OLS model
-    model = sm.OLS(Y, X).fit()
-    predictions = model.predict(X) 
+    #and adj close price as outcome variable, then fit the OLS model (or
+    #reuse the model already fitted on the same data)
+    model = smod.fit_ols(df, tweet_x_columns)
+    df = df.loc[model.fittedvalues.index]
+    Y = df[smod.y_column]
+    predictions = model.fittedvalues.values
      
     #print model summary
     print_model = model.summary()
     print(print_model)
     
     # plot 
-    mpl.rcParams.update(mpl.rcParamsDefault)
     df.index = pd.to_datetime(df.index)
     
-    fig, ax = plt.subplots(figsize=(6, 3))
+    with pr.chart_figure('twitter_model', out_file) as fig:
+        ax = fig.add_subplot(111)
+    
+        #plot actual stock price
+        ax.plot(df.index, Y.values, '-', color = 'royalblue', label = 'actual closing price')
     
-    #plot actual stock price
-    ax.plot(df.index, Y.values, '-', color = 'royalblue', label = 'actual closing price')
+        #plot model stock price
+        ax.plot(df.index, predictions , '--*', color = 'darkorange', label = 'model closing price')
     
-    #plot model stock price
-    ax.plot(df.index, predictions , '--*', color = 'darkorange', label = 'model closing price')
+        # format labels and ticks
+        ax.set_ylabel('Price').set_size(10)
+        ax.set_xlabel('Date').set_size(10)
+        ax.tick_params(axis = "x", labelsize = 8 ,  rotation = 0)
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
+        ax.tick_params(axis = "y", labelsize = 8 )
+        ax.set_title(ticker +': Actual closing price vs OLS Model price').set_size(10)
+        ax.legend(loc=4, prop={"size":8})
+        fig.tight_layout()
     
-    # format labels and ticks
-    ax.set_ylabel('Price').set_size(10)
-    ax.set_xlabel('Date').set_size(10)
-    ax.tick_params(axis = "x", labelsize = 8 ,  rotation = 0)
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%m-%d'))
-    ax.tick_params(axis = "y", labelsize = 8 )
-    ax.set_title(ticker +': Actual closing price vs OLS Model price').set_size(10)
-    plt.legend(loc=4, prop={"size":8})
-    plt.tight_layout()
-    plt.show()
+def model_multi_tweet_sa_price(ticker_list, full = False):
+    '''
+    Fits the tweet sentiment model of model_tweet_sa_price for many stocks,
+    without printing the summaries or plotting.
     
+    Parameters
+    ----------
+    ticker_list(list): a list of ticker symbols
+    
+    full(bool): True to fit statsmodels models (which also gives p values), 
+    False to get only the coefficients and R squared the fast way
+        
+    Returns
+    -------
+    Returns a DataFrame with one row per ticker, and the coefficients, 'R2' 
+    and 'N' (number of days) as columns.
+    '''
+    frames = {}
+    for ticker in dict.fromkeys(ticker_list):
+        frames[ticker] = merge_twitter_price(ticker)
+    
+    return smod.batch_fit(frames, tweet_x_columns, full = full)
+    
+
 
-def plot_twitter_sa(ticker):
+def plot_twitter_sa(ticker, out_file = None):
     '''
     Creates a plot that displays a stock's tweets' sentiment score
     movement over the past 8 days
@@ -335,73 +785,62 @@ def plot_twitter_sa(ticker):
     Parameters
     ----------
     ticker(string): a ticker symbol
-    '''
     
-    # tweet output file name
-    date_today = datetime.today()
-    today_str = date_today.strftime("%Y%m%d")
-    fint = ticker + '_Tweets_' + today_str + '.csv'
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
+    '''
     
     print("\n    loading tweets about " + ticker + " ... (this can take a while)")
     
-    #collect tweets and calculate sentiment score if tweet file N/A
-    if path.exists(fint) == False:
-        calc_twitter_sa(ticker)
-        
-    # load tweet dataset
-    df = pd.read_csv(fint)
-    
     # get average Positive, Negative, Neutral, Compound score, group by Date
-    df_meanSA = df.groupby(['Date']).agg({'Positive':'mean', 
-                                         'Negative':'mean',
-                                         'Neutral':'mean',
-                                         'Compound':'mean'})
+    # (tweets are collected and scored first if that has not been done today)
+    df_meanSA = daily_tweet_sa(ticker)[['Positive', 'Negative', 'Neutral', 
+                                        'Compound']]
 
     # change the Date text format from yyyy-mm-dd to mm-dd
     df_meanSA.index = pd.Series([i[-5:] for i in df_meanSA.index ])
     
     # create plots
-    mpl.rcParams.update(mpl.rcParamsDefault)
-    fig, ax = plt.subplots(figsize=(6, 3))
-    ax2 = ax.twinx()  #add a secondary y-axis
-    
-    # creates a stacked bar plot with y-axis from the left for 3 scores,
-    # because Positive + Negative + Neutral = 100%
-    df_meanSA[['Positive', 'Negative', 'Neutral']].plot(ax =ax, kind='bar', 
-        stacked=True, color=['forestgreen', 'firebrick', 'darkgrey'])
-    
-    # creates a separate compound score plot with y-axis from the right
-    df_meanSA[['Compound']].plot(ax = ax2, kind='line', label='Compound', 
-                                color = 'royalblue', )
-    
-    
-    # prevent separate legends from displaying
-    ax.get_legend().remove()
-    ax2.get_legend().remove()
-    
-    #format tickers
-    ax.tick_params(axis = "x", labelsize = 8 , rotation = 0)
-    ax.tick_params(axis = "y", labelsize = 8 )
-    ax2.tick_params(axis = "y", labelsize = 8, colors = 'royalblue' )
-    
-    #format titles and labels
-    ax.set_xlabel('Date').set_size(8)
-    ax.set_ylabel('Pos/Neg/Neu Score')
-    ax2.set_ylabel('Compound Score', color = 'royalblue')
-    ax.set_title(ticker + ': ' + 'Tweets Sentiment Score Movement').set_size(10)
-    
-    # display one single legend when there is multiple y-axis
-    handles,labels = [],[]
-    for ax in fig.axes:
-        for h,l in zip(*ax.get_legend_handles_labels()):
-            handles.append(h)
-            labels.append(l)
-    
-    plt.legend(handles,labels, loc = 2, prop={'size': 8})
-    fig.tight_layout()
-    plt.show()
+    with pr.chart_figure('twitter_sa', out_file) as fig:
+        ax = fig.add_subplot(111)
+        ax2 = ax.twinx()  #add a secondary y-axis
+    
+        # creates a stacked bar plot with y-axis from the left for 3 scores,
+        # because Positive + Negative + Neutral = 100%
+        df_meanSA[['Positive', 'Negative', 'Neutral']].plot(ax =ax, kind='bar', 
+            stacked=True, color=['forestgreen', 'firebrick', 'darkgrey'])
+    
+        # creates a separate compound score plot with y-axis from the right
+        df_meanSA[['Compound']].plot(ax = ax2, kind='line', label='Compound', 
+                                    color = 'royalblue', )
+    
+    
+        # prevent separate legends from displaying
+        ax.get_legend().remove()
+        ax2.get_legend().remove()
+    
+        #format tickers
+        ax.tick_params(axis = "x", labelsize = 8 , rotation = 0)
+        ax.tick_params(axis = "y", labelsize = 8 )
+        ax2.tick_params(axis = "y", labelsize = 8, colors = 'royalblue' )
+    
+        #format titles and labels
+        ax.set_xlabel('Date').set_size(8)
+        ax.set_ylabel('Pos/Neg/Neu Score')
+        ax2.set_ylabel('Compound Score', color = 'royalblue')
+        ax.set_title(ticker + ': ' + 'Tweets Sentiment Score Movement').set_size(10)
+    
+        # display one single legend when there is multiple y-axis
+        handles,labels = [],[]
+        for ax in fig.axes:
+            for h,l in zip(*ax.get_legend_handles_labels()):
+                handles.append(h)
+                labels.append(l)
+    
+        ax2.legend(handles,labels, loc = 2, prop={'size': 8})
+        fig.tight_layout()
 
-def plot_multi_tweet_sa(ticker_list):
+def plot_multi_tweet_sa(ticker_list, out_file = None):
     '''
     Plots multiple stocks' tweet sentiment score movement over the past 8 
     days
@@ -409,6 +848,9 @@ def plot_multi_tweet_sa(ticker_list):
     Parameters
     ----------
     ticker_list(list): a list containing up to 5 tickers
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     
     # line styles for each different stocks (up to 5 stocks in a plot)
@@ -420,23 +862,12 @@ def plot_multi_tweet_sa(ticker_list):
     for i in range(len(ticker_list)):
         ticker = ticker_list[i]
        
-        date_today = datetime.today()
-        today_str = date_today.strftime("%Y%m%d")
-        fint = ticker + '_Tweets_' + today_str + '.csv'   # input file name
-        
-        # if input file N/A, extract tweets and calc sentiment score
-        # for the stock first
+        # get the stock's average sentiment compound score by date (tweets 
+        # are collected and scored first if that has not been done today)
         print("\n    loading tweets about " + ticker +" ... (this can take a while)")
-        if path.exists(fint) == False:
-            collect_tweet(ticker)
-        calc_twitter_sa(ticker)
-        
-        # load the stock's tweets dataset that contains sentiment compound scores
-        df_ticker_i = pd.read_csv(fint)
-        df_ticker_i = df_ticker_i[['Date', 'Compound']]
+        df_ticker_i = daily_tweet_sa(ticker)['Compound'].reset_index().round(decimals=4)
             
         #rename 'Compound'' column to ticker
-        df_ticker_i = df_ticker_i.groupby(['Date'])['Compound'].mean().reset_index().round(decimals=4) 
         df_ticker_i.rename(columns={'Compound': ticker}, inplace = True)
     
         
@@ -454,24 +885,23 @@ def plot_multi_tweet_sa(ticker_list):
     pd_merge_tweet.set_index('Date',inplace = True)
     
     # plot sentiment scores for all tickers 
-    mpl.rcParams.update(mpl.rcParamsDefault)
-    fig, ax = plt.subplots(figsize=(6, 3))
-    
-    # loop to add plots one by one with unique line styles
-    for i, j in zip(pd_merge_tweet.columns, used_linestyles ):
-        ax.plot(pd_merge_tweet.index, pd_merge_tweet[i].values, j)
-    
-    # format labels and ticks
-    ax.set_xlim(min(pd_merge_tweet.index), max(pd_merge_tweet.index))
-    ax.tick_params(axis = "x", labelsize = 8 )
-    ax.tick_params(axis = "y", labelsize = 8 )
-    ax.xaxis.set_major_formatter(mdates.DateFormatter('%b-%d'))
-    
-    ax.set_ylabel('Sentiment Score').set_size(10)
-    ax.set_xlabel('Date').set_size(10)
-    ax.set_title("Tweet sentiment score over time").set_size(10)
-    plt.legend(ticker_list, loc =2,  prop={"size":8})
-    plt.tight_layout()
-    plt.show()
+    with pr.chart_figure('multi_twitter_sa', out_file) as fig:
+        ax = fig.add_subplot(111)
+    
+        # loop to add plots one by one with unique line styles
+        for i, j in zip(pd_merge_tweet.columns, used_linestyles ):
+            ax.plot(pd_merge_tweet.index, pd_merge_tweet[i].values, j)
+    
+        # format labels and ticks
+        ax.set_xlim(min(pd_merge_tweet.index), max(pd_merge_tweet.index))
+        ax.tick_params(axis = "x", labelsize = 8 )
+        ax.tick_params(axis = "y", labelsize = 8 )
+        ax.xaxis.set_major_formatter(mdates.DateFormatter('%b-%d'))
+    
+        ax.set_ylabel('Sentiment Score').set_size(10)
+        ax.set_xlabel('Date').set_size(10)
+        ax.set_title("Tweet sentiment score over time").set_size(10)
+        ax.legend(ticker_list, loc =2,  prop={"size":8})
+        fig.tight_layout()
     
 
@@ -0,0 +1,211 @@
+
+#=========== pakages/modules that are used here ==============================
+import os
+import re
+import csv
+import json
+import time
+import string
+import threading
+from os import path
+
+#================ code =======================================================
+# file that keeps the company names already looked up, saved in the same
+# folder as the csv files
+cache_file = 'SymbolCache.json'
+
+# optional local symbol list (e.g. an exchange's listed-companies file), with
+# one row per ticker and the columns named in symbol_list_columns. If the file
+# is there, tickers in it are checked without going on the web.
+symbol_list_file = 'SymbolList.csv'
+symbol_list_columns = ('Symbol', 'Name')
+
+# True to treat every ticker that is not in the symbol list as invalid,
+# without looking it up on the web (only if the symbol list file is there)
+offline_only = False
+
+# number of days a looked-up name is kept before it is looked up again:
+#   name_ttl_days - for valid tickers
+#   invalid_ttl_days - for invalid tickers, which may be listed soon
+name_ttl_days = 30
+invalid_ttl_days = 1
+
+_entries = None
+_symbol_list = None
+_lock = threading.Lock()
+
+
+def short_name(full_name):
+    '''
+    Gets the first word from a company's name.
+
+    For example, if a company's name is 'Amazon.com, Inc.', the function
+    returns 'Amazon'.
+
+    Parameters
+    ----------
+    full_name(string): a company's name
+
+    Returns
+    -------
+    Returns the first word (string) from the name.
+    '''
+    return re.split("[" + string.punctuation + " ]+", full_name)[0]
+
+
+def load_symbol_list(f_name = None):
+    '''
+    Loads the local symbol list into a dictionary.
+
+    Parameters
+    ----------
+    f_name(string): the symbol list file, None means symbol_list_file. A
+    '.txt' file is read as '|' separated, like the Nasdaq listed-companies
+    files; any other file as comma separated.
+
+    Returns
+    -------
+    Returns a dictionary that maps each ticker to its company name. It is
+    empty if there is no symbol list file.
+    '''
+    if f_name is None:
+        f_name = symbol_list_file
+
+    symbols = {}
+    if path.exists(f_name) == False:
+        return symbols
+
+    symbol_col, name_col = symbol_list_columns
+    delimiter = '|' if f_name.endswith('.txt') else ','
+
+    with open(f_name, newline = '', encoding = 'utf-8') as f:
+        for row in csv.DictReader(f, delimiter = delimiter):
+            ticker = (row.get(symbol_col) or '').strip()
+            if ticker != '':
+                symbols[ticker] = (row.get(name_col) or '').strip()
+
+    return symbols
+
+
+def load_entries():
+    '''
+    Loads the saved company names from the cache file, the first time they
+    are needed. The caller must hold _lock.
+    '''
+    global _entries, _symbol_list
+
+    if _symbol_list is None:
+        _symbol_list = load_symbol_list()
+
+    if _entries is None:
+        _entries = {}
+        if path.exists(cache_file):
+            try:
+                with open(cache_file, 'r') as f:
+                    _entries = json.load(f)
+            except ValueError:
+                # a broken cache file is just started again
+                _entries = {}
+
+
+def save_entries():
+    '''
+    Saves the company names to the cache file, replacing the old file in one
+    step. The caller must hold _lock.
+    '''
+    f_tmp = cache_file + '.tmp'
+    with open(f_tmp, 'w') as f:
+        json.dump(_entries, f)
+    os.replace(f_tmp, cache_file)
+
+
+def is_fresh(entry):
+    '''
+    Checks if a cache entry is still within its time to live.
+
+    Parameters
+    ----------
+    entry(dict): a cache entry
+
+    Returns
+    -------
+    True, if the entry can still be used. Otherwise, False.
+    '''
+    ttl_days = name_ttl_days if entry['valid'] else invalid_ttl_days
+    return time.time() - entry['checked'] < ttl_days * 24 * 3600
+
+
+def lookup(ticker, fetch_name):
+    '''
+    Gets a ticker's company name, valid flag and short name.
+
+    The symbol list is checked first, then the cache file, and only if both
+    do not have the ticker (or its cache entry is too old) fetch_name is
+    called, and its answer is saved in the cache file.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol, in uppercase like the symbol list
+
+    fetch_name(function): looks up a ticker's company name on the web, and
+    returns False if the ticker is not valid
+
+    Returns
+    -------
+    Returns a dictionary with keys 'name', 'short_name', 'valid' and
+    'checked' (the time of the last web lookup, in seconds since the epoch).
+    'name' and 'short_name' are False if the ticker is not valid.
+    '''
+    with _lock:
+        load_entries()
+
+        if ticker in _symbol_list:
+            name = _symbol_list[ticker]
+            return {'name': name, 'short_name': short_name(name),
+                    'valid': True, 'checked': None}
+
+        if offline_only and len(_symbol_list) > 0:
+            return {'name': False, 'short_name': False,
+                    'valid': False, 'checked': None}
+
+        entry = _entries.get(ticker)
+        if entry is not None and is_fresh(entry):
+            return entry
+
+    # look it up on the web outside the lock, so other tickers are not held up
+    name = fetch_name(ticker)
+
+    entry = {'name': name,
+             'short_name': short_name(name) if name != False else False,
+             'valid': name != False,
+             'checked': time.time()}
+
+    with _lock:
+        _entries[ticker] = entry
+        save_entries()
+
+    return entry
+
+
+def invalidate(ticker = None):
+    '''
+    Removes a ticker (or every ticker) from the cache, so its name is looked
+    up again next time.
+
+    Parameters
+    ----------
+    ticker(string): a ticker symbol, None means all tickers
+    '''
+    global _symbol_list
+
+    with _lock:
+        load_entries()
+
+        if ticker is None:
+            _entries.clear()
+            # the symbol list is read again too, in case the file changed
+            _symbol_list = None
+        else:
+            _entries.pop(ticker, None)
+
+        save_entries()
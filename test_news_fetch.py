@@ -0,0 +1,286 @@
+
+#=========== pakages/modules that are used here ==============================
+import os
+import glob
+import html
+import time
+import threading
+import http.server
+import urllib.parse
+from concurrent.futures import CancelledError
+from os import path
+import pytest
+import requests
+
+#import from the modules I have created
+import stock_news as sn
+import web_session as ws
+
+#================ code =======================================================
+# number of headlines on every stand-in news page
+page_size = 20
+
+
+def make_news_page(headlines, days = None):
+    '''
+    Builds a small html page that looks like a 'Business Insider' news page.
+
+    Parameters
+    ----------
+    headlines(list): headline text strings to put on the page
+
+    days(int or list): how many days ago every headline (or each headline)
+    was posted, None means 1 day for the 1st headline, 2 days for the 2nd,
+    and so on
+
+    Returns
+    -------
+    Returns the html page as bytes.
+    '''
+    if days is None:
+        days = list(range(1, len(headlines) + 1))
+    elif type(days) == int:
+        days = [days] * len(headlines)
+
+    items = ''.join(
+        '<div class="col-md-6 further-news-container latest-news-padding">'
+        '<a href="#">' + html.escape(h) + '</a>'
+        '<span class="warmGrey source-and-publishdate">Reuters ' +
+        str(d) + 'd</span></div>' for h, d in zip(headlines, days))
+    return ('<html><body>' + items + '</body></html>').encode('utf-8')
+
+
+class NewsServer:
+    '''
+    A local web server in a background thread that stands in for 'Business
+    Insider', serving news pages at /news/<ticker>?p=<page>.
+
+    Other paths act like a bad website:
+        /status/<code>/<n> - answers <code> the first n times, then 200
+        /slow/<seconds> - waits that long before answering 200
+
+    requests counts the requests made to every path.
+    '''
+
+    def __init__(self, pages, delay = 0.0):
+        '''
+        Parameters
+        ----------
+        pages(dict): page number -> html bytes, which can be changed while
+        the server runs
+
+        delay(float): seconds every news page waits before it is sent
+        '''
+        self.pages = pages
+        self.requests = {}
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                with stand_in._lock:
+                    count = stand_in.requests.get(url.path, 0) + 1
+                    stand_in.requests[url.path] = count
+
+                parts = url.path.strip('/').split('/')
+                body = b'ok'
+                status = 200
+
+                if parts[0] == 'news':
+                    time.sleep(delay)
+                    page = int(urllib.parse.parse_qs(url.query).get('p', ['0'])[0])
+                    if page in stand_in.pages:
+                        body = stand_in.pages[page]
+                    else:
+                        status, body = 404, b''
+                elif parts[0] == 'status' and count <= int(parts[2]):
+                    status = int(parts[1])
+                elif parts[0] == 'slow':
+                    time.sleep(float(parts[1]))
+
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    # the client stopped waiting
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target = self.server.serve_forever, daemon = True).start()
+
+    def url(self, url_path):
+        return 'http://127.0.0.1:' + str(self.server.server_port) + url_path
+
+    def count(self, url_path):
+        with self._lock:
+            return self.requests.get(url_path, 0)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def server():
+    pages = {p: make_news_page(['Headline ' + str(p) + '-' + str(i)
+                                for i in range(page_size)])
+             for p in range(1, 11)}
+    news_server = NewsServer(pages, delay = 0.02)
+    yield news_server
+    news_server.close()
+
+
+@pytest.fixture
+def news_site(server, tmp_path, monkeypatch):
+    '''
+    Points stock_news at the stand-in server, with the files written to a
+    temp folder.
+    '''
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sn, 'news_url', server.url('/news/{}?p={}'))
+    monkeypatch.setattr(ws, 'backoff_factor', 0.01)
+    return server
+
+
+def test_serial_and_concurrent_csv_same(news_site, monkeypatch):
+    monkeypatch.setattr(sn, 'incremental_news', False)
+    results = {}
+
+    for workers in [1, 4]:
+        f_name = sn.get_stock_news('TEST', 10, workers)
+        with open(f_name, 'rb') as f:
+            results[workers] = f.read()
+        os.remove(f_name)
+
+    assert results[1] == results[4]
+    assert results[1].count(b'Headline ') == 10 * page_size
+
+
+def test_missing_pages_are_left_out(news_site, monkeypatch):
+    monkeypatch.setattr(sn, 'incremental_news', False)
+    f_name = sn.get_stock_news('TEST', 12, 4)
+
+    with open(f_name, 'rb') as f:
+        assert f.read().count(b'Headline ') == 10 * page_size
+
+
+def test_news_store_stops_when_asked(news_site):
+    stop = threading.Event()
+    stop.set()
+
+    with pytest.raises(CancelledError):
+        sn.update_news_store('TEST', 5, stop = stop)
+    assert news_site.count('/news/test') == 0
+    assert path.exists(sn.news_store_names('TEST')[0]) == False
+
+
+def test_fetch_retries_server_errors(news_site):
+    response = ws.fetch(news_site.url('/status/503/2'), retries = 3)
+
+    assert response.status_code == 200
+    assert news_site.count('/status/503/2') == 3
+
+
+def test_fetch_gives_up_after_retries(news_site):
+    response = ws.fetch(news_site.url('/status/500/99'), retries = 2)
+
+    assert response.status_code == 500
+    assert news_site.count('/status/500/99') == 3
+
+
+def test_fetch_does_not_retry_client_errors(news_site):
+    response = ws.fetch(news_site.url('/status/404/99'), retries = 2)
+
+    assert response.status_code == 404
+    assert news_site.count('/status/404/99') == 1
+
+
+def test_fetch_backoff_doubles(news_site, monkeypatch):
+    monkeypatch.setattr(ws, 'backoff_factor', 0.1)
+
+    start = time.perf_counter()
+    ws.fetch(news_site.url('/status/502/2'), retries = 2)
+
+    # waits 0.1 s, then 0.2 s
+    assert time.perf_counter() - start >= 0.3
+
+
+def test_fetch_times_out_slow_page(news_site):
+    start = time.perf_counter()
+    with pytest.raises(requests.Timeout):
+        ws.fetch(news_site.url('/slow/2'), timeout = 0.2, retries = 1)
+
+    assert time.perf_counter() - start < 1.5
+    assert news_site.count('/slow/2') == 2
+
+
+def test_slow_news_page_is_skipped(news_site, monkeypatch):
+    monkeypatch.setattr(sn, 'news_url', news_site.url('/slow/2?t={}&p={}'))
+    monkeypatch.setattr(ws, 'request_timeout', 0.2)
+    monkeypatch.setattr(ws, 'max_retries', 0)
+
+    assert sn.fetch_news_page('TEST', 1, None) is None
+
+
+def test_failed_refresh_is_tried_again(news_site, monkeypatch):
+    monkeypatch.setattr(sn, 'news_refresh_minutes', 0)
+    pages = news_site.pages
+    for p in [1, 2]:
+        pages[p] = make_news_page(['Headline ' + str(p) + '-' + str(i)
+                                   for i in range(page_size)], days = 1)
+    df_store, meta = sn.update_news_store('TEST', 2, workers = 1)
+    assert len(df_store) == 2 * page_size
+
+    # a new headline comes out, but page 2 cannot be loaded
+    pages[1] = make_news_page(['Breaking news'] + ['Headline 1-' + str(i)
+                                                   for i in range(page_size - 1)],
+                              days = 1)
+    del pages[2]
+    df_failed, meta_failed = sn.update_news_store('TEST', 2, workers = 1)
+
+    assert len(df_failed) == len(df_store)
+    assert meta_failed['updated'] == meta['updated']
+
+    # the next update finds the new headline
+    pages[2] = make_news_page(['Headline 1-' + str(page_size - 1)] + 
+                              ['Headline 2-' + str(i) for i in range(page_size - 1)],
+                              days = 1)
+    df_store, meta = sn.update_news_store('TEST', 2, workers = 1)
+    assert df_store['Headline'].iloc[0] == 'Breaking news'
+    assert len(df_store) == 2 * page_size + 1
+
+
+def test_no_news_file_when_every_page_fails(news_site, monkeypatch):
+    news_site.pages.clear()
+
+    for incremental in [True, False]:
+        monkeypatch.setattr(sn, 'incremental_news', incremental)
+        assert sn.get_stock_news('TEST', 3, 2) is None
+        assert glob.glob('TEST_HisNews_*.csv') == []
+    assert path.exists(sn.news_store_names('TEST')[1]) == False
+
+
+def test_same_headline_on_other_days_is_kept(news_site, monkeypatch):
+    monkeypatch.setattr(sn, 'news_refresh_minutes', 0)
+    pages = news_site.pages
+    pages.clear()
+    pages[1] = make_news_page(['Shares rise'] + ['Old news ' + str(i) 
+                                                 for i in range(page_size - 1)], days = 3)
+    pages[2] = make_news_page(['Older news ' + str(i) for i in range(page_size)], days = 4)
+    sn.update_news_store('TEST', 2, workers = 1)
+
+    # the same headline is posted again 2 days later
+    pages[1] = make_news_page(['Shares rise', 'Shares rise'] + 
+                              ['Old news ' + str(i) for i in range(page_size - 2)],
+                              [1] + [3] * (page_size - 1))
+    df_store, meta = sn.update_news_store('TEST', 2, workers = 1)
+
+    assert df_store['Headline'].tolist().count('Shares rise') == 2
+    assert len(df_store) == 2 * page_size + 1
@@ -0,0 +1,47 @@
+
+#=========== pakages/modules that are used here ==============================
+import numpy as np
+import pandas as pd
+import pytest
+
+#import from the modules I have created
+import sa_model as smod
+
+#================ code =======================================================
+x_columns = ['Open', 'Compound', 'Polarity']
+n_days = 650
+
+
+@pytest.fixture
+def model_df():
+    '''
+    Made-up model data for n_days days, with a few days missing a value.
+    '''
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({'Open': 100 + rng.normal(0, 1, n_days).cumsum(),
+                       'Compound': rng.uniform(-1, 1, n_days),
+                       'Polarity': rng.uniform(-1, 1, n_days)},
+                      index = pd.date_range('2020-01-01', periods = n_days))
+    df['Adj Close'] = (2 + 0.98 * df['Open'] + 1.5 * df['Compound'] -
+                       0.5 * df['Polarity'] + rng.normal(0, 0.5, n_days))
+    df.iloc[[30, 31, 200, 420], 1] = np.nan
+    return df
+
+
+# a news chart window, a window long enough for the recursive updates, and an
+# expanding window
+@pytest.mark.parametrize('window', [10, smod.rls_min_window + 50, None])
+def test_rolling_coefs_same_as_fit_ols(model_df, window):
+    coefs = smod.rolling_coefs(model_df, x_columns, window)
+    usable = model_df.notna().all(axis = 1).to_numpy()
+    min_rows = len(x_columns) + 2 if window is None else window
+
+    for i in range(n_days):
+        start = 0 if window is None else max(0, i - window + 1)
+        if usable[start:i + 1].sum() < min_rows:
+            assert coefs.iloc[i].isna().all()
+            continue
+
+        model = smod.fit_ols(model_df.iloc[start:i + 1], x_columns)
+        assert np.allclose(coefs.iloc[i].to_numpy(), model.params.to_numpy(),
+                           rtol = 1e-6, atol = 1e-8)
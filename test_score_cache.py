@@ -0,0 +1,41 @@
+
+#=========== pakages/modules that are used here ==============================
+import os
+import numpy as np
+
+#import from the modules I have created
+import sentiment_cache as sc
+
+#================ code =======================================================
+def test_caches_sharing_a_file_keep_max_entries(tmp_path):
+    f_name = str(tmp_path / 'cache.sqlite')
+    first = sc.ScoreCache(f_name, 'v1', 2, max_entries = 10)
+    second = sc.ScoreCache(f_name, 'v1', 2, max_entries = 10)
+
+    first_keys = ['first ' + str(i) for i in range(8)]
+    second_keys = ['second ' + str(i) for i in range(8)]
+    first.put_many(first_keys, np.ones((8, 2)))
+    second.put_many(second_keys, np.ones((8, 2)))
+
+    # the 2nd cache counts the rows saved by the 1st one before it removes any
+    assert len(first) == len(second) == 10
+    assert sorted(first.get_many(first_keys + second_keys)) == first_keys[-2:] + second_keys
+
+    first.close()
+    second.close()
+
+
+def test_lookups_are_marked_used_with_the_next_write(tmp_path):
+    f_name = str(tmp_path / 'cache.sqlite')
+    cache = sc.ScoreCache(f_name, 'v1', 2, max_entries = 3)
+    cache.put_many(['a', 'b', 'c'], np.ones((3, 2)))
+
+    # a lookup does not write to the file
+    wal_size = os.path.getsize(f_name + '-wal')
+    assert list(cache.get_many(['a'])) == ['a']
+    assert os.path.getsize(f_name + '-wal') == wal_size
+
+    # 'a' was used after 'b', so 'b' is the row removed
+    cache.put_many(['d'], np.zeros((1, 2)))
+    assert sorted(cache.get_many(['a', 'b', 'c', 'd'])) == ['a', 'c', 'd']
+    cache.close()
@@ -0,0 +1,66 @@
+
+#=========== pakages/modules that are used here ==============================
+import os
+import sys
+import json
+import subprocess
+from os import path
+import pytest
+
+#================ code =======================================================
+# max seconds from starting group11_main until its main menu asks for input.
+# Wall-clock time depends on the machine, so the time is only checked when
+# the STARTUP_BUDGET environment variable is set, like STARTUP_BUDGET=1.5
+startup_budget = os.environ.get('STARTUP_BUDGET')
+
+# packages that take long to import and must not be imported for the main
+# menu
+heavy_packages = ['pandas', 'numpy', 'matplotlib', 'statsmodels', 'tweepy',
+                  'textblob', 'nltk', 'spacy', 'en_core_web_sm', 'wordcloud', 'bs4']
+
+# runs group11_main as the main module up to its first menu prompt, then
+# exits the program. Background threads are not started, so only what the
+# main thread imports is in sys.modules.
+start_code = '''
+import sys, json, time, builtins, runpy, threading
+start = time.perf_counter()
+seen = {}
+
+def first_input(prompt = ''):
+    if not seen:
+        seen['seconds'] = time.perf_counter() - start
+        seen['imported'] = [m for m in %r if m in sys.modules]
+    return 'Q'
+
+builtins.input = first_input
+threading.Thread.start = lambda self: None
+runpy.run_path('group11_main.py', run_name = '__main__')
+print(json.dumps(seen))
+'''
+
+
+def run_startup():
+    '''
+    Starts group11_main in a new python process, from this folder.
+
+    Returns
+    -------
+    Returns a dictionary with 'seconds' (time to the first menu prompt) and
+    'imported' (the heavy packages imported by then).
+    '''
+    result = subprocess.run([sys.executable, '-c', start_code % heavy_packages],
+                            capture_output = True, text = True, check = True,
+                            cwd = path.dirname(path.abspath(__file__)))
+
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_main_menu_imports_no_heavy_package():
+    assert run_startup()['imported'] == []
+
+
+@pytest.mark.skipif(startup_budget is None, reason = 'STARTUP_BUDGET is not set')
+def test_main_menu_within_budget():
+    # the fastest of 3 runs counts, so a busy machine does not fail the test
+    seconds = min(run_startup()['seconds'] for i in range(3))
+    assert seconds <= float(startup_budget)
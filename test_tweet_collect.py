@@ -0,0 +1,183 @@
+
+#=========== pakages/modules that are used here ==============================
+import os
+import time
+import glob
+import threading
+from types import SimpleNamespace
+from concurrent.futures import CancelledError
+from datetime import datetime
+import pytest
+
+#import from the modules I have created
+import sentiment_analysis as sa
+import stock_twitter as st
+import symbol_cache as sym
+
+#================ code =======================================================
+tweet_texts = ['Shares of Test Corp rose after strong earnings',
+               'Test Corp misses revenue estimates, stock falls',
+               'Analysts are neutral on Test Corp ahead of the meeting',
+               'Great quarter for Test Corp, buying more',
+               'Terrible guidance from Test Corp today']
+
+
+class StubSearchAPI:
+    '''
+    A local stand-in for the Twitter search API, which gives the same
+    made-up tweets every time, after a delay like a remote server.
+
+    searched holds the 'until' date of every search request made, and
+    fail_windows maps the 'until' dates whose searches raise an error to the
+    number of pages given before the error, to act like a stopped run.
+    '''
+
+    def __init__(self, texts, per_day = 250, delay = 0.01):
+        '''
+        Parameters
+        ----------
+        texts(list): tweet text strings to make the tweets from
+
+        per_day(int): number of tweets there are in each day window
+
+        delay(float): seconds every search request waits
+        '''
+        self.texts = texts
+        self.per_day = per_day
+        self.delay = delay
+        self.searched = []
+        self.fail_windows = {}
+        self._lock = threading.Lock()
+
+    def search(self, q, until, count, max_id = None, **kwargs):
+        with self._lock:
+            pages = self.searched.count(until)
+            self.searched.append(until)
+
+        time.sleep(self.delay)
+        if until in self.fail_windows and pages >= self.fail_windows[until]:
+            raise RuntimeError('search failed for ' + until)
+
+        # tweet ids count down from the top id of the day window
+        day = datetime.strptime(until, '%Y-%m-%d')
+        top_id = int(day.strftime('%Y%m%d')) * 1000 + self.per_day - 1
+        first_id = top_id if max_id is None else min(max_id, top_id)
+        last_id = max(first_id - count, top_id - self.per_day)
+
+        return [SimpleNamespace(id = i, created_at = day, truncated = False,
+                                full_text = '@user ' + self.texts[i % len(self.texts)] +
+                                ' https://t.co/x' + str(i))
+                for i in range(first_id, last_id, -1)]
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    '''
+    Works in a temp folder with a symbol list that has the made-up ticker,
+    and keeps the sentiment cache file out of it.
+    '''
+    monkeypatch.chdir(tmp_path)
+    with open(sym.symbol_list_file, 'w') as f:
+        f.write('Symbol,Name\nTEST,Test Corp\n')
+    monkeypatch.setattr(sym, '_symbol_list', None)
+    monkeypatch.setattr(sym, '_entries', None)
+    monkeypatch.setattr(sa, 'use_cache', False)
+    return StubSearchAPI(tweet_texts)
+
+
+def collect(api, workers = None, stop = None):
+    '''
+    Runs st.collect_tweet for the made-up ticker with a rate limit bucket
+    that never waits, and returns the csv file's bytes.
+    '''
+    f_name = st.collect_tweet('TEST', api = api, workers = workers,
+                              bucket = st.TokenBucket(1000, 1), stop = stop)
+    with open(f_name, 'rb') as f:
+        return f.read()
+
+
+def test_one_and_many_workers_csv_same(api):
+    results = {}
+    for workers in [1, st.search_workers]:
+        results[workers] = collect(api, workers)
+        os.remove(glob.glob('TEST_Tweets_????????.csv')[0])
+
+    assert results[1] == results[st.search_workers]
+    assert results[1].count(b'\n') == 1 + st.tweet_days * st.tweets_per_day
+    assert glob.glob('*_part*') == []
+
+
+def test_resume_after_window_fails_partway(api):
+    expected = collect(api, 1)
+    os.remove(glob.glob('TEST_Tweets_????????.csv')[0])
+
+    # the oldest window fails on its second page
+    windows = st.day_windows()
+    failed = windows[-1][1]
+    api.fail_windows = {failed: 1}
+    api.searched = []
+    with pytest.raises(RuntimeError):
+        collect(api)
+
+    assert api.searched.count(failed) == 2
+    assert glob.glob('TEST_Tweets_????????.csv') == []
+    assert len(glob.glob('*_part*.csv')) == len(windows) - 1
+
+    # the next run only searches the window that was not finished
+    api.fail_windows = {}
+    api.searched = []
+    assert collect(api) == expected
+    assert set(api.searched) == {failed}
+    assert glob.glob('*_part*') == []
+
+
+def test_resume_does_not_search_finished_windows(api):
+    expected = collect(api, 1)
+    os.remove(glob.glob('TEST_Tweets_????????.csv')[0])
+
+    # one window fails at its first page, a later one at its second page;
+    # the windows after the 1st failure may not be searched at all
+    windows = st.day_windows()
+    api.fail_windows = {windows[2][1]: 0, windows[5][1]: 1}
+    api.searched = []
+    with pytest.raises(RuntimeError):
+        collect(api, 1)
+
+    finished = [until for i, (since, until) in enumerate(windows)
+                if os.path.exists(st.tweet_part_name('TEST_Tweets_' + 
+                    datetime.today().strftime('%Y%m%d') + '.csv', i))]
+    assert windows[2][1] not in finished and len(finished) >= 2
+
+    api.fail_windows = {}
+    api.searched = []
+    assert collect(api, st.search_workers) == expected
+
+    # every window not finished is searched once, page by page
+    pages = st.tweets_per_day // st.tweets_per_page
+    for since, until in windows:
+        assert api.searched.count(until) == (0 if until in finished else pages)
+
+
+def test_collect_stops_when_asked(api):
+    stop = threading.Event()
+    stop.set()
+
+    with pytest.raises(CancelledError):
+        collect(api, stop = stop)
+    assert api.searched == []
+    assert glob.glob('TEST_Tweets_????????.csv') == []
+
+
+def test_collect_stops_while_waiting_for_rate_limit(api):
+    # an empty bucket, refilled with one request only after a minute
+    stop = threading.Event()
+    bucket = st.TokenBucket(1, 60)
+    bucket.take()
+    threading.Timer(0.2, stop.set).start()
+
+    start = time.monotonic()
+    with pytest.raises(CancelledError):
+        st.collect_tweet('TEST', api = api, workers = 1, bucket = bucket, stop = stop)
+    assert time.monotonic() - start < 5
+    assert api.searched == []
+    assert glob.glob('TEST_Tweets_????????.csv') == []
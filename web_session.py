@@ -0,0 +1,114 @@
+
+#=========== pakages/modules that are used here ==============================
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import CancelledError
+
+#================ code =======================================================
+# settings for every web request made through this module:
+#   request_timeout - seconds to wait for a server to connect and respond
+#   max_retries - number of times a failed request is tried again
+#   backoff_factor - seconds to wait before the 1st retry, doubled each time
+#   pool_size - max number of keep-alive connections kept per host
+request_timeout = 10
+max_retries = 3
+backoff_factor = 0.5
+pool_size = 16
+
+# server responses that are worth trying again
+retry_status = [429, 500, 502, 503, 504]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    '''
+    Gets the shared requests session, creating it the first time it is
+    needed.
+
+    The session keeps connections alive between requests, so many requests
+    to the same website do not each open a new connection. It is shared by
+    all threads.
+
+    Returns
+    -------
+    Returns a requests.Session.
+    '''
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections = pool_size,
+                                  pool_maxsize = pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+
+        return _session
+
+
+def fetch(url, params = None, headers = None, timeout = None, retries = None):
+    '''
+    Gets a web page through the shared session, trying again with a growing
+    wait time if the request fails or the server is busy.
+
+    Parameters
+    ----------
+    url(string): the web page url
+
+    params(dict): url parameters
+
+    headers(dict): extra request headers
+
+    timeout(float): seconds to wait for the server, None means
+    request_timeout
+
+    retries(int): number of times to try again, None means max_retries
+
+    Returns
+    -------
+    Returns the requests.Response of the last try.
+
+    Raises requests.RequestException if the last try could not connect or
+    timed out.
+    '''
+    if timeout is None:
+        timeout = request_timeout
+    if retries is None:
+        retries = max_retries
+
+    for attempt in range(retries + 1):
+        try:
+            response = get_session().get(url, params = params,
+                                         headers = headers, timeout = timeout)
+
+            # stop if the response is fine, or if there are no tries left
+            if response.status_code not in retry_status or attempt == retries:
+                return response
+
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+
+        # wait longer before every new try
+        time.sleep(backoff_factor * 2 ** attempt)
+
+
+def check_stop(name, stop):
+    '''
+    Raises CancelledError if the loading of a stock's data has been asked to
+    stop.
+
+    Parameters
+    ----------
+    name(string): what is being loaded, like a ticker symbol, for the error
+    text
+
+    stop(Event): a threading.Event, or None if the loading cannot be stopped
+    '''
+    if stop is not None and stop.is_set():
+        raise CancelledError('loading ' + name + ' was stopped')
@@ -1,48 +1,132 @@
 
 #=========== pakages/modules that are used here ==============================
-import en_core_web_sm
-from wordcloud import WordCloud, STOPWORDS
-import matplotlib.pyplot as plt
-import matplotlib as mpl
+from collections import Counter
 from datetime import datetime
 from os import path 
 import pandas as pd
+import threading
 
 import stock_news as sn
 import stock_twitter as sw
+import plot_render as pr
+from lazy_import import lazy_import
+
+# spaCy's model and wordcloud are only imported when the first word cloud
+# is made
+en_core_web_sm = lazy_import('en_core_web_sm')
+wordcloud = lazy_import('wordcloud')
 
 #================ code =======================================================
-def create_wordcloud(text_str):
+# the spaCy pipeline parts a word cloud does not need: only the part-of-speech
+# tags are used, so the parser, the named entity recognizer and the
+# lemmatizer are left out
+nlp_disable = ['parser', 'ner', 'lemmatizer']
+
+# number of texts spaCy processes at a time
+nlp_batch_size = 256
+
+_nlp = None
+_nlp_lock = threading.Lock()
+
+
+def get_nlp():
+    '''
+    Gets the shared spaCy English model, loading it the first time it is 
+    needed.
+    
+    Returns
+    -------
+    Returns the spaCy Language object, without the nlp_disable parts.
+    '''
+    global _nlp
+    
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                _nlp = en_core_web_sm.load(disable = nlp_disable)
+    
+    return _nlp
+
+
+def pos_words(texts, pos_list = ['ADJ', 'NOUN']):
     '''
-    Creates a word cloud image for a string containing a collectons of words
+    Gets the lowercase words of some parts of speech from a list of texts.
     
     Parameters
     ----------
-    text_str(string): a string containing a collectons of words
+    texts(list): text strings, such as news headlines or tweets
+    
+    pos_list(list): the parts of speech to keep
+    
+    Returns
+    -------
+    Returns a generator that gives one list of lowercase word strings per 
+    text, in text order.
+    '''
+    for doc in get_nlp().pipe(texts, batch_size = nlp_batch_size):
+        yield [word.text.lower() for word in doc if word.pos_ in pos_list]
+
+
+def count_words(word_lists, stopwords = None):
     '''
+    Counts words one text at a time, so only the counts are kept in memory.
     
-    #set up word cloud
-    nlp = en_core_web_sm.load()
-    doc = nlp(text_str)
+    Parameters
+    ----------
+    word_lists(iterable): one list of lowercase word strings per text, such
+    as the ones from pos_words
     
-    newText =''
-    for word in doc:
-        if word.pos_ in ['ADJ', 'NOUN']:
-            newText = " ".join((newText, word.text.lower()))
-            
-    wordcloud = WordCloud(width=1000, height=500,
-                          collocations=False, stopwords = STOPWORDS
-                          ).generate(newText)
+    stopwords(set): lowercase words that are not counted, None means 
+    wordcloud's STOPWORDS
+    
+    Returns
+    -------
+    Returns a collections.Counter that maps each word to its count. Words 
+    without any letter (like numbers or symbols) are not counted.
+    '''
+    if stopwords is None:
+        stopwords = wordcloud.STOPWORDS
+    
+    word_count = Counter()
+    
+    for words in word_lists:
+        word_count.update(w for w in words 
+                          if w not in stopwords and any(c.isalpha() for c in w))
     
-    mpl.rcParams.update(mpl.rcParamsDefault)
-    plt.figure(figsize=(6, 3), facecolor='k')
-    plt.imshow(wordcloud, interpolation='bilinear')
-    plt.axis("off")
-    plt.tight_layout(pad=0)
-    plt.show()
+    return word_count
 
 
-def create_news_worldcloud(ticker, pagenum):
+def create_wordcloud(text_list, out_file = None):
+    '''
+    Creates a word cloud image for a list of texts, from the counts of their
+    adjectives and nouns
+    
+    Parameters
+    ----------
+    text_list(list): text strings, such as news headlines or tweets
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
+    '''
+    
+    if isinstance(text_list, str):
+        text_list = [text_list]
+    
+    #set up word cloud
+    word_count = count_words(pos_words(text_list))
+            
+    wc_image = wordcloud.WordCloud(width=1000, height=500,
+                                   collocations=False
+                                   ).generate_from_frequencies(word_count)
+    
+    with pr.chart_figure('wordcloud', out_file, facecolor='k') as fig:
+        ax = fig.add_subplot(111)
+        ax.imshow(wc_image, interpolation='bilinear')
+        ax.axis("off")
+        fig.tight_layout(pad=0)
+
+
+def create_news_worldcloud(ticker, pagenum, out_file = None):
     '''
     Creates a word cloud image for texts from news headlines
     
@@ -51,6 +135,9 @@ def create_news_worldcloud(ticker, pagenum):
     ticker(string): a stock ticker symbol
     
     pagenum(int): number of pages of news headlines a user wants to extract
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     
     # news input file name
@@ -61,26 +148,29 @@ def create_news_worldcloud(ticker, pagenum):
     # if news input file N/A, extract and save news headlines for the stock 
     # first
     if path.exists(fint) == False:
-        sn.get_stock_news(ticker, pagenum)
+        if sn.get_stock_news(ticker, pagenum) is None:
+            return
             
     # load the dataset 
     df = pd.read_csv(fint)
     
-    # list comprehension to append all tweet text strings
-    text_list = [i for i in df['Headline'] ]
-    text_str = ''.join(text_list) 
+    # all the text strings, one per headline
+    text_list = df['Headline'].dropna().astype(str).tolist()
     
     #create word cloud
-    create_wordcloud(text_str)
+    create_wordcloud(text_list, out_file)
     
    
-def create_tweet_worldcloud(ticker):
+def create_tweet_worldcloud(ticker, out_file = None):
     '''
     Creates a word cloud image for texts from Twitter
     
     Parameters
     ----------
     ticker(string): a stock ticker symbol
+    
+    out_file(string): optional .png or .svg file to save the chart to 
+    instead of showing it
     '''
     
     date_today = datetime.today()
@@ -89,17 +179,16 @@ def create_tweet_worldcloud(ticker):
     
     # if twitter input file N/A, extract and save tweets for the stock first
     if path.exists(fint) == False:
-        sw.collect_Tweet(ticker)
+        sw.collect_tweet(ticker)
     
     # load twitter dataset 
     
     df = pd.read_csv(fint)
-    # list comprehension to append all tweet text strings
-    text_list = [i for i in df['Tweet Text'] ]
-    text_str = ''.join(text_list) 
+    # all the text strings, one per tweet
+    text_list = df['Tweet Text'].dropna().astype(str).tolist()
     
     #create word cloud
-    create_wordcloud(text_str)
+    create_wordcloud(text_list, out_file)
     
   
 